@@ -0,0 +1,9 @@
+"""
+Benchmark harness for the JSON-RPC backend.
+
+Run from the python/ directory:
+
+    python -m benchmarks.run                 # run and compare with the baseline
+    python -m benchmarks.run --save          # run and record a new baseline
+    python -m benchmarks.run --methods pdf.  # only methods starting with "pdf."
+"""
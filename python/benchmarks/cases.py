@@ -0,0 +1,114 @@
+"""
+Benchmark cases: request params for every registered RPC method.
+"""
+
+import os
+from typing import Any, Callable, Dict, Optional
+
+from .fixtures import PDF_PASSWORD
+
+# Methods that need the network; only run with --network
+NETWORK_METHODS = {"download.checkNetwork", "download.getVideoInfo", "download.video"}
+
+# Params factory: (output directory for this iteration) -> params
+CaseFactory = Callable[[str], Dict[str, Any]]
+
+
+def build_cases(fixtures: Dict[str, Any], url: Optional[str] = None) -> Dict[str, CaseFactory]:
+    """
+    Build params factories keyed by method name.
+
+    Args:
+        fixtures: Fixture paths from generate_fixtures
+        url: Video URL for the download methods (optional)
+    """
+    pdf = fixtures["pdf"]
+    video = fixtures["video"]
+    audio = fixtures["audio"]
+    jpeg = fixtures["jpeg"]
+
+    def out(name: str) -> Callable[[str], str]:
+        return lambda directory: os.path.join(directory, name)
+
+    cases: Dict[str, CaseFactory] = {
+        # PDF
+        "pdf.merge": lambda d: {"files": [pdf, fixtures["pdf2"]], "outputPath": out("merged.pdf")(d)},
+        "pdf.split": lambda d: {"file": pdf, "outputDir": d, "everyNPages": 1},
+        "pdf.compress": lambda d: {"file": pdf, "outputPath": out("compressed.pdf")(d), "quality": 60},
+        "pdf.toImages": lambda d: {"file": pdf, "outputDir": d, "dpi": 100},
+        "pdf.rotate": lambda d: {"file": pdf, "outputPath": out("rotated.pdf")(d), "angle": 90},
+        "pdf.addWatermark": lambda d: {
+            "file": pdf, "outputPath": out("watermarked.pdf")(d), "text": "BENCHMARK"
+        },
+        "pdf.encrypt": lambda d: {"file": pdf, "outputPath": out("encrypted.pdf")(d), "password": "secret"},
+        "pdf.decrypt": lambda d: {
+            "file": fixtures["pdfEncrypted"], "outputPath": out("decrypted.pdf")(d), "password": PDF_PASSWORD
+        },
+        "pdf.crack": lambda d: {
+            "file": fixtures["pdfEncrypted"], "outputPath": out("cracked.pdf")(d),
+            "method": "custom", "customPasswords": ["0000", "password", PDF_PASSWORD]
+        },
+
+        # Media
+        "media.info": lambda d: {"file": video},
+        "media.infoMany": lambda d: {"files": [video, audio]},
+        "media.videoCompress": lambda d: {
+            "file": video, "outputPath": out("compressed.mp4")(d), "preset": "veryfast"
+        },
+        "media.videoConvert": lambda d: {"file": video, "outputPath": out("converted.mkv")(d), "format": "mkv"},
+        "media.audioConvert": lambda d: {"file": audio, "outputPath": out("converted.mp3")(d), "format": "mp3"},
+        "media.audioExtract": lambda d: {"file": video, "outputPath": out("extracted.mp3")(d), "format": "mp3"},
+        "media.trim": lambda d: {"file": video, "outputPath": out("trimmed.mp4")(d), "startTime": 2, "endTime": 6},
+        "media.videoToGif": lambda d: {
+            "file": video, "outputPath": out("clip.gif")(d), "startTime": 1, "duration": 3, "width": 320
+        },
+        "media.fanout": lambda d: {"file": video, "outputs": [
+            {"outputPath": out("fanout.mp3")(d)},
+            {"outputPath": out("fanout.flac")(d)},
+            {"outputPath": out("fanout.mp4")(d), "preset": "veryfast", "resolution": "640x360"},
+        ]},
+        "media.thumbnails": lambda d: {"file": video, "count": 12, "columns": 4, "outputPath": out("sprite.jpg")(d)},
+        "media.waveform": lambda d: {"file": audio},
+        "media.concat": lambda d: {"files": [video, video], "outputPath": out("joined.mp4")(d)},
+        "media.batch": lambda d: {"jobs": [
+            {"method": "audioConvert", "params": {"file": audio, "outputPath": out(f"batch{i}.mp3")(d), "format": "mp3"}}
+            for i in range(3)
+        ]},
+
+        # Image
+        "image.info": lambda d: {"file": fixtures["tiff"]},
+        "image.createGif": lambda d: {"files": fixtures["frames"], "outputPath": out("frames.gif")(d)},
+        "image.resize": lambda d: {"file": jpeg, "outputPath": out("resized.jpg")(d), "width": 800},
+        "image.crop": lambda d: {
+            "file": fixtures["png"], "outputPath": out("cropped.png")(d), "x": 10, "y": 10, "width": 640, "height": 480
+        },
+        "image.getColors": lambda d: {"file": jpeg, "numColors": 8},
+        "image.rotate": lambda d: {"file": jpeg, "outputPath": out("rotated.jpg")(d), "angle": 33},
+        "image.flip": lambda d: {"file": fixtures["png"], "outputPath": out("flipped.png")(d)},
+        "image.enlarge": lambda d: {"file": fixtures["frames"][0], "outputPath": out("enlarged.png")(d)},
+
+        # Estimates
+        "task.estimate": lambda d: {
+            "method": "media.videoCompress", "params": {"file": video, "preset": "veryfast"}
+        },
+
+        # Download
+        "download.checkNetwork": lambda d: {"timeout": 5},
+    }
+
+    if url:
+        cases["download.getVideoInfo"] = lambda d: {"url": url}
+        cases["download.video"] = lambda d: {"url": url, "outputPath": d, "resolution": "360p"}
+
+    return cases
+
+
+def input_bytes(params: Dict[str, Any]) -> int:
+    """Total size of the input files named in a request's params."""
+    total = 0
+    for name in ("file", "files"):
+        value = params.get(name)
+        for path in value if isinstance(value, list) else [value]:
+            if isinstance(path, str) and os.path.isfile(path):
+                total += os.path.getsize(path)
+    return total
@@ -0,0 +1,138 @@
+"""
+Synthetic benchmark fixtures: PDFs, images and test-pattern media.
+"""
+
+import os
+import subprocess
+from typing import Dict
+from loguru import logger
+
+# Fixture sizes per scale
+SCALES = {
+    "small": {"pages": 10, "image": (1920, 1080), "video": 10, "audio": 30, "frames": 10},
+    "large": {"pages": 100, "image": (6000, 4000), "video": 60, "audio": 300, "frames": 40},
+}
+
+PDF_PASSWORD = "1234"
+
+
+def _gradient_image(width: int, height: int, seed: int = 0):
+    """A colorful image that doesn't compress to nothing."""
+    from PIL import Image, ImageDraw
+
+    image = Image.radial_gradient("L").resize((width, height))
+    image = Image.merge("RGB", (
+        image,
+        image.rotate(90 + seed * 7),
+        Image.linear_gradient("L").resize((width, height)),
+    ))
+    draw = ImageDraw.Draw(image)
+    step = max(8, width // 40)
+    for i in range(0, width, step):
+        draw.line([(i, 0), (width - i, height)], fill=((i * 7 + seed * 31) % 256, (i * 3) % 256, 128), width=2)
+    return image
+
+
+def _make_pdf(path: str, pages: int, image_path: str) -> None:
+    import fitz
+
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Benchmark page {number + 1}", fontsize=24)
+        page.insert_textbox(
+            fitz.Rect(72, 100, 540, 400),
+            "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 12,
+            fontsize=10
+        )
+        page.insert_image(fitz.Rect(72, 420, 540, 760), filename=image_path)
+    doc.save(path, deflate=True)
+    doc.close()
+
+
+def _make_encrypted_pdf(src: str, path: str) -> None:
+    import fitz
+
+    doc = fitz.open(src)
+    doc.save(
+        path,
+        encryption=fitz.PDF_ENCRYPT_AES_256,
+        user_pw=PDF_PASSWORD,
+        owner_pw=PDF_PASSWORD + "-owner"
+    )
+    doc.close()
+
+
+def _ffmpeg(args: list) -> None:
+    from media.ffmpeg_wrapper import get_ffmpeg_path
+
+    cmd = [get_ffmpeg_path(), "-hide_banner", "-v", "error", "-y", *args]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Fixture generation failed: {result.stderr.strip()}")
+
+
+def generate_fixtures(directory: str, scale: str = "small") -> Dict[str, object]:
+    """
+    Generate (or reuse) fixtures for a scale.
+
+    Args:
+        directory: Fixture directory
+        scale: "small" or "large"
+
+    Returns:
+        Dictionary of fixture names to paths
+    """
+    config = SCALES[scale]
+    directory = os.path.join(directory, scale)
+    os.makedirs(directory, exist_ok=True)
+
+    def path(name: str) -> str:
+        return os.path.join(directory, name)
+
+    fixtures: Dict[str, object] = {
+        "jpeg": path("image.jpg"),
+        "png": path("image.png"),
+        "tiff": path("image.tiff"),
+        "pdf": path("document.pdf"),
+        "pdf2": path("document2.pdf"),
+        "pdfEncrypted": path("encrypted.pdf"),
+        "video": path("video.mp4"),
+        "audio": path("audio.wav"),
+        "frames": [path(f"frame_{i:03d}.png") for i in range(config["frames"])],
+    }
+
+    width, height = config["image"]
+    if not os.path.exists(fixtures["jpeg"]):
+        logger.info(f"Generating {scale} image fixtures")
+        image = _gradient_image(width, height)
+        image.save(fixtures["jpeg"], quality=92)
+        image.save(fixtures["png"])
+        image.save(fixtures["tiff"])
+        for index, frame_path in enumerate(fixtures["frames"]):
+            _gradient_image(480, 270, seed=index).save(frame_path)
+
+    if not os.path.exists(fixtures["pdfEncrypted"]):
+        logger.info(f"Generating {scale} PDF fixtures")
+        page_image = path("page_image.jpg")
+        _gradient_image(1200, 900).save(page_image, quality=90)
+        _make_pdf(fixtures["pdf"], config["pages"], page_image)
+        _make_pdf(fixtures["pdf2"], max(1, config["pages"] // 2), page_image)
+        _make_encrypted_pdf(fixtures["pdf"], fixtures["pdfEncrypted"])
+
+    if not os.path.exists(fixtures["video"]):
+        logger.info(f"Generating {scale} media fixtures")
+        seconds = config["video"]
+        _ffmpeg([
+            "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={seconds}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={seconds}",
+            "-c:v", "libx264", "-preset", "veryfast", "-g", "60", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-b:a", "128k", "-shortest",
+            fixtures["video"]
+        ])
+        _ffmpeg([
+            "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=44100:duration={config['audio']}",
+            "-ac", "2", fixtures["audio"]
+        ])
+
+    return fixtures
@@ -0,0 +1,314 @@
+"""
+Benchmark runner.
+
+Drives every method registered in main.create_server through the real
+stdio JSON-RPC protocol. Each method gets a fresh backend process, so its
+peak RSS is attributable, and the result cache is disabled so every call
+does real work. Results are compared against a JSON baseline.
+
+Usage (from the python/ directory):
+
+    python -m benchmarks.run [--iterations 5] [--scale small|large]
+                             [--methods PREFIX ...] [--save] [--threshold 0.2]
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import shutil
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cases import NETWORK_METHODS, build_cases, input_bytes
+from .fixtures import generate_fixtures
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(PYTHON_DIR, "benchmarks", "baseline.json")
+
+# Differences below these are treated as noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 5.0
+MIN_RSS_DELTA_MB = 5.0
+
+
+class RpcClient:
+    """Minimal JSON-RPC client for a backend subprocess."""
+
+    def __init__(self, env: Dict[str, str]):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(PYTHON_DIR, "main.py")],
+            cwd=PYTHON_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            text=True,
+            encoding="utf-8",
+        )
+        self._messages: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._next_id = 1
+        threading.Thread(target=self._read, daemon=True).start()
+        self.ready = self._wait_for(lambda m: m.get("type") == "ready", timeout=60)
+
+    def _read(self) -> None:
+        for line in self.process.stdout:
+            try:
+                self._messages.put(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # library noise on stdout
+
+    def _wait_for(self, predicate, timeout: float) -> Dict[str, Any]:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Backend did not answer in time")
+            message = self._messages.get(timeout=remaining)
+            if predicate(message):
+                return message
+
+    def call(self, method: str, params: Dict[str, Any], timeout: float = 600) -> Tuple[Dict[str, Any], float, int]:
+        """
+        Call a method and wait for its response.
+
+        Returns:
+            (response, client-side latency in seconds, progress message count)
+        """
+        request_id = self._next_id
+        self._next_id += 1
+        progress = 0
+
+        started = time.perf_counter()
+        self.process.stdin.write(json.dumps({
+            "jsonrpc": "2.0", "id": request_id, "method": method, "params": params
+        }) + "\n")
+        self.process.stdin.flush()
+
+        while True:
+            message = self._wait_for(lambda m: True, timeout)
+            if message.get("type") == "progress":
+                progress += 1
+            elif message.get("id") == request_id:
+                return message, time.perf_counter() - started, progress
+
+    def close(self) -> None:
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def bench_method(
+    method: str,
+    factory,
+    iterations: int,
+    warmup: int,
+    work_dir: str,
+    env: Dict[str, str]
+) -> Dict[str, Any]:
+    """Benchmark one method in a fresh backend process."""
+    client = RpcClient(env)
+    latencies: List[float] = []
+    progress_counts: List[int] = []
+    total_input = 0
+    error = None
+
+    try:
+        for iteration in range(warmup + iterations):
+            out_dir = os.path.join(work_dir, method, str(iteration))
+            os.makedirs(out_dir, exist_ok=True)
+            params = factory(out_dir)
+
+            response, latency, progress = client.call(method, params)
+            shutil.rmtree(out_dir, ignore_errors=True)
+            if "error" in response:
+                error = response["error"].get("message")
+                break
+            if iteration >= warmup:
+                latencies.append(latency * 1000)
+                progress_counts.append(progress)
+                total_input += input_bytes(params)
+
+        stats, _, _ = client.call("server.stats", {})
+    finally:
+        client.close()
+
+    if error:
+        return {"error": error}
+
+    server_stats = stats["result"]
+    method_stats = server_stats["methods"].get(method, {})
+    # Each method runs alone in its own backend, so the process-wide
+    # figures belong to it
+    process_stats = server_stats.get("process", {})
+    total_seconds = sum(latencies) / 1000
+    result = {
+        "iterations": len(latencies),
+        "p50Ms": round(median(latencies), 2),
+        "p95Ms": round(_percentile(latencies, 0.95), 2),
+        "minMs": round(min(latencies), 2),
+        "maxMs": round(max(latencies), 2),
+        "callsPerSec": round(len(latencies) / total_seconds, 3) if total_seconds else None,
+        "inputMBPerSec": round(total_input / 1024 / 1024 / total_seconds, 2) if total_seconds and total_input else None,
+        "peakRssMB": process_stats.get("peakRssMB"),
+        "progressMessages": round(sum(progress_counts) / len(progress_counts), 1),
+        "startupMs": client.ready.get("timings", {}).get("startup"),
+    }
+    if method_stats.get("calls"):
+        calls = method_stats["calls"]
+        result["serverCpuMs"] = round(method_stats["cpuMs"] / calls, 2)
+        result["childCpuMs"] = round(process_stats.get("childCpuMs", 0) / calls, 2)
+    return result
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """List regressions of p50 latency and peak RSS against the baseline."""
+    regressions = []
+    for method, current in results.items():
+        previous = baseline.get("methods", {}).get(method)
+        if not previous or "error" in current or "error" in previous:
+            continue
+
+        checks = [
+            ("p50Ms", MIN_LATENCY_DELTA_MS, "ms"),
+            ("peakRssMB", MIN_RSS_DELTA_MB, "MB"),
+        ]
+        for key, min_delta, unit in checks:
+            old, new = previous.get(key), current.get(key)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > min_delta:
+                regressions.append(
+                    f"{method}: {key} {old}{unit} -> {new}{unit} (+{(new / old - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def _environment() -> Dict[str, Any]:
+    from media.ffmpeg_wrapper import get_ffmpeg_path
+
+    try:
+        ffmpeg = subprocess.run(
+            [get_ffmpeg_path(), "-version"], capture_output=True, text=True
+        ).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        ffmpeg = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "ffmpeg": ffmpeg,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every registered RPC method")
+    parser.add_argument("--iterations", type=int, default=5, help="Measured calls per method")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured calls per method")
+    parser.add_argument("--scale", choices=["small", "large"], default="small", help="Fixture size")
+    parser.add_argument("--methods", nargs="*", help="Only run methods starting with these prefixes")
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "ihw-bench-fixtures"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown ratio (0.2 = 20%%)")
+    parser.add_argument("--network", action="store_true", help="Include methods that need the network")
+    parser.add_argument("--url", help="Video URL for download.getVideoInfo / download.video")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, PYTHON_DIR)
+    from main import create_server
+
+    registered = sorted(create_server().methods)
+    fixtures = generate_fixtures(args.fixtures_dir, args.scale)
+    cases = build_cases(fixtures, args.url)
+
+    missing = [m for m in registered if m not in cases and m not in NETWORK_METHODS]
+    for method in missing:
+        print(f"warning: no benchmark case for {method}", file=sys.stderr)
+
+    selected = [
+        m for m in registered
+        if m in cases
+        and (args.network or m not in NETWORK_METHODS)
+        and (not args.methods or any(m.startswith(p) for p in args.methods))
+    ]
+
+    work_dir = tempfile.mkdtemp(prefix="ihw-bench-")
+    env = dict(
+        os.environ,
+        IHW_RESULT_CACHE="0",
+        IHW_PREWARM="0",  # keep peak RSS down to the modules each method needs
+        IHW_CACHE_DIR=os.path.join(work_dir, "cache"),
+        PYTHONUNBUFFERED="1",
+        PYTHONIOENCODING="utf-8",
+    )
+
+    results: Dict[str, Any] = {}
+    try:
+        for method in selected:
+            print(f"{method} ...", end=" ", flush=True, file=sys.stderr)
+            results[method] = bench_method(method, cases[method], args.iterations, args.warmup, work_dir, env)
+            current = results[method]
+            if "error" in current:
+                print(f"failed: {current['error']}", file=sys.stderr)
+            else:
+                print(f"p50 {current['p50Ms']} ms, p95 {current['p95Ms']} ms, "
+                      f"peak {current['peakRssMB']} MB", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scale": args.scale,
+        "iterations": args.iterations,
+        "environment": _environment(),
+        "methods": results,
+    }
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"warning: baseline was recorded at scale {baseline.get('scale')}", file=sys.stderr)
+        if baseline.get("environment", {}).get("platform") != report["environment"]["platform"]:
+            print("warning: baseline was recorded on a different platform", file=sys.stderr)
+
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            status = 1
+        else:
+            print("No regressions against baseline", file=sys.stderr)
+
+    failures = [m for m, r in results.items() if "error" in r]
+    if failures:
+        status = 1
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Memory estimates for admission control.
+
+Before a request is queued, its peak memory is estimated from input
+metadata only (image headers, file sizes, requested output sizes), so
+the estimate is cheap enough to run on the reader thread. The scheduler
+admits jobs while the projected total fits the memory budget and keeps
+the rest queued.
+"""
+
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional, Union
+from loguru import logger
+
+from .resources import cpu_count
+from .shm import is_handle
+
+
+MB = 1024 * 1024
+
+# Baseline for any handler call (interpreter objects, buffers)
+BASE_BYTES = 16 * MB
+
+# Resident size of one FFmpeg process (decoder/encoder frame pools)
+FFMPEG_VIDEO_BYTES = 256 * MB
+FFMPEG_AUDIO_BYTES = 48 * MB
+
+# PyMuPDF keeps the parsed document and decoded resources in memory
+PDF_SIZE_FACTOR = 3
+
+# Encoded image sizes are a poor proxy for pixels, but all that's left
+# for inputs that Pillow can't read a header from
+COMPRESSION_RATIO = 10
+
+# A4 page in points, used to size rendered pages
+_PAGE_POINTS = 595 * 842
+
+# Image headers read per request; further inputs are sized from the
+# examined ones, so a createGif of hundreds of frames stays cheap
+MAX_HEADER_READS = 32
+
+
+def physical_memory() -> Optional[int]:
+    """Total physical memory in bytes, if the platform reports it."""
+    if sys.platform == "win32":
+        try:
+            import ctypes
+
+            class MemoryStatus(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = MemoryStatus()
+            status.dwLength = ctypes.sizeof(MemoryStatus)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return int(status.ullTotalPhys)
+        except Exception:
+            pass
+        return None
+
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def memory_budget() -> Optional[int]:
+    """
+    Memory budget for concurrently admitted jobs, in bytes.
+
+    Read from IHW_MEMORY_BUDGET_MB (0 disables admission control);
+    defaults to half of physical memory.
+    """
+    value = os.environ.get("IHW_MEMORY_BUDGET_MB")
+    if value:
+        try:
+            mb = int(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid IHW_MEMORY_BUDGET_MB: {value}")
+        else:
+            return mb * MB if mb > 0 else None
+
+    total = physical_memory()
+    return total // 2 if total else None
+
+
+def _inputs(params: Dict[str, Any]) -> List[Any]:
+    """Input files (paths or in-memory handles) named by the request."""
+    inputs: List[Any] = []
+    for name in ("file", "files", "image", "input"):
+        value = params.get(name)
+        if value is None:
+            continue
+        inputs.extend(value if isinstance(value, list) else [value])
+    return inputs
+
+
+def _file_size(value: Any) -> int:
+    """Size of an input path or handle, 0 if unknown."""
+    if is_handle(value):
+        return int(value.get("length") or 0)
+    if isinstance(value, str):
+        try:
+            return os.path.getsize(value)
+        except OSError:
+            return 0
+    return 0
+
+
+def _image_pixels(value: Any) -> Optional[int]:
+    """Pixel count from an image header, without decoding the image."""
+    if not isinstance(value, str):
+        return None
+    try:
+        from PIL import Image
+        with Image.open(value) as img:
+            width, height = img.size
+            if img.format == "GIF":
+                # n_frames walks every frame of a GIF; guess the count from the file size
+                frames = _file_size(value) * COMPRESSION_RATIO // max(1, width * height * 4)
+            else:
+                frames = getattr(img, "n_frames", 1)
+            return width * height * max(1, frames)
+    except Exception:
+        return None
+
+
+def _decoded_bytes(value: Any) -> int:
+    """Decoded RGBA size of an input image."""
+    pixels = _image_pixels(value)
+    if pixels is not None:
+        return pixels * 4
+    return _file_size(value) * COMPRESSION_RATIO
+
+
+def estimate_image(method: str, params: Dict[str, Any]) -> int:
+    """
+    Estimate an image handler's peak memory from pixel counts.
+
+    Pillow holds the decoded source and usually one converted copy;
+    createGif keeps every frame, enlarge and resize add the output image.
+    """
+    inputs = _inputs(params)
+    examined = inputs[:MAX_HEADER_READS]
+    decoded = [_decoded_bytes(value) for value in examined]
+    if len(inputs) > len(examined):
+        # Scale the remaining file sizes by what the examined headers showed
+        sizes = sum(_file_size(value) for value in examined)
+        ratio = sum(decoded) / sizes if sizes else COMPRESSION_RATIO
+        decoded.extend(int(_file_size(value) * ratio) for value in inputs[len(examined):])
+    if method.endswith("createGif"):
+        # Frames plus their palette-quantized copies
+        return BASE_BYTES + sum(decoded) * 2
+    peak = max(decoded, default=0) * 2
+    if method.endswith("enlarge"):
+        scale = int(params.get("scaleFactor") or 2)
+        peak += max(decoded, default=0) * scale * scale
+    elif method.endswith("resize"):
+        width, height = params.get("width"), params.get("height")
+        if width and height:
+            peak += int(width) * int(height) * 4
+    return BASE_BYTES + peak
+
+
+def estimate_pdf(method: str, params: Dict[str, Any]) -> int:
+    """
+    Estimate a PDF handler's peak memory from file size and rendering.
+
+    Merged documents are all open at once. toImages renders one page at
+    a time at the requested DPI.
+    """
+    peak = sum(_file_size(value) for value in _inputs(params)) * PDF_SIZE_FACTOR
+    if method.endswith("toImages"):
+        zoom = int(params.get("dpi") or 150) / 72
+        peak += int(_PAGE_POINTS * zoom * zoom * 3) * 2
+    return BASE_BYTES + peak
+
+
+def estimate_media(method: str, params: Dict[str, Any]) -> int:
+    """
+    Estimate a media handler's peak memory.
+
+    FFmpeg runs out of process, but its frame pools count against the
+    same machine; stream copies and audio work need far less than video.
+    """
+    if method.endswith("batch"):
+        jobs = params.get("jobs") or []
+        concurrent = min(len(jobs), int(params.get("maxConcurrent") or cpu_count()))
+        per_job = max(
+            (estimate_media(str(job.get("method", "")), job.get("params") or {}) for job in jobs),
+            default=0
+        )
+        return BASE_BYTES + per_job * concurrent
+    if method.endswith("fanout"):
+        # One decoder feeding an encoder per output
+        return BASE_BYTES + FFMPEG_VIDEO_BYTES * max(1, len(params.get("outputs") or []))
+    if method.endswith(("info", "infoMany")):
+        return BASE_BYTES
+    if method.endswith(("audioConvert", "audioExtract", "trim", "waveform")):
+        return BASE_BYTES + FFMPEG_AUDIO_BYTES
+    return BASE_BYTES + FFMPEG_VIDEO_BYTES
+
+
+def estimate_download(method: str, params: Dict[str, Any]) -> int:
+    """Estimate a download's peak memory (yt-dlp plus the FFmpeg merge)."""
+    if method.endswith("video"):
+        return BASE_BYTES + FFMPEG_VIDEO_BYTES
+    return BASE_BYTES
+
+
+def estimate_default(method: str, params: Dict[str, Any]) -> int:
+    """Fallback estimate: inputs are read fully into memory."""
+    return BASE_BYTES + sum(_file_size(value) for value in _inputs(params))
+
+
+# Estimators by name, for server.register(..., memory=...)
+ESTIMATORS: Dict[str, Callable[[str, Dict[str, Any]], int]] = {
+    "image": estimate_image,
+    "pdf": estimate_pdf,
+    "media": estimate_media,
+    "download": estimate_download,
+}
+
+Estimator = Union[str, Callable[[str, Dict[str, Any]], int], None]
+
+
+def estimate_memory(estimator: Estimator, method: str, params: Any) -> int:
+    """
+    Estimate a request's peak memory in bytes.
+
+    Args:
+        estimator: Estimator name from ESTIMATORS, a callable taking
+            (method, params), or None to pick one by the method's
+            namespace ("image.resize" uses "image")
+        method: Method name
+        params: Request params
+
+    Returns:
+        Estimated peak bytes (the default estimate if estimation fails)
+    """
+    if not isinstance(params, dict):
+        return BASE_BYTES
+    if estimator is None:
+        estimator = ESTIMATORS.get(method.partition(".")[0])
+    if isinstance(estimator, str):
+        estimator = ESTIMATORS[estimator]
+    try:
+        return int((estimator or estimate_default)(method, params))
+    except Exception as e:
+        logger.debug(f"Memory estimate for {method} failed: {e}")
+        return estimate_default(method, params)
@@ -0,0 +1,383 @@
+"""
+Content-addressed result cache for idempotent RPC methods.
+
+Results are keyed by (method, normalized params, input file content hash).
+Output files are stored on disk next to a small manifest and replayed by
+hardlinking (or copying) them to the requested output location on a hit.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB
+
+# Params that name input files whose content is part of the cache key
+INPUT_PARAMS = ("file", "files", "image")
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+_MANIFEST_NAME = "manifest.json"
+
+
+def get_cache_root() -> str:
+    """
+    Get the root directory for on-disk caches.
+
+    Uses IHW_CACHE_DIR when set (Electron can point it at app.getPath('userData')),
+    otherwise the platform's user cache directory.
+    """
+    env_dir = os.environ.get("IHW_CACHE_DIR")
+    if env_dir:
+        return env_dir
+
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+    return os.path.join(base, "ihatework")
+
+
+# Memoized content hashes: (path, size, mtime_ns) -> hex digest
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+_hash_lock = threading.Lock()
+
+
+def hash_file(path: str) -> str:
+    """
+    Hash a file's content, memoized by path, size and mtime.
+
+    Args:
+        path: File path
+
+    Returns:
+        Hex SHA-256 digest of the file content
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+    with _hash_lock:
+        cached = _hash_memo.get(memo_key)
+    if cached:
+        return cached
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+
+    value = digest.hexdigest()
+    with _hash_lock:
+        _hash_memo[memo_key] = value
+    return value
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """Hardlink src to dst, falling back to a copy (e.g. across volumes)."""
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _collect_paths(value: Any) -> List[str]:
+    """Collect every string found in a (nested) result value."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        paths = []
+        for item in value:
+            paths.extend(_collect_paths(item))
+        return paths
+    if isinstance(value, dict):
+        paths = []
+        for item in value.values():
+            paths.extend(_collect_paths(item))
+        return paths
+    return []
+
+
+def _rewrite_paths(value: Any, old_prefix: str, new_prefix: str) -> Any:
+    """Rewrite strings starting with old_prefix to start with new_prefix."""
+    if isinstance(value, str):
+        if value == old_prefix or value.startswith(old_prefix + os.sep):
+            return new_prefix + value[len(old_prefix):]
+        return value
+    if isinstance(value, list):
+        return [_rewrite_paths(item, old_prefix, new_prefix) for item in value]
+    if isinstance(value, dict):
+        return {k: _rewrite_paths(v, old_prefix, new_prefix) for k, v in value.items()}
+    return value
+
+
+class ResultCache:
+    """Size-bounded LRU cache of method results and their output files."""
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or os.path.join(get_cache_root(), "results")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None  # key -> {size, lastUsed}
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, method: str, params: Dict[str, Any]) -> Optional[str]:
+        """
+        Build the cache key for a request.
+
+        Returns None when the request can't be cached (e.g. missing inputs).
+        """
+        normalized: Dict[str, Any] = {}
+        inputs: List[List[str]] = []
+
+        for name, value in params.items():
+            if name.startswith("_"):
+                continue
+            if name in INPUT_PARAMS:
+                if value is None:
+                    continue
+                files = value if isinstance(value, list) else [value]
+                for path in files:
+                    if not isinstance(path, str) or not os.path.isfile(path):
+                        return None
+                    # Basename is part of the key because outputs are named after it
+                    inputs.append([os.path.basename(path), hash_file(path)])
+            elif name == "outputPath":
+                if not isinstance(value, str):
+                    return None
+                # Only the extension influences the result (output format)
+                normalized[name] = os.path.splitext(value)[1].lower()
+            elif name == "outputDir":
+                if not isinstance(value, str):
+                    return None
+                normalized[name] = True
+            else:
+                normalized[name] = value
+
+        if not inputs:
+            return None
+
+        payload = json.dumps(
+            {"method": method, "params": normalized, "inputs": inputs},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str, params: Dict[str, Any]) -> Tuple[bool, Any]:
+        """
+        Look up a cached result and materialize its outputs.
+
+        Args:
+            key: Cache key from make_key
+            params: Request params (for the requested output location)
+
+        Returns:
+            (hit, result) tuple
+        """
+        entry_dir = os.path.join(self.root, key)
+        manifest_path = os.path.join(entry_dir, _MANIFEST_NAME)
+
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                self.misses += 1
+                return False, None
+
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+
+            # Verify stored outputs weren't modified through a shared hardlink
+            for item in manifest["files"]:
+                st = os.stat(os.path.join(entry_dir, item["stored"]))
+                if st.st_size != item["size"] or st.st_mtime_ns != item["mtimeNs"]:
+                    raise ValueError(f"Cached output changed: {item['stored']}")
+
+            result = manifest["result"]
+            kind = manifest.get("outputKind")
+            if kind:
+                old_base = manifest["outputBase"]
+                new_base = params.get(kind)
+                if kind == "outputDir":
+                    os.makedirs(new_base, exist_ok=True)
+                for item in manifest["files"]:
+                    if kind == "outputPath":
+                        dst = new_base
+                    else:
+                        dst = os.path.join(new_base, item["rel"])
+                    _link_or_copy(os.path.join(entry_dir, item["stored"]), dst)
+                result = _rewrite_paths(result, old_base, new_base)
+
+            # Persist recency for the LRU index across restarts
+            os.utime(manifest_path)
+
+        except Exception as e:
+            logger.warning(f"Dropping invalid cache entry {key}: {e}")
+            self._remove_entry(key)
+            with self._lock:
+                self.misses += 1
+            return False, None
+
+        with self._lock:
+            self.hits += 1
+            if key in self._index:
+                self._index[key]["lastUsed"] = time.time()
+        return True, result
+
+    def store(self, key: str, method: str, params: Dict[str, Any], result: Any) -> None:
+        """
+        Store a result and its output files.
+
+        Args:
+            key: Cache key from make_key
+            method: Method name
+            params: Request params
+            result: Handler result
+        """
+        entry_dir = os.path.join(self.root, key)
+        tmp_dir = entry_dir + f".tmp{threading.get_ident()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        try:
+            files = []
+            kind = None
+            base = None
+
+            if isinstance(params.get("outputPath"), str):
+                kind, base = "outputPath", params["outputPath"]
+                if os.path.isfile(base):
+                    stored = "output" + os.path.splitext(base)[1]
+                    files.append(self._stash(base, tmp_dir, stored, os.path.basename(base)))
+            elif isinstance(params.get("outputDir"), str):
+                kind, base = "outputDir", os.path.normpath(params["outputDir"])
+                for path in _collect_paths(result):
+                    path = os.path.normpath(path)
+                    if path.startswith(base + os.sep) and os.path.isfile(path):
+                        rel = os.path.relpath(path, base)
+                        stored = os.path.join("outputs", rel)
+                        files.append(self._stash(path, tmp_dir, stored, rel))
+                result = _rewrite_paths(result, params["outputDir"], base)
+
+            manifest = {
+                "method": method,
+                "result": result,
+                "outputKind": kind,
+                "outputBase": base,
+                "files": files,
+                "created": time.time(),
+            }
+            with open(os.path.join(tmp_dir, _MANIFEST_NAME), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+
+            size = sum(item["size"] for item in files)
+            if size > self.max_bytes:
+                logger.debug(f"Result of {method} too large to cache ({size} bytes)")
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return
+
+            self._remove_entry(key)
+            os.replace(tmp_dir, entry_dir)
+
+            with self._lock:
+                self._load_index()
+                self._index[key] = {"size": size, "lastUsed": time.time()}
+            logger.debug(f"Cached result of {method} ({size} bytes)")
+
+            self._evict()
+
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def clear(self) -> int:
+        """Remove every cache entry. Returns the number of entries removed."""
+        with self._lock:
+            self._load_index()
+            keys = list(self._index)
+        for key in keys:
+            self._remove_entry(key)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            self._load_index()
+            return {
+                "root": self.root,
+                "entries": len(self._index),
+                "size": sum(e["size"] for e in self._index.values()),
+                "maxSize": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _stash(self, src: str, entry_dir: str, stored: str, rel: str) -> Dict[str, Any]:
+        """Link an output file into an entry and describe it for the manifest."""
+        dst = os.path.join(entry_dir, stored)
+        _link_or_copy(src, dst)
+        st = os.stat(dst)
+        return {"stored": stored, "rel": rel, "size": st.st_size, "mtimeNs": st.st_mtime_ns}
+
+    def _load_index(self) -> None:
+        """Build the in-memory index from disk (caller holds the lock)."""
+        if self._index is not None:
+            return
+
+        self._index = {}
+        if not os.path.isdir(self.root):
+            return
+
+        for name in os.listdir(self.root):
+            manifest_path = os.path.join(self.root, name, _MANIFEST_NAME)
+            if ".tmp" in name or not os.path.isfile(manifest_path):
+                continue
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                size = sum(item["size"] for item in manifest.get("files", []))
+                # Access time isn't reliable on every filesystem, fall back to mtime
+                st = os.stat(manifest_path)
+                self._index[name] = {"size": size, "lastUsed": max(st.st_atime, st.st_mtime)}
+            except Exception as e:
+                logger.debug(f"Skipping unreadable cache entry {name}: {e}")
+
+    def _remove_entry(self, key: str) -> None:
+        """Remove a single entry from disk and the index."""
+        with self._lock:
+            if self._index is not None:
+                self._index.pop(key, None)
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until the cache fits its budget."""
+        with self._lock:
+            total = sum(e["size"] for e in self._index.values())
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, entry in sorted(self._index.items(), key=lambda kv: kv[1]["lastUsed"]):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= entry["size"]
+
+        for key in victims:
+            logger.debug(f"Evicting cache entry {key}")
+            self._remove_entry(key)
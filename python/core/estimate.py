@@ -0,0 +1,130 @@
+"""
+Sampling-based time and output size estimates for long jobs.
+
+A method's sampler runs the real work on a small sample (a few short
+video segments, a few PDF pages), measures how long it took and how many
+bytes it produced, and extrapolates to the whole input. Samplers live
+next to the handlers they sample and are imported on first use.
+(core.admission's ESTIMATORS are unrelated: they guess memory from
+params without running anything.)
+"""
+
+import math
+import time
+import importlib
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from loguru import logger
+
+
+# Method name -> dotted path of its sampler
+SAMPLERS = {
+    "media.videoCompress": "media.ffmpeg_wrapper.estimate_compress_video",
+    "pdf.compress": "pdf.compressor.estimate_compress_pdf",
+    "pdf.toImages": "pdf.converter.estimate_pdf_to_images",
+}
+
+DEFAULT_SAMPLES = 3
+MAX_SAMPLES = 12
+
+# Two-sided 95% interval. Few samples underestimate the spread, so the
+# margin never drops below MIN_MARGIN of the estimate.
+CONFIDENCE = 0.95
+_Z = 1.96
+MIN_MARGIN = 0.1
+
+
+def extrapolate(rates: Sequence[float], total: float) -> Dict[str, float]:
+    """
+    Scale per-unit sample rates to a whole job with confidence bounds.
+
+    Args:
+        rates: Measured cost per unit for each sample (e.g. seconds of
+            encoding per second of video, bytes per page)
+        total: Number of units in the whole job
+
+    Returns:
+        {"estimate", "low", "high"}
+    """
+    n = len(rates)
+    mean = sum(rates) / n
+    if n > 1:
+        stdev = math.sqrt(sum((r - mean) ** 2 for r in rates) / (n - 1))
+        margin = _Z * stdev / math.sqrt(n)
+    else:
+        margin = 0.0
+    margin = max(margin, MIN_MARGIN * mean)
+    return {
+        "estimate": round(mean * total, 2),
+        "low": round(max(0.0, mean - margin) * total, 2),
+        "high": round((mean + margin) * total, 2),
+    }
+
+
+def sample_positions(total: int, samples: int) -> List[int]:
+    """Indices of evenly spread samples out of total units (e.g. pages)."""
+    samples = max(1, min(samples, total))
+    return sorted({int((i + 0.5) * total / samples) for i in range(samples)})
+
+
+class Stopwatch:
+    """Measures the wall time of a sample."""
+
+    def __enter__(self) -> "Stopwatch":
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self.started
+
+
+def task_group(params: Dict[str, Any]) -> Optional[str]:
+    """Exclusive group of an estimate: the group of the method it samples."""
+    method = params.get("method") if isinstance(params, dict) else None
+    return "pdf" if isinstance(method, str) and method.startswith("pdf.") else None
+
+
+def estimate_task(
+    method: str,
+    params: Optional[Dict[str, Any]] = None,
+    samples: int = DEFAULT_SAMPLES,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Estimate the duration and output size of a job without running it.
+
+    Args:
+        method: Method to estimate (media.videoCompress, pdf.compress or
+            pdf.toImages)
+        params: The params the job would be called with
+        samples: Number of samples to run (more is slower but tighter)
+        _progress_callback: Optional progress callback
+
+    Returns:
+        Dictionary with "duration" (seconds) and "outputSize" (bytes), each
+        {"estimate", "low", "high"}, plus the confidence level, the number
+        of samples and the time spent sampling
+    """
+    if method not in SAMPLERS:
+        raise ValueError(f"No sampler for method: {method}")
+
+    module_name, _, attr = SAMPLERS[method].rpartition(".")
+    sampler = getattr(importlib.import_module(module_name), attr)
+
+    samples = max(1, min(int(samples), MAX_SAMPLES))
+    logger.info(f"Estimating {method} from {samples} samples")
+
+    with Stopwatch() as watch:
+        result = sampler(**{
+            **(params or {}),
+            "samples": samples,
+            "_progress_callback": _progress_callback,
+        })
+
+    result.update({
+        "method": method,
+        "confidence": CONFIDENCE,
+        "sampleTime": round(watch.elapsed, 2),
+    })
+    return result
@@ -0,0 +1,228 @@
+"""
+Per-method latency and resource instrumentation for the JSON-RPC server.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from loguru import logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Wall time samples kept per method for percentiles
+SAMPLE_SIZE = 256
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def _peak_rss() -> Optional[float]:
+    """Peak resident set size of this process in MB, if the platform reports it."""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return maxrss / divisor
+
+
+def _current_rss() -> Optional[float]:
+    """Current resident set size of this process in MB (Linux only)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * _PAGE_SIZE / (1024 * 1024)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, rounded for reporting."""
+    peak = _peak_rss()
+    return round(peak, 1) if peak is not None else None
+
+
+def _delta(end: Optional[float], start: Optional[float]) -> Optional[float]:
+    """Difference of two samples in MB, None if either is unavailable."""
+    if end is None or start is None:
+        return None
+    return round(end - start, 1)
+
+
+def _children_cpu() -> float:
+    """CPU seconds used by reaped child processes (FFmpeg, ffprobe)."""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _percentile(samples: Deque[float], fraction: float) -> float:
+    """Nearest-rank percentile of a sample window."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class _Call:
+    """In-flight measurements for one request."""
+
+    __slots__ = (
+        "method", "enqueued", "started", "cpu_start", "rss_start", "peak_rss_start",
+        "bytes_in", "bytes_out", "progress", "serialize",
+    )
+
+    def __init__(self, method: str, bytes_in: int, enqueued: float):
+        self.method = method
+        self.enqueued = enqueued
+        self.started = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        self.rss_start = _current_rss()
+        self.peak_rss_start = _peak_rss()
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self.progress = 0
+        self.serialize = 0.0
+
+
+class ServerMetrics:
+    """
+    Aggregates per-method timings and traffic.
+
+    Records wall time, CPU time of the handling thread, queue wait, bytes
+    in and out, JSON serialization time, the number of progress messages
+    and how much memory the call added: rssDeltaMB is the change in resident
+    memory from start to finish, peakRssGrowthMB how far it raised the
+    process's peak. Both are sampled for the whole process, so overlapping
+    calls show up in each other's figures.
+
+    Child process CPU time and peak RSS can't be attributed to a call and
+    are only reported process-wide, under "process" in snapshot().
+
+    Each finished call can also be appended to a JSON lines file.
+    """
+
+    def __init__(self, dump_path: Optional[str] = None):
+        self.dump_path = dump_path
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._methods: Dict[str, Dict[str, Any]] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def start_call(self, task_id: str, method: str, bytes_in: int, enqueued: Optional[float] = None) -> None:
+        """Start measuring a request, called on the thread that will handle it."""
+        call = _Call(method, bytes_in, enqueued if enqueued is not None else time.perf_counter())
+        with self._lock:
+            self._calls[task_id] = call
+
+    def record_send(self, task_id: str, nbytes: int, serialize: float, progress: bool = False) -> None:
+        """Account for a message written for a request."""
+        with self._lock:
+            call = self._calls.get(task_id)
+            if call is None:
+                return
+            call.bytes_out += nbytes
+            call.serialize += serialize
+            if progress:
+                call.progress += 1
+
+    def finish_call(self, task_id: str, ok: bool) -> None:
+        """Finish measuring a request, called on the thread that handled it."""
+        with self._lock:
+            call = self._calls.pop(task_id, None)
+        if call is None:
+            return
+
+        now = time.perf_counter()
+        record = {
+            "method": call.method,
+            "ok": ok,
+            "wallMs": round((now - call.started) * 1000, 2),
+            "cpuMs": round((time.thread_time() - call.cpu_start) * 1000, 2),
+            "queueWaitMs": round(max(0.0, call.started - call.enqueued) * 1000, 2),
+            "bytesIn": call.bytes_in,
+            "bytesOut": call.bytes_out,
+            "serializeMs": round(call.serialize * 1000, 3),
+            "progressMessages": call.progress,
+            "rssDeltaMB": _delta(_current_rss(), call.rss_start),
+            "peakRssGrowthMB": _delta(_peak_rss(), call.peak_rss_start),
+        }
+
+        with self._lock:
+            stats = self._methods.setdefault(call.method, {
+                "calls": 0, "errors": 0, "wallMs": 0.0, "maxWallMs": 0.0,
+                "cpuMs": 0.0, "queueWaitMs": 0.0, "maxQueueWaitMs": 0.0,
+                "bytesIn": 0, "bytesOut": 0, "serializeMs": 0.0, "progressMessages": 0,
+                "maxPeakRssGrowthMB": 0.0,
+            })
+            stats["calls"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["maxWallMs"] = max(stats["maxWallMs"], record["wallMs"])
+            stats["maxQueueWaitMs"] = max(stats["maxQueueWaitMs"], record["queueWaitMs"])
+            stats["maxPeakRssGrowthMB"] = max(stats["maxPeakRssGrowthMB"], record["peakRssGrowthMB"] or 0.0)
+            for key in ("wallMs", "cpuMs", "queueWaitMs", "bytesIn",
+                        "bytesOut", "serializeMs", "progressMessages"):
+                stats[key] += record[key]
+            self._samples.setdefault(call.method, deque(maxlen=SAMPLE_SIZE)).append(record["wallMs"])
+
+        if self.dump_path:
+            self._dump(record)
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Any]:
+        """Get aggregated stats per method, optionally resetting them."""
+        with self._lock:
+            methods = {}
+            for name, stats in self._methods.items():
+                samples = self._samples[name]
+                calls = stats["calls"]
+                methods[name] = {
+                    **{k: round(v, 2) if isinstance(v, float) else v for k, v in stats.items()},
+                    "meanWallMs": round(stats["wallMs"] / calls, 2),
+                    "p50WallMs": _percentile(samples, 0.5),
+                    "p95WallMs": _percentile(samples, 0.95),
+                }
+            inflight = len(self._calls)
+            if reset:
+                self._methods.clear()
+                self._samples.clear()
+
+        rss = _current_rss()
+        return {
+            "uptime": round(time.time() - self.started, 1),
+            # Whole-process figures since startup, not attributable to a method
+            "process": {
+                "peakRssMB": peak_rss_mb(),
+                "rssMB": round(rss, 1) if rss is not None else None,
+                "childCpuMs": round(_children_cpu() * 1000, 2),
+            },
+            "inflight": inflight,
+            "methods": methods,
+        }
+
+    def typical_wall(self, method: str) -> Optional[float]:
+        """Median wall time of a method in seconds, None before its first call."""
+        with self._lock:
+            samples = self._samples.get(method)
+            if not samples:
+                return None
+            return _percentile(samples, 0.5) / 1000
+
+    def _dump(self, record: Dict[str, Any]) -> None:
+        """Append one record to the JSON lines dump."""
+        line = json.dumps(dict(record, ts=time.time()))
+        try:
+            with self._lock, open(self.dump_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write stats to {self.dump_path}: {e}")
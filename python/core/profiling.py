@@ -0,0 +1,194 @@
+"""
+On-demand profiling of RPC handlers.
+
+Two modes are supported:
+- "cprofile": deterministic cProfile of the handling thread, written as a
+  .prof file for pstats / snakeviz.
+- "sampling": low-overhead stack sampling of every thread (so worker
+  threads of parallel handlers show up too), written as a speedscope file.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import cProfile
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+# Sampling interval of the stack sampler
+SAMPLE_INTERVAL = 0.005
+
+# Held while a cProfile run is active; only one can run at a time (and
+# since Python 3.12 a second one fails to start)
+_cprofile_lock = threading.Lock()
+
+
+def resolve_mode(flag: Any) -> Optional[str]:
+    """
+    Normalize a _profile flag.
+
+    Returns:
+        Profile mode, or None when profiling is off
+    """
+    if not flag:
+        return None
+    if flag is True:
+        return "cprofile"
+    if flag not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {flag}")
+    return flag
+
+
+def get_profile_dir() -> str:
+    """
+    Get the directory profiles are written to.
+
+    Uses IHW_PROFILE_DIR when set, otherwise ihw-profiles in the temp
+    directory. It is never a request's output location, which is deleted
+    when the request fails.
+    """
+    profile_dir = os.environ.get("IHW_PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "ihw-profiles")
+    os.makedirs(profile_dir, exist_ok=True)
+    return profile_dir
+
+
+def profile_path(method: str, task_id: str, mode: str) -> str:
+    """Pick a file name for a profile, unique across concurrent requests."""
+    extension = "prof" if mode == "cprofile" else "speedscope.json"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    task = re.sub(r"[^A-Za-z0-9_-]", "_", task_id)[:32]
+    return os.path.join(get_profile_dir(), f"{method}-{stamp}-{task}-{uuid.uuid4().hex[:8]}.{extension}")
+
+
+class _StackSampler:
+    """Samples the stacks of all other threads on a background thread."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.frames: List[Dict[str, Any]] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self._samples: Dict[int, List[List[int]]] = {}
+        self._weights: Dict[int, List[float]] = {}
+        self._names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self.started = 0.0
+        self.stopped = 0.0
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.stopped = time.perf_counter()
+
+    def _frame_id(self, frame) -> int:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = len(self.frames)
+            self._frame_index[key] = index
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        weight = self.interval * 1000
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                samples = self._samples.setdefault(ident, [])
+                weights = self._weights.setdefault(ident, [])
+                # Merge runs of identical stacks to keep long profiles small
+                if samples and samples[-1] == stack:
+                    weights[-1] += weight
+                else:
+                    samples.append(stack)
+                    weights.append(weight)
+                self._names[ident] = names.get(ident, str(ident))
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """Build a speedscope document with one sampled profile per thread."""
+        profiles = []
+        end = (self.stopped - self.started) * 1000
+        for ident, samples in self._samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": self._names[ident],
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": end,
+                "samples": samples,
+                "weights": self._weights[ident],
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "ihatework-backend",
+            "shared": {"frames": self.frames},
+            "profiles": profiles,
+        }
+
+
+def run_profiled(
+    handler: Callable,
+    params: Dict[str, Any],
+    method: str,
+    mode: str,
+    task_id: str
+) -> Tuple[Any, str]:
+    """
+    Call a handler under a profiler and write the profile.
+
+    The profile is written even when the handler raises, since slow
+    failures are worth diagnosing too. A cProfile request that overlaps
+    another one is sampled instead of waiting for it.
+
+    Returns:
+        (handler result, profile file path)
+    """
+    if mode == "cprofile":
+        if _cprofile_lock.acquire(blocking=False):
+            path = profile_path(method, task_id, mode)
+            try:
+                profiler = cProfile.Profile()
+                try:
+                    result = profiler.runcall(handler, **params)
+                finally:
+                    profiler.dump_stats(path)
+                    logger.info(f"Wrote cProfile of {method} to {path}")
+            finally:
+                _cprofile_lock.release()
+            return result, path
+        logger.info(f"cProfile already running, sampling {method} instead")
+        mode = "sampling"
+
+    path = profile_path(method, task_id, mode)
+    sampler = _StackSampler()
+    sampler.start()
+    try:
+        result = handler(**params)
+    finally:
+        sampler.stop()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(sampler.to_speedscope(method), f)
+        logger.info(f"Wrote sampling profile of {method} to {path}")
+    return result, path
@@ -0,0 +1,183 @@
+"""
+Resource budgeting for concurrent work.
+"""
+
+import os
+import sys
+import shutil
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple, Union
+from loguru import logger
+
+
+def cpu_count() -> int:
+    """Get the number of CPUs this process may use."""
+    if hasattr(os, "sched_getaffinity"):
+        try:
+            return max(1, len(os.sched_getaffinity(0)))
+        except OSError:
+            pass
+    return os.cpu_count() or 1
+
+
+class ThreadBudget:
+    """
+    Weighted semaphore over CPU threads.
+
+    Each job acquires as many units as the threads it will use, so cheap
+    single-threaded jobs can run side by side while heavy encodes queue up.
+    A request for more than the whole budget is clamped so it can still run
+    on its own.
+    """
+
+    def __init__(self, total: Optional[int] = None):
+        self.total = total or cpu_count()
+        self._used = 0
+        self._cond = threading.Condition()
+
+    def clamp(self, units: int) -> int:
+        """Clamp a request to what the budget can ever grant."""
+        return max(1, min(int(units), self.total))
+
+    def acquire(self, units: int, timeout: Optional[float] = None) -> bool:
+        """
+        Reserve units, blocking until they are available.
+
+        Returns:
+            False if the timeout expired before the units were granted
+        """
+        units = self.clamp(units)
+        with self._cond:
+            granted = self._cond.wait_for(lambda: self._used + units <= self.total, timeout)
+            if granted:
+                self._used += units
+            return granted
+
+    def release(self, units: int) -> None:
+        """Return units reserved with acquire."""
+        units = self.clamp(units)
+        with self._cond:
+            self._used = max(0, self._used - units)
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, units: int):
+        """Context manager form of acquire/release."""
+        self.acquire(units)
+        try:
+            yield
+        finally:
+            self.release(units)
+
+    @property
+    def in_use(self) -> int:
+        """Units currently reserved."""
+        with self._cond:
+            return self._used
+
+
+# Named resource profiles. Background work yields the CPU and disk to
+# whatever the user is interacting with.
+RESOURCE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "interactive": {},
+    "background": {"nice": 10, "ionice": 7},
+}
+
+
+def default_job_threads() -> int:
+    """Threads a job is charged, and given, when its profile doesn't say."""
+    return max(2, cpu_count() // 2)
+
+
+def _create_process_budget() -> ThreadBudget:
+    """Create the global budget from IHW_THREAD_BUDGET (default: CPU count)."""
+    try:
+        total = int(os.environ.get("IHW_THREAD_BUDGET", "0"))
+    except ValueError:
+        total = 0
+    return ThreadBudget(total if total > 0 else None)
+
+
+# Shared by every FFmpeg process the server launches
+process_budget = _create_process_budget()
+
+
+def resolve_profile(resources: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+    """
+    Resolve a resource profile.
+
+    Args:
+        resources: Profile name, or dict of threads, filterThreads, nice,
+            ionice and affinity. A dict may name a base profile under
+            "profile" and override individual settings.
+
+    Returns:
+        Profile dictionary
+    """
+    if not resources:
+        return {}
+    if isinstance(resources, str):
+        resources = {"profile": resources}
+
+    name = resources.get("profile")
+    if name is not None and name not in RESOURCE_PROFILES:
+        raise ValueError(f"Unknown resource profile: {name}")
+
+    profile = dict(RESOURCE_PROFILES.get(name, {}))
+    profile.update({k: v for k, v in resources.items() if k != "profile" and v is not None})
+    return profile
+
+
+def profile_weight(profile: Dict[str, Any]) -> int:
+    """Budget units a process with this profile occupies; also its FFmpeg -threads."""
+    threads = int(profile.get("threads") or default_job_threads())
+    if profile.get("affinity"):
+        threads = min(threads, len(profile["affinity"]))
+    return max(1, threads)
+
+
+def process_launch(cmd: List[str], profile: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Apply a profile's priority and CPU affinity to a command.
+
+    On POSIX the command is wrapped with nice, ionice and taskset (when
+    installed) so the settings hold for every thread the process starts.
+    On Windows the priority becomes a process priority class.
+
+    Returns:
+        (command, extra Popen keyword arguments)
+    """
+    popen_kwargs: Dict[str, Any] = {}
+    nice = int(profile.get("nice") or 0)
+    ionice = profile.get("ionice")
+    affinity = profile.get("affinity")
+
+    if sys.platform == "win32":
+        if nice >= 15:
+            popen_kwargs["creationflags"] = subprocess.IDLE_PRIORITY_CLASS
+        elif nice > 0:
+            popen_kwargs["creationflags"] = subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        if affinity:
+            logger.debug("CPU affinity is not supported on Windows, ignoring")
+        return cmd, popen_kwargs
+
+    prefix: List[str] = []
+    if affinity:
+        if shutil.which("taskset"):
+            prefix += ["taskset", "-c", ",".join(str(int(c)) for c in affinity)]
+        else:
+            logger.debug("taskset not found, ignoring CPU affinity")
+    if ionice is not None:
+        if shutil.which("ionice"):
+            if ionice == "idle":
+                prefix += ["ionice", "-c", "3"]
+            else:
+                prefix += ["ionice", "-c", "2", "-n", str(max(0, min(int(ionice), 7)))]
+        else:
+            logger.debug("ionice not found, ignoring I/O priority")
+    if nice > 0:
+        prefix += ["nice", "-n", str(min(nice, 19))]
+
+    return prefix + cmd, popen_kwargs
@@ -0,0 +1,355 @@
+"""
+Priority scheduler for JSON-RPC requests.
+
+Requests run on a pool of worker threads. Each job has a priority class:
+- "interactive": quick calls the UI waits on (info, previews)
+- "normal": regular one-off operations
+- "batch": long-running or bulk work
+
+Interactive jobs can use every worker. The other classes share all but
+a reserved number of workers, so a quick call never waits behind queued
+long-running jobs. Jobs waiting in the queue age: every AGING_INTERVAL
+seconds of waiting moves a job up by one class, so batch work isn't
+starved by a steady stream of normal jobs. Jobs may also name an
+exclusive group (e.g. handlers built on a library that isn't thread-safe);
+jobs of one group never run concurrently.
+
+Each job carries an estimate of its peak memory (see core.admission).
+Jobs are only admitted while the running total fits the memory budget;
+a job larger than the whole budget runs once nothing else is running. A
+memory-blocked job that has waited AGING_INTERVAL holds back smaller
+non-interactive jobs queued behind it so it isn't starved.
+"""
+
+import os
+import time
+import heapq
+import itertools
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+from .admission import MB, memory_budget
+from .resources import cpu_count
+
+
+PRIORITY_CLASSES = {"interactive": 0, "normal": 1, "batch": 2}
+DEFAULT_PRIORITY = "normal"
+
+# Seconds of waiting that promote a queued job by one priority class
+AGING_INTERVAL = 30.0
+
+
+def validate_priority(priority: Any) -> str:
+    """Check a priority class name."""
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority: {priority}")
+    return priority
+
+
+class Job:
+    """A queued or running request."""
+
+    def __init__(
+        self,
+        task_id: str,
+        method: str,
+        run: Callable[[], None],
+        priority: str = DEFAULT_PRIORITY,
+        group: Optional[str] = None,
+        on_cancel: Optional[Callable[[], None]] = None,
+        memory: int = 0
+    ):
+        self.task_id = task_id
+        self.method = method
+        self.run = run
+        self.priority = priority
+        self.group = group
+        self.on_cancel = on_cancel
+        self.memory = memory
+        self.enqueued = time.monotonic()
+        self.started: Optional[float] = None
+
+    def rank(self, now: float, seq: int) -> tuple:
+        """Sort key: effective (aged) priority class, then arrival order."""
+        waited = now - self.enqueued
+        return (PRIORITY_CLASSES[self.priority] - waited / AGING_INTERVAL, seq)
+
+
+class Scheduler:
+    """
+    Runs jobs on worker threads by priority, with reserved interactive
+    capacity and memory-aware admission.
+
+    on_dequeue, when set, is called (outside the lock) whenever a queued
+    job starts or is cancelled, so queue positions can be reported.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        reserved: int = 1,
+        memory_budget: Optional[int] = None
+    ):
+        self.workers = max(2, workers or min(cpu_count(), 8))
+        self.reserved = max(0, min(reserved, self.workers - 1))
+        self.memory_budget = memory_budget
+        self.on_dequeue: Optional[Callable[[], None]] = None
+        self._memory_in_use = 0
+        self._cond = threading.Condition()
+        self._queue: Dict[str, Job] = {}
+        self._order: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._running: Dict[str, Job] = {}
+        self._busy_groups: Dict[str, int] = {}
+        self._closed = False
+        self._threads: List[threading.Thread] = []
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"rpc-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job: Job) -> bool:
+        """
+        Queue a job.
+
+        Returns:
+            True if a worker can start it right away
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is shut down")
+            immediate = self._would_start(job)
+            self._queue[job.task_id] = job
+            self._order[job.task_id] = next(self._seq)
+            self._cond.notify_all()
+        return immediate
+
+    def reprioritize(self, task_id: str, priority: str) -> bool:
+        """
+        Change the priority class of a queued job.
+
+        Returns:
+            False if the job isn't queued (unknown, running or finished)
+        """
+        validate_priority(priority)
+        with self._cond:
+            job = self._queue.get(task_id)
+            if job is None:
+                return False
+            job.priority = priority
+            self._cond.notify_all()
+        logger.info(f"Task {task_id} reprioritized to {priority}")
+        return True
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        Drop a queued job, calling its on_cancel hook.
+
+        Returns:
+            False if the job isn't queued
+        """
+        with self._cond:
+            job = self._queue.pop(task_id, None)
+            self._order.pop(task_id, None)
+        if job is None:
+            return False
+        if job.on_cancel:
+            job.on_cancel()
+        self._notify_dequeue()
+        return True
+
+    def snapshot(self, durations: Optional[Callable[[str], Optional[float]]] = None) -> Dict[str, Any]:
+        """
+        Describe queued and running jobs.
+
+        Args:
+            durations: Optional typical duration in seconds per method name;
+                when given, queued jobs include an estimated wait
+        """
+        now = time.monotonic()
+        waits = {e["taskId"]: e["estimatedWait"] for e in self.queue_status(durations)} if durations else {}
+        with self._cond:
+            queued = sorted(self._queue.values(), key=lambda j: j.rank(now, self._order[j.task_id]))
+            budget = self.memory_budget
+            return {
+                "workers": self.workers,
+                "reserved": self.reserved,
+                "queueDepth": len(queued),
+                "memoryBudgetMB": round(budget / MB, 1) if budget else None,
+                "memoryInUseMB": round(self._memory_in_use / MB, 1),
+                "queued": [
+                    {"taskId": j.task_id, "method": j.method, "priority": j.priority,
+                     "waited": round(now - j.enqueued, 2), "memoryMB": round(j.memory / MB, 1),
+                     "estimatedWait": waits.get(j.task_id)}
+                    for j in queued
+                ],
+                "running": [
+                    {"taskId": j.task_id, "method": j.method, "priority": j.priority,
+                     "elapsed": round(now - (j.started or now), 2), "memoryMB": round(j.memory / MB, 1)}
+                    for j in self._running.values()
+                ],
+            }
+
+    def queue_status(self, durations: Callable[[str], Optional[float]]) -> List[Dict[str, Any]]:
+        """
+        Queue position and a rough wait estimate for every queued job.
+
+        Jobs are assumed to start in rank order on the non-reserved
+        workers, each taking its method's typical duration; running jobs
+        finish after their remaining typical time. Memory and group limits
+        are ignored, so the estimate is optimistic under contention.
+
+        Args:
+            durations: Typical duration in seconds per method name, or None
+                when unknown (unknown methods make later estimates None)
+
+        Returns:
+            [{"taskId", "queuePosition", "queueDepth", "estimatedWait"}] in queue order
+        """
+        now = time.monotonic()
+        with self._cond:
+            queued = sorted(self._queue.values(), key=lambda j: j.rank(now, self._order[j.task_id]))
+            running = [(j.method, now - (j.started or now)) for j in self._running.values()]
+            lanes = self.workers - self.reserved
+
+        known = True
+        free_at = []
+        for method, elapsed in running:
+            duration = durations(method)
+            if duration is None:
+                known = False
+                break
+            free_at.append(max(0.0, duration - elapsed))
+        free_at = sorted(free_at)[:lanes]
+        free_at += [0.0] * (lanes - len(free_at))
+        heapq.heapify(free_at)
+
+        status = []
+        for position, job in enumerate(queued, start=1):
+            start = None
+            if known:
+                start = heapq.heappop(free_at)
+                duration = durations(job.method)
+                if duration is None:
+                    known = False
+                else:
+                    heapq.heappush(free_at, start + duration)
+            status.append({
+                "taskId": job.task_id,
+                "queuePosition": position,
+                "queueDepth": len(queued),
+                "estimatedWait": round(start, 1) if start is not None else None,
+            })
+        return status
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs; optionally wait for queued and running ones to finish."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _fits(self, job: Job) -> bool:
+        """Whether a job's memory fits next to the running ones (caller holds the lock)."""
+        if not self.memory_budget or not self._running:
+            return True
+        return self._memory_in_use + job.memory <= self.memory_budget
+
+    def _eligible(self, job: Job) -> bool:
+        """Whether a job may start now (caller holds the lock)."""
+        if job.group and self._busy_groups.get(job.group):
+            return False
+        if job.priority == "interactive":
+            return True
+        background = sum(1 for j in self._running.values() if j.priority != "interactive")
+        return background < self.workers - self.reserved
+
+    def _would_start(self, job: Job) -> bool:
+        """Whether a new job gets a worker right away, counting jobs queued before it."""
+        if job.group and (self._busy_groups.get(job.group)
+                          or any(j.group == job.group for j in self._queue.values())):
+            return False
+        queued = list(self._queue.values())
+        if self.memory_budget and (self._running or queued):
+            pending = sum(j.memory for j in queued)
+            if self._memory_in_use + pending + job.memory > self.memory_budget:
+                return False
+        background_running = sum(1 for j in self._running.values() if j.priority != "interactive")
+        background_queued = sum(1 for j in queued if j.priority != "interactive")
+        if job.priority != "interactive":
+            return background_running + background_queued < self.workers - self.reserved
+        # Queued background jobs can only take the non-reserved workers
+        background_starting = min(background_queued, max(0, self.workers - self.reserved - background_running))
+        interactive_queued = len(queued) - background_queued
+        return len(self._running) + background_starting + interactive_queued < self.workers
+
+    def _next(self) -> Optional[Job]:
+        """Pop the best eligible job (caller holds the lock)."""
+        now = time.monotonic()
+        ranked = sorted(self._queue.values(), key=lambda j: j.rank(now, self._order[j.task_id]))
+        held = False
+        for job in ranked:
+            if not self._eligible(job):
+                continue
+            if not self._fits(job):
+                # Keep memory free for a big job that has waited long enough
+                if now - job.enqueued >= AGING_INTERVAL:
+                    held = True
+                continue
+            if not held or job.priority == "interactive":
+                del self._queue[job.task_id]
+                del self._order[job.task_id]
+                return job
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next()
+                while job is None:
+                    if self._closed and not self._queue:
+                        return
+                    self._cond.wait()
+                    job = self._next()
+                job.started = time.monotonic()
+                self._running[job.task_id] = job
+                self._memory_in_use += job.memory
+                if job.group:
+                    self._busy_groups[job.group] = self._busy_groups.get(job.group, 0) + 1
+
+            self._notify_dequeue()
+            try:
+                job.run()
+            except Exception:
+                logger.exception(f"Unhandled error running {job.method}")
+            finally:
+                with self._cond:
+                    self._running.pop(job.task_id, None)
+                    self._memory_in_use -= job.memory
+                    if job.group:
+                        self._busy_groups[job.group] -= 1
+                    self._cond.notify_all()
+
+    def _notify_dequeue(self) -> None:
+        """Run the on_dequeue hook, never letting it break a worker."""
+        if self.on_dequeue:
+            try:
+                self.on_dequeue()
+            except Exception:
+                logger.exception("Queue status hook failed")
+
+
+def create_scheduler() -> Scheduler:
+    """
+    Create the scheduler from IHW_WORKERS / IHW_INTERACTIVE_WORKERS and
+    the IHW_MEMORY_BUDGET_MB memory budget.
+    """
+    workers = int(os.environ.get("IHW_WORKERS", "0")) or None
+    reserved = int(os.environ.get("IHW_INTERACTIVE_WORKERS", "1"))
+    budget = memory_budget()
+    if budget:
+        logger.info(f"Memory budget for admitted jobs: {budget // MB} MB")
+    return Scheduler(workers=workers, reserved=reserved, memory_budget=budget)
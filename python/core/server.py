@@ -4,11 +4,20 @@ JSON-RPC Server for IPC communication with Electron
 
 import sys
 import json
+import time
 import threading
-from typing import Any, Callable, Dict, Optional, Set
+import importlib
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 from loguru import logger
 
+from .admission import Estimator, estimate_memory
 from .cleanup import cleanup_task_files, cleanup_file
+from .cache import ResultCache
+from .metrics import ServerMetrics
+from .profiling import resolve_mode, run_profiled
+from .transport import OutputChannel, negotiate
+from .shm import MemoryHandles, has_handles
+from .scheduler import DEFAULT_PRIORITY, PRIORITY_CLASSES as PRIORITY_NAMES, Job, Scheduler, validate_priority
 
 
 class JsonRpcError(Exception):
@@ -21,19 +30,146 @@ class JsonRpcError(Exception):
         super().__init__(message)
 
 
+# Methods answered by the server itself, straight from the reader loop
+BUILTIN_METHODS = {
+    "task:cancel", "task:cleanup", "task:reprioritize",
+    "cache:clear", "cache:stats", "server.stats", "server.profile",
+}
+
+
 class JsonRpcServer:
     """Simple JSON-RPC 2.0 server over stdio."""
 
-    def __init__(self):
-        self.methods: Dict[str, Callable] = {}
+    def __init__(
+        self,
+        result_cache: Optional[ResultCache] = None,
+        metrics: Optional[ServerMetrics] = None,
+        scheduler: Optional[Scheduler] = None,
+        cache_by_default: bool = False
+    ):
+        self.methods: Dict[str, Union[Callable, str]] = {}
+        self._cacheable: Set[str] = set()
+        self._memory_io: Set[str] = set()
+        self._partial: Set[str] = set()
+        self._priorities: Dict[str, str] = {}
+        self._groups: Dict[str, Union[str, Callable[[Dict], Optional[str]]]] = {}
+        self._estimators: Dict[str, Estimator] = {}
+        self._scheduler = scheduler
+        if scheduler:
+            scheduler.on_dequeue = self._report_queue
+        self.result_cache = result_cache
+        # Requests opt in with _cache: true unless caching is on by default
+        self.cache_by_default = cache_by_default
+        self.metrics = metrics or ServerMetrics()
+        self._output = OutputChannel(sys.stdout.buffer)
         self._progress_callback: Optional[Callable] = None
         self._cancelled_tasks: Set[str] = set()
-        self._active_tasks: Dict[str, str] = {}  # task_id -> output_path
+        self._active_tasks: Dict[str, List[str]] = {}  # task_id -> output paths
+        self._partial_counts: Dict[str, int] = {}  # task_id -> partials sent
         self._lock = threading.Lock()
+        self._import_lock = threading.Lock()
+        # Serializes queue reports so a stale one can't overtake a newer one
+        self._queue_report_lock = threading.Lock()
+        self.startup_timings: Dict[str, float] = {}
+        # server.profile toggle: {"mode": ..., "methods": set or None} while enabled
+        self._profile_all: Optional[Dict[str, Any]] = None
+
+    def register(
+        self,
+        name: str,
+        func: Union[Callable, str],
+        cacheable: bool = False,
+        memory_io: bool = False,
+        partial: bool = False,
+        priority: str = DEFAULT_PRIORITY,
+        group: Union[str, Callable[[Dict], Optional[str]], None] = None,
+        memory: Estimator = None
+    ) -> None:
+        """
+        Register a method handler.
 
-    def register(self, name: str, func: Callable) -> None:
-        """Register a method handler."""
+        Args:
+            name: Method name
+            func: Handler function, or its dotted path (e.g. "pdf.merger.merge_pdfs")
+                to import it lazily on first call
+            cacheable: Whether results may be served from the result cache.
+                Only set this for idempotent methods whose output depends
+                solely on their params and input file content.
+            memory_io: Whether the handler accepts file objects, so callers may
+                pass shared-memory handles instead of paths (see core.shm)
+            partial: Whether the handler streams outputs as it produces them
+                through _partial_callback(output, **details); each becomes a
+                "partial" notification
+            priority: Default priority class ("interactive", "normal" or "batch");
+                requests may override it with _priority
+            group: Exclusive group; calls of methods in the same group never
+                run concurrently (e.g. handlers using a non-thread-safe library).
+                May be a callable picking the group from a request's params.
+            memory: Peak memory estimator used for admission control, by name
+                ("image", "pdf", "media", "download") or as a callable taking
+                (method, params); defaults to the one named after the method's
+                namespace (see core.admission)
+        """
         self.methods[name] = func
+        self._priorities[name] = validate_priority(priority)
+        if group:
+            self._groups[name] = group
+        if memory:
+            self._estimators[name] = memory
+        if cacheable:
+            self._cacheable.add(name)
+        if memory_io:
+            self._memory_io.add(name)
+        if partial:
+            self._partial.add(name)
+
+    def _resolve(self, name: str) -> Callable:
+        """Get a method's handler, importing it on first use if registered lazily."""
+        handler = self.methods[name]
+        if callable(handler):
+            return handler
+
+        with self._import_lock:
+            handler = self.methods[name]
+            if callable(handler):
+                return handler
+
+            module_name, _, attr = handler.rpartition(".")
+            started = time.perf_counter()
+            module = importlib.import_module(module_name)
+            elapsed = (time.perf_counter() - started) * 1000
+            if elapsed >= 1:
+                logger.info(f"Loaded {module_name} in {elapsed:.0f} ms")
+
+            handler = getattr(module, attr)
+            self.methods[name] = handler
+            return handler
+
+    def prewarm(self) -> threading.Thread:
+        """
+        Import lazily registered handlers on a background thread.
+
+        Requests that arrive meanwhile import what they need themselves;
+        the import lock keeps both paths consistent.
+        """
+        def warm() -> None:
+            started = time.perf_counter()
+            count = 0
+            for name in list(self.methods):
+                if callable(self.methods[name]):
+                    continue
+                try:
+                    self._resolve(name)
+                    count += 1
+                except Exception as e:
+                    logger.warning(f"Failed to prewarm {name}: {e}")
+            elapsed = (time.perf_counter() - started) * 1000
+            self.startup_timings["prewarm"] = round(elapsed, 1)
+            logger.info(f"Prewarmed {count} handlers in {elapsed:.0f} ms")
+
+        thread = threading.Thread(target=warm, name="prewarm", daemon=True)
+        thread.start()
+        return thread
 
     def cancel_task(self, task_id: str) -> bool:
         """
@@ -48,9 +184,9 @@ class JsonRpcServer:
         with self._lock:
             self._cancelled_tasks.add(task_id)
             # Cleanup output file if registered
-            if task_id in self._active_tasks:
-                output_path = self._active_tasks.pop(task_id)
-                cleanup_file(output_path)
+            output_paths = self._active_tasks.pop(task_id, [])
+        for output_path in output_paths:
+            cleanup_file(output_path)
         cleanup_task_files(task_id)
         logger.info(f"Task {task_id} cancelled and cleaned up")
         return True
@@ -63,24 +199,31 @@ class JsonRpcServer:
     def register_task_output(self, task_id: str, output_path: str) -> None:
         """Register an output file for a task for cleanup on cancel/fail."""
         with self._lock:
-            self._active_tasks[task_id] = output_path
+            self._active_tasks.setdefault(task_id, []).append(output_path)
 
     def complete_task(self, task_id: str) -> None:
         """Mark a task as completed, removing it from active tracking."""
         with self._lock:
             self._cancelled_tasks.discard(task_id)
             self._active_tasks.pop(task_id, None)
+            self._partial_counts.pop(task_id, None)
 
     def cleanup_failed_task(self, task_id: str) -> None:
         """Cleanup a failed task's output files."""
         with self._lock:
-            if task_id in self._active_tasks:
-                output_path = self._active_tasks.pop(task_id)
-                cleanup_file(output_path)
+            self._partial_counts.pop(task_id, None)
+            output_paths = self._active_tasks.pop(task_id, [])
+        for output_path in output_paths:
+            cleanup_file(output_path)
         cleanup_task_files(task_id)
 
-    def send_progress(self, task_id: str, progress: float, message: str = "") -> None:
-        """Send progress update to the client."""
+    def send_progress(self, task_id: str, progress: float, message: str = "", **details) -> None:
+        """
+        Send progress update to the client.
+
+        Extra keyword details (e.g. outTime, fps, speed, bitrate, eta) are
+        forwarded as additional fields of the progress message.
+        """
         # Check if task was cancelled before sending progress
         if self.is_task_cancelled(task_id):
             raise JsonRpcError(-32001, "Task cancelled")
@@ -91,16 +234,55 @@ class JsonRpcServer:
             "progress": progress,
             "message": message
         }
-        self._send(response)
+        response.update(details)
+        # Progress is buffered and flushed on a timer; responses flush it
+        nbytes, serialize = self._send(response, urgent=False)
+        self.metrics.record_send(task_id, nbytes, serialize, progress=True)
+
+    def send_partial(self, task_id: str, output: Any, **details) -> None:
+        """
+        Send one output of a task as soon as it exists.
 
-    def _send(self, data: Dict) -> None:
-        """Send JSON data to stdout."""
+        The notification carries the output, its index in the task's
+        sequence of partials, and extra keyword details (e.g. page).
+        """
+        if self.is_task_cancelled(task_id):
+            raise JsonRpcError(-32001, "Task cancelled")
+
+        with self._lock:
+            index = self._partial_counts.get(task_id, 0)
+            self._partial_counts[task_id] = index + 1
+
+        message = {
+            "type": "partial",
+            "taskId": task_id,
+            "index": index,
+            "output": output,
+        }
+        message.update(details)
+        nbytes, serialize = self._send(message, urgent=False)
+        self.metrics.record_send(task_id, nbytes, serialize, progress=True)
+
+    def _send(self, data: Dict, urgent: bool = True) -> Tuple[int, float]:
+        """
+        Send a message to stdout using the negotiated transport.
+
+        Returns:
+            (bytes written, seconds spent serializing)
+        """
         try:
-            output = json.dumps(data, ensure_ascii=False)
-            sys.stdout.write(output + "\n")
-            sys.stdout.flush()
+            return self._output.send(data, urgent=urgent)
         except Exception as e:
             logger.error(f"Failed to send response: {e}")
+            return 0, 0.0
+
+    def _cache_lookup_key(self, method: str, params: Dict) -> Optional[str]:
+        """Build a result cache key, treating any failure as uncacheable."""
+        try:
+            return self.result_cache.make_key(method, params)
+        except Exception as e:
+            logger.warning(f"Cannot build cache key for {method}: {e}")
+            return None
 
     def _handle_request(self, request: Dict) -> Dict:
         """Handle a single JSON-RPC request."""
@@ -121,6 +303,9 @@ class JsonRpcServer:
             task_to_cancel = params.get("taskId") if isinstance(params, dict) else None
             if task_to_cancel:
                 self.cancel_task(task_to_cancel)
+                # A queued task is dropped and answered right away
+                if self._scheduler:
+                    self._scheduler.cancel(str(task_to_cancel))
                 return {
                     "jsonrpc": "2.0",
                     "id": request_id,
@@ -148,6 +333,82 @@ class JsonRpcServer:
                 "error": {"code": -32602, "message": "filePath parameter required"}
             }
 
+        # Handle built-in task:reprioritize method
+        if method == "task:reprioritize":
+            task_to_move = params.get("taskId") if isinstance(params, dict) else None
+            priority = params.get("priority") if isinstance(params, dict) else None
+            if not task_to_move or priority not in PRIORITY_NAMES:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": -32602, "message": "taskId and a valid priority are required"}
+                }
+            moved = bool(self._scheduler) and self._scheduler.reprioritize(str(task_to_move), priority)
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {"reprioritized": moved, "taskId": task_to_move, "priority": priority}
+            }
+
+        # Handle built-in server.stats method
+        if method == "server.stats":
+            reset = bool(params.get("reset")) if isinstance(params, dict) else False
+            result = self.metrics.snapshot(reset=reset)
+            result["startup"] = dict(self.startup_timings)
+            if self._scheduler:
+                result["scheduler"] = self._scheduler.snapshot(durations=self.metrics.typical_wall)
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": result
+            }
+
+        # Handle built-in server.profile toggle
+        if method == "server.profile":
+            try:
+                if isinstance(params, dict) and params.get("enabled"):
+                    methods = params.get("methods")
+                    self._profile_all = {
+                        "mode": resolve_mode(params.get("mode") or True),
+                        "methods": set(methods) if methods else None,
+                    }
+                    logger.info(f"Profiling enabled ({self._profile_all['mode']})")
+                else:
+                    self._profile_all = None
+                    logger.info("Profiling disabled")
+            except ValueError as e:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": -32602, "message": str(e)}
+                }
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {
+                    "enabled": self._profile_all is not None,
+                    "mode": self._profile_all["mode"] if self._profile_all else None,
+                }
+            }
+
+        # Handle built-in cache:clear / cache:stats methods
+        if method in ("cache:clear", "cache:stats"):
+            if not self.result_cache:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": -32601, "message": "Result cache is disabled"}
+                }
+            if method == "cache:clear":
+                result = {"removed": self.result_cache.clear()}
+            else:
+                result = self.result_cache.stats()
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": result
+            }
+
         if method not in self.methods:
             return {
                 "jsonrpc": "2.0",
@@ -163,35 +424,121 @@ class JsonRpcServer:
                 "error": {"code": -32001, "message": "Task cancelled"}
             }
 
-        # Extract output path for cleanup registration
-        output_path = None
+        # Extract output paths for cleanup registration
+        output_paths = []
         if isinstance(params, dict):
             output_path = params.get("outputPath") or params.get("outputDir")
+            if isinstance(output_path, str):
+                output_paths.append(output_path)
+            # Multi-output methods (media.fanout) list one spec per output
+            outputs = params.get("outputs")
+            if isinstance(outputs, list):
+                output_paths.extend(
+                    spec["outputPath"] for spec in outputs
+                    if isinstance(spec, dict) and isinstance(spec.get("outputPath"), str)
+                )
 
+        memory = None
         try:
-            # Register output file for cleanup on failure
-            if output_path:
+            # Register output files for cleanup on failure
+            for output_path in output_paths:
                 self.register_task_output(task_id, output_path)
 
             # Call the method with params
-            handler = self.methods[method]
+            handler = self._resolve(method)
 
-            # Pass progress callback if the method accepts it
+            # Swap shared-memory handles for file objects
+            if isinstance(params, dict) and has_handles(params):
+                if method not in self._memory_io:
+                    raise JsonRpcError(-32602, f"{method} does not accept in-memory handles")
+                memory = MemoryHandles()
+                memory.prepare(params)
+
+            # Profile when asked per request or by the server.profile toggle
+            profile_mode = None
             if isinstance(params, dict):
-                params["_progress_callback"] = lambda p, m="": self.send_progress(
-                    task_id, p, m
-                )
+                profile_mode = resolve_mode(params.pop("_profile", None))
+            toggle = self._profile_all
+            if not profile_mode and toggle and (toggle["methods"] is None or method in toggle["methods"]):
+                profile_mode = toggle["mode"]
+
+            # A caller that consumes partials gets a summary instead of the full list
+            summarize = isinstance(params, dict) and bool(params.pop("_partial", False))
+            summarize = summarize and method in self._partial
+
+            # Serve idempotent methods from the result cache when possible
+            # (a profiled request must actually run)
+            cache_key = None
+            use_cache = isinstance(params, dict) and bool(params.pop("_cache", self.cache_by_default))
+            use_cache = use_cache and not profile_mode
+            if use_cache and self.result_cache and method in self._cacheable:
+                cache_key = self._cache_lookup_key(method, params)
+                if cache_key:
+                    hit, cached = self.result_cache.lookup(cache_key, params)
+                    if hit:
+                        logger.info(f"Serving {method} from result cache")
+                        if method in self._partial and isinstance(cached, list):
+                            for output in cached:
+                                self.send_partial(task_id, output)
+                            if summarize:
+                                cached = {"partial": True, "count": len(cached)}
+                        self.send_progress(task_id, 100, "Loaded from cache")
+                        self.complete_task(task_id)
+                        return {
+                            "jsonrpc": "2.0",
+                            "id": request_id,
+                            "result": cached
+                        }
 
-            result = handler(**params) if isinstance(params, dict) else handler(*params)
+            # Pass progress callback if the method accepts it
+            if isinstance(params, dict):
+                last_progress = [0.0]
+
+                def progress_callback(progress: Optional[float], message: str = "", **details) -> None:
+                    # None reports a status only and keeps the last value
+                    if progress is None:
+                        progress = last_progress[0]
+                    last_progress[0] = progress
+                    self.send_progress(task_id, progress, message, **details)
+
+                params["_progress_callback"] = progress_callback
+                if method in self._partial:
+                    params["_partial_callback"] = lambda output, **details: self.send_partial(
+                        task_id, output, **details
+                    )
+
+            profile_file = None
+            if profile_mode and isinstance(params, dict):
+                result, profile_file = run_profiled(handler, params, method, profile_mode, task_id)
+                if isinstance(result, dict):
+                    result = dict(result, profilePath=profile_file)
+            else:
+                result = handler(**params) if isinstance(params, dict) else handler(*params)
+
+            if memory:
+                result = memory.finish(result)
+
+            if cache_key:
+                try:
+                    self.result_cache.store(cache_key, method, params, result)
+                except Exception as e:
+                    logger.warning(f"Failed to cache result of {method}: {e}")
+
+            if summarize and isinstance(result, list):
+                result = {"partial": True, "count": len(result)}
 
             # Task completed successfully, remove from tracking (keep files)
             self.complete_task(task_id)
 
-            return {
+            response = {
                 "jsonrpc": "2.0",
                 "id": request_id,
                 "result": result
             }
+            if profile_file:
+                # Also outside the result, for methods that return a bare path or list
+                response["profile"] = profile_file
+            return response
 
         except JsonRpcError as e:
             # Cleanup on failure
@@ -210,23 +557,136 @@ class JsonRpcServer:
                 "id": request_id,
                 "error": {"code": -32000, "message": str(e)}
             }
+        finally:
+            if memory:
+                memory.close()
+
+    def _dispatch(self, request: Dict, bytes_in: int, received: float) -> None:
+        """Handle a request and send its response, recording metrics."""
+        task_id = str(request.get("id"))
+        method = request.get("method")
+        measured = isinstance(method, str) and method != "server.stats"
+
+        if measured:
+            self.metrics.start_call(task_id, method, bytes_in, received)
+        response = self._handle_request(request)
+        nbytes, serialize = self._send(response)
+        if measured:
+            self.metrics.record_send(task_id, nbytes, serialize)
+            self.metrics.finish_call(task_id, ok="error" not in response)
+
+    def run(self, prewarm: bool = True, transport: Optional[str] = None, codec: Optional[str] = None) -> None:
+        """
+        Run the server, reading from stdin.
 
-    def run(self) -> None:
-        """Run the server, reading from stdin."""
-        logger.info("JSON-RPC server ready")
+        Announces readiness with a {"type": "ready"} JSON line carrying the
+        startup timings and the negotiated transport and codec, switches to
+        that transport, then optionally prewarms lazy handlers.
+        """
+        transport, codec = negotiate(transport, codec)
+        timings = ", ".join(f"{k} {v:.0f} ms" for k, v in self.startup_timings.items())
+        logger.info(f"JSON-RPC server ready ({timings})" if timings else "JSON-RPC server ready")
+        self._send({
+            "type": "ready",
+            "timings": dict(self.startup_timings),
+            "transport": transport,
+            "codec": codec,
+        })
+        self._output.configure(transport, codec)
+
+        # stdout now carries only protocol messages; stray prints from
+        # libraries go to stderr instead of corrupting the stream
+        sys.stdout = sys.stderr
+
+        if prewarm:
+            self.prewarm()
 
         for line in sys.stdin:
             line = line.strip()
             if not line:
                 continue
 
+            received = time.perf_counter()
             try:
                 request = json.loads(line)
-                response = self._handle_request(request)
-                self._send(response)
             except json.JSONDecodeError as e:
                 self._send({
                     "jsonrpc": "2.0",
                     "id": None,
                     "error": {"code": -32700, "message": f"Parse error: {e}"}
                 })
+                continue
+            self._submit(request, len(line.encode("utf-8")), received)
+
+        # Let queued and running requests finish before exiting
+        if self._scheduler:
+            self._scheduler.shutdown(wait=True)
+        self._output.flush()
+
+    def _submit(self, request: Dict, bytes_in: int, received: float) -> None:
+        """Answer built-ins inline; queue handler calls on the scheduler."""
+        method = request.get("method")
+        if (
+            not self._scheduler
+            or not isinstance(request, dict)
+            or method in BUILTIN_METHODS
+            or method not in self.methods
+        ):
+            self._dispatch(request, bytes_in, received)
+            return
+
+        request_id = request.get("id")
+        task_id = str(request_id)
+        params = request.get("params")
+        priority = self._priorities.get(method, DEFAULT_PRIORITY)
+        if isinstance(params, dict) and "_priority" in params:
+            priority = params.pop("_priority")
+            if priority not in PRIORITY_NAMES:
+                self._send({
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": -32602, "message": f"Unknown priority: {priority}"}
+                })
+                return
+
+        def on_cancel() -> None:
+            self.complete_task(task_id)
+            self._send({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": -32001, "message": "Task cancelled"}
+            })
+
+        group = self._groups.get(method)
+        if callable(group):
+            group = group(params)
+
+        job = Job(
+            task_id, method,
+            run=lambda: self._dispatch(request, bytes_in, received),
+            priority=priority,
+            group=group,
+            on_cancel=on_cancel,
+            memory=estimate_memory(self._estimators.get(method), method, params)
+        )
+        if not self._scheduler.submit(job):
+            # Tell the client the task exists so it can cancel or reprioritize it
+            self._report_queue(only=task_id)
+
+    def _report_queue(self, only: Optional[str] = None) -> None:
+        """
+        Send queue position, depth and estimated wait (seconds, None while
+        unknown) to queued tasks, or just to one of them.
+        """
+        with self._queue_report_lock:
+            for entry in self._scheduler.queue_status(self.metrics.typical_wall):
+                if only is not None and entry["taskId"] != only:
+                    continue
+                self._send({
+                    "type": "progress",
+                    "taskId": entry["taskId"],
+                    "progress": 0,
+                    "message": f"Queued ({entry['queuePosition']}/{entry['queueDepth']})",
+                    "queued": True,
+                    **entry,
+                }, urgent=False)
@@ -0,0 +1,231 @@
+"""
+In-memory input and output handles for handlers that work on bytes.
+
+Instead of a file path, a caller may pass a handle to a named
+POSIX/Windows shared memory segment:
+
+    {"shm": "name", "offset": 0, "length": 1234}
+
+As an input, the handler reads the bytes in place. As an outputPath, the
+handler writes straight into the segment ("length" is the capacity, and
+"format" names the image format, e.g. "png"). The result then reports
+{"shm", "offset", "length", "format"} with the bytes actually written.
+An output handle without "shm" makes the server create a new segment of
+the right size. The caller owns that segment and must unlink it.
+
+This is an internal interface for Python callers on the same machine
+(tools and benchmarks driving the server). The Electron app doesn't use
+it: Node has no shared-memory API, so the renderer keeps passing paths.
+"""
+
+import io
+import os
+from typing import Any, Dict, List, Optional
+from multiprocessing import shared_memory
+
+from loguru import logger
+
+
+def is_handle(value: Any) -> bool:
+    """Whether a param value is an in-memory handle rather than a path."""
+    return isinstance(value, dict) and ("shm" in value or "format" in value)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without letting this process unlink it at exit."""
+    segment = shared_memory.SharedMemory(name=name, create=False)
+    if os.name == "posix":
+        # Before Python 3.13 attaching registers the segment with the
+        # resource tracker, which would unlink the caller's memory on exit
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(segment._name, "shared_memory")
+        except Exception:
+            pass
+    return segment
+
+
+class MemoryInput(io.RawIOBase):
+    """Seekable, read-only file object over a slice of shared memory."""
+
+    def __init__(self, handle: Dict[str, Any]):
+        super().__init__()
+        if not handle.get("shm"):
+            raise ValueError("Input handle needs a shared memory name")
+        self._owner = _attach(handle["shm"])
+        view = self._owner.buf
+        offset = int(handle.get("offset", 0))
+        length = handle.get("length")
+        end = offset + int(length) if length is not None else len(view)
+        if end > len(view):
+            raise ValueError("Input handle exceeds the shared memory size")
+        self._view = view[offset:end]
+        self._pos = 0
+        self.name = handle["shm"]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), len(self._view) - self._pos)
+        if count <= 0:
+            return 0
+        buffer[:count] = self._view[self._pos:self._pos + count]
+        self._pos += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+            self._owner.close()
+        super().close()
+
+
+class MemoryOutput(io.RawIOBase):
+    """Write-only file object into shared memory, or into a new segment."""
+
+    def __init__(self, handle: Dict[str, Any]):
+        super().__init__()
+        self.format = str(handle.get("format") or "png").lower()
+        self.name = f"memory.{self.format}"
+        self._offset = int(handle.get("offset", 0))
+        self._pos = 0
+        self._size = 0
+        self._segment_name: Optional[str] = handle.get("shm")
+
+        if self._segment_name:
+            self._owner = _attach(self._segment_name)
+            view = self._owner.buf
+            capacity = handle.get("length")
+            end = self._offset + int(capacity) if capacity is not None else len(view)
+            self._view = view[self._offset:min(end, len(view))]
+            self._spill = None
+        else:
+            # No segment given: collect bytes, then create one of the right size
+            self._owner = None
+            self._view = None
+            self._spill = io.BytesIO()
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = memoryview(data).cast("B")
+        if self._spill is not None:
+            self._spill.seek(self._pos)
+            self._spill.write(data)
+        else:
+            end = self._pos + len(data)
+            if end > len(self._view):
+                raise ValueError("Output exceeds the shared memory capacity")
+            self._view[self._pos:end] = data
+        self._pos += len(data)
+        self._size = max(self._size, self._pos)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def descriptor(self) -> Dict[str, Any]:
+        """Describe the written bytes, creating the segment if needed."""
+        if self._spill is not None and self._segment_name is None:
+            data = self._spill.getbuffer()
+            segment = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+            segment.buf[:len(data)] = data
+            del data
+            if os.name == "posix":
+                # The caller owns the new segment; don't unlink it when we exit
+                try:
+                    from multiprocessing import resource_tracker
+                    resource_tracker.unregister(segment._name, "shared_memory")
+                except Exception:
+                    pass
+            self._segment_name = segment.name
+            self._offset = 0
+            segment.close()
+
+        return {"shm": self._segment_name, "offset": self._offset, "length": self._size, "format": self.format}
+
+    def close(self) -> None:
+        if not self.closed and self._view is not None:
+            self._view.release()
+            self._owner.close()
+        super().close()
+
+
+class MemoryHandles:
+    """Swaps handles in request params for file objects and back."""
+
+    INPUT_PARAMS = ("file", "files", "image")
+
+    def __init__(self):
+        self._objects: List[io.RawIOBase] = []
+
+    def prepare(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace handle params with file objects."""
+        for name in self.INPUT_PARAMS:
+            value = params.get(name)
+            if isinstance(value, list):
+                params[name] = [self._input(v) if is_handle(v) else v for v in value]
+            elif is_handle(value):
+                params[name] = self._input(value)
+
+        if is_handle(params.get("outputPath")):
+            output = MemoryOutput(params["outputPath"])
+            self._objects.append(output)
+            params["outputPath"] = output
+        return params
+
+    def finish(self, result: Any) -> Any:
+        """Replace output file objects in a result with descriptors."""
+        if isinstance(result, MemoryOutput):
+            return result.descriptor()
+        if isinstance(result, list):
+            return [self.finish(item) for item in result]
+        if isinstance(result, dict):
+            return {k: self.finish(v) for k, v in result.items()}
+        return result
+
+    def close(self) -> None:
+        for obj in self._objects:
+            try:
+                obj.close()
+            except Exception as e:
+                logger.debug(f"Failed to close memory handle: {e}")
+        self._objects.clear()
+
+    def _input(self, handle: Dict[str, Any]) -> MemoryInput:
+        obj = MemoryInput(handle)
+        self._objects.append(obj)
+        return obj
+
+
+def has_handles(params: Dict[str, Any]) -> bool:
+    """Whether any input or output param is an in-memory handle."""
+    for name in MemoryHandles.INPUT_PARAMS + ("outputPath",):
+        value = params.get(name)
+        if is_handle(value) or (isinstance(value, list) and any(is_handle(v) for v in value)):
+            return True
+    return False
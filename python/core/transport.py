@@ -0,0 +1,136 @@
+"""
+Output transport for the stdio JSON-RPC protocol.
+
+Two framings are supported:
+- "lines": newline-delimited JSON (the default)
+- "framed": every message is a 4-byte big-endian length followed by the
+  payload, encoded as JSON or, when the msgpack package is installed,
+  as msgpack
+
+The client asks for a transport with IHW_TRANSPORT / IHW_CODEC. The
+server confirms what it actually uses in its "ready" message. That
+message is always a JSON line, so a client can read it before switching
+parsers. Requests on stdin stay newline-delimited JSON either way.
+"""
+
+import json
+import time
+import struct
+import threading
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+from loguru import logger
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+TRANSPORTS = ("lines", "framed")
+CODECS = ("json", "msgpack")
+
+# Buffered output is flushed at least this often
+FLUSH_INTERVAL = 0.01
+# ... and as soon as this much is pending
+MAX_BUFFER = 64 * 1024
+
+_LENGTH = struct.Struct(">I")
+
+
+def negotiate(transport: Optional[str], codec: Optional[str]) -> Tuple[str, str]:
+    """
+    Resolve the requested transport and codec to what this server supports.
+
+    msgpack needs framing and the msgpack package; otherwise JSON is used.
+    """
+    transport = transport if transport in TRANSPORTS else "lines"
+    codec = codec if codec in CODECS else "json"
+    if codec == "msgpack" and (transport != "framed" or msgpack is None):
+        logger.warning("msgpack codec unavailable, using JSON")
+        codec = "json"
+    return transport, codec
+
+
+class OutputChannel:
+    """
+    Thread-safe, buffered writer for outgoing messages.
+
+    Messages sent with urgent=False (progress) are buffered and flushed by
+    a timer thread; urgent messages (responses) flush immediately along
+    with anything buffered before them, so ordering is preserved.
+    """
+
+    def __init__(self, stream: BinaryIO, flush_interval: float = FLUSH_INTERVAL):
+        self.stream = stream
+        self.transport = "lines"
+        self.codec = "json"
+        self.flush_interval = flush_interval
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def configure(self, transport: str, codec: str) -> None:
+        """Switch framing and codec (after the ready message was sent)."""
+        with self._lock:
+            self._flush_locked()
+            self.transport = transport
+            self.codec = codec
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        """Encode one message with the current framing and codec."""
+        if self.codec == "msgpack":
+            payload = msgpack.packb(data, use_bin_type=True, default=str)
+        else:
+            payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+        if self.transport == "framed":
+            return _LENGTH.pack(len(payload)) + payload
+        return payload + b"\n"
+
+    def send(self, data: Dict[str, Any], urgent: bool = True) -> Tuple[int, float]:
+        """
+        Queue a message for output.
+
+        Returns:
+            (bytes written, seconds spent serializing)
+        """
+        started = time.perf_counter()
+        frame = self.encode(data)
+        serialize = time.perf_counter() - started
+
+        with self._lock:
+            self._buffer += frame
+            if urgent or len(self._buffer) >= MAX_BUFFER:
+                self._flush_locked()
+            else:
+                self._ensure_flusher()
+                self._pending.set()
+        return len(frame), serialize
+
+    def flush(self) -> None:
+        """Write out anything buffered."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        self.stream.write(bytes(self._buffer))
+        self.stream.flush()
+        self._buffer.clear()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="output-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._pending.wait()
+            time.sleep(self.flush_interval)
+            self._pending.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush output: {e}")
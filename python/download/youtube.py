@@ -137,6 +137,7 @@ def download_video(
     audioOnly: bool = False,
     audioFormat: str = "mp3",
     _progress_callback: Optional[Callable] = None,
+    _partial_callback: Optional[Callable] = None,
     **kwargs
 ) -> Dict[str, Any]:
     """
@@ -150,6 +151,8 @@ def download_video(
         audioOnly: Download audio only
         audioFormat: Audio format when audioOnly=True (mp3, m4a, wav)
         _progress_callback: Progress callback function
+        _partial_callback: Optional callback receiving each finished file
+            (after post-processing), e.g. every entry of a playlist
 
     Returns:
         Dictionary with download result
@@ -231,11 +234,17 @@ def download_video(
             elif d['status'] == 'finished':
                 _progress_callback(95, "Finalizing...")
 
+    # Called with the final path of every file, after all postprocessors
+    def post_hook(filename):
+        if _partial_callback:
+            _partial_callback(filename)
+
     ydl_opts = {
         'format': format_selector,
         'outtmpl': output_template,
         'progress_hooks': [progress_hook],
         'postprocessor_hooks': [postprocessor_hook],
+        'post_hooks': [post_hook],
         'quiet': True,  # Suppress yt-dlp output to prevent mixing with JSON
         'no_warnings': True,
         'noprogress': True,  # Disable yt-dlp's progress bar
@@ -40,6 +40,18 @@ a = Analysis(
         'websockets',
         'certifi',
         'brotli',
+        # Handler modules registered by dotted path in main.py
+        'pdf.merger',
+        'pdf.splitter',
+        'pdf.compressor',
+        'pdf.converter',
+        'pdf.editor',
+        'pdf.security',
+        'media.ffmpeg_wrapper',
+        'media.batch',
+        'media.waveform',
+        'image.processor',
+        'download.youtube',
     ],
     hookspath=[],
     hooksconfig={},
@@ -47,7 +59,6 @@ a = Analysis(
     excludes=[
         'tkinter',
         'matplotlib',
-        'numpy',
         'scipy',
         'pandas',
         'pytest',
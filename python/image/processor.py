@@ -4,6 +4,7 @@ Image processing functions for IHW-ZoZ
 
 import os
 from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
 from PIL import Image, ImageDraw
 from loguru import logger
 
@@ -20,7 +21,7 @@ def get_image_info(
                 "height": img.height,
                 "format": img.format,
                 "mode": img.mode,
-                "size": os.path.getsize(file)
+                "size": os.path.getsize(file) if isinstance(file, str) else len(file)
             }
     except Exception as e:
         logger.error(f"Failed to get image info: {e}")
@@ -30,14 +31,52 @@ def get_image_info(
 SUPPORTED_IMAGE_FORMATS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.tif'}
 
 
+def _output_format(outputPath) -> str:
+    """Get the PIL format for an output path or in-memory output (see core.shm)."""
+    if isinstance(outputPath, str):
+        ext = os.path.splitext(outputPath)[1].lower()
+    else:
+        ext = "." + outputPath.format
+    return Image.registered_extensions().get(ext) or ext.lstrip('.').upper()
+
+
+# Near-duplicate frames, compared in 8x8 blocks like FFmpeg's mpdecimate:
+# a frame is dropped if no block's mean difference exceeds DEDUPE_BLOCK_HI
+# and at most DEDUPE_BLOCK_FRAC of the blocks exceed DEDUPE_BLOCK_LO
+DEDUPE_BLOCK = 8
+DEDUPE_BLOCK_HI = 12
+DEDUPE_BLOCK_LO = 5
+DEDUPE_BLOCK_FRAC = 0.33
+
+
+def _is_near_duplicate(frame: np.ndarray, previous: np.ndarray) -> bool:
+    """Whether two equally sized RGBA frames look the same."""
+    diff = np.abs(frame.astype(np.int16) - previous).max(axis=2)
+    height, width = diff.shape
+    rows, cols = max(1, height // DEDUPE_BLOCK), max(1, width // DEDUPE_BLOCK)
+    size_y, size_x = min(DEDUPE_BLOCK, height), min(DEDUPE_BLOCK, width)
+    blocks = diff[:rows * size_y, :cols * size_x].reshape(rows, size_y, cols, size_x).mean(axis=(1, 3))
+    if blocks.max() > DEDUPE_BLOCK_HI:
+        return False
+    return (blocks > DEDUPE_BLOCK_LO).mean() <= DEDUPE_BLOCK_FRAC
+
+
 def create_gif(
     files: List[str],
     outputPath: str,
     frameDelay: int = 100,
     loop: int = 0,
+    dedupe: bool = False,
     _progress_callback: Optional[Callable] = None
 ) -> str:
-    """Create GIF animation from multiple images."""
+    """
+    Create GIF animation from multiple images.
+
+    With dedupe, a frame that looks the same as the last kept one is
+    dropped and its delay is added to that frame, so long still runs cost
+    one frame instead of many. It is lossy, as frames that differ only
+    slightly are merged too, so it is off by default.
+    """
     try:
         if not files:
             raise ValueError("No input files provided")
@@ -45,8 +84,9 @@ def create_gif(
         # Filter out unsupported formats
         valid_files = []
         for f in files:
-            ext = os.path.splitext(f)[1].lower()
-            if ext in SUPPORTED_IMAGE_FORMATS:
+            # In-memory inputs have no extension; Pillow checks them on open
+            ext = os.path.splitext(f)[1].lower() if isinstance(f, str) else None
+            if ext is None or ext in SUPPORTED_IMAGE_FORMATS:
                 valid_files.append(f)
             else:
                 logger.warning(f"Skipping unsupported file format: {f}")
@@ -57,6 +97,10 @@ def create_gif(
         logger.info(f"Creating GIF from {len(valid_files)} images")
 
         images = []
+        durations = []
+        previous = None
+        base_size = None
+        merged = 0
         total = len(valid_files)
 
         for i, file_path in enumerate(valid_files):
@@ -65,25 +109,41 @@ def create_gif(
                 # Convert to RGBA for consistency
                 if img.mode != 'RGBA':
                     img = img.convert('RGBA')
-                images.append(img)
             except Exception as e:
                 logger.warning(f"Failed to open image {file_path}: {e}")
                 continue
 
+            # Use the first image's size as reference
+            if base_size is None:
+                base_size = img.size
+            elif img.size != base_size:
+                img = img.resize(base_size, Image.Resampling.LANCZOS)
+
+            if dedupe:
+                frame = np.asarray(img)
+                if previous is not None and _is_near_duplicate(frame, previous):
+                    durations[-1] += frameDelay
+                    merged += 1
+                    img.close()
+                    img = None
+                else:
+                    previous = frame
+
+            if img is not None:
+                images.append(img)
+                durations.append(frameDelay)
+
             if _progress_callback:
                 _progress_callback((i + 1) / total * 50, f"Loading image {i + 1}/{total}")
 
         if not images:
             raise ValueError("No valid images found")
 
-        # Use the first image's size as reference
-        base_size = images[0].size
+        if merged:
+            logger.info(f"Merged {merged} duplicate frames")
 
-        # Resize all images to match the first one
         resized_images = []
         for i, img in enumerate(images):
-            if img.size != base_size:
-                img = img.resize(base_size, Image.Resampling.LANCZOS)
             # Convert to palette mode for GIF
             img_p = img.convert('P', palette=Image.Palette.ADAPTIVE, colors=256)
             resized_images.append(img_p)
@@ -94,9 +154,10 @@ def create_gif(
         # Save as GIF
         resized_images[0].save(
             outputPath,
+            format='GIF',
             save_all=True,
             append_images=resized_images[1:],
-            duration=frameDelay,
+            duration=durations,
             loop=loop,
             optimize=True
         )
@@ -162,9 +223,7 @@ def resize_image(
                 _progress_callback(80, "Saving image")
 
             # Determine format from output path
-            output_format = os.path.splitext(outputPath)[1].lower().replace('.', '').upper()
-            if output_format == 'JPG':
-                output_format = 'JPEG'
+            output_format = _output_format(outputPath)
 
             # Save with appropriate options
             if output_format == 'JPEG':
@@ -174,7 +233,7 @@ def resize_image(
             elif output_format == 'PNG':
                 resized.save(outputPath, format=output_format, optimize=True)
             else:
-                resized.save(outputPath, quality=quality)
+                resized.save(outputPath, format=output_format, quality=quality)
 
             if _progress_callback:
                 _progress_callback(100, "Resize completed")
@@ -217,14 +276,12 @@ def crop_image(
                 _progress_callback(80, "Saving image")
 
             # Determine format
-            output_format = os.path.splitext(outputPath)[1].lower().replace('.', '').upper()
-            if output_format == 'JPG':
-                output_format = 'JPEG'
+            output_format = _output_format(outputPath)
 
             if output_format == 'JPEG' and cropped.mode == 'RGBA':
                 cropped = cropped.convert('RGB')
 
-            cropped.save(outputPath, quality=quality)
+            cropped.save(outputPath, format=output_format, quality=quality)
 
             if _progress_callback:
                 _progress_callback(100, "Crop completed")
@@ -337,14 +394,12 @@ def rotate_image(
                 _progress_callback(80, "Saving image")
 
             # Determine format
-            output_format = os.path.splitext(outputPath)[1].lower().replace('.', '').upper()
-            if output_format == 'JPG':
-                output_format = 'JPEG'
+            output_format = _output_format(outputPath)
 
             if output_format == 'JPEG' and rotated.mode == 'RGBA':
                 rotated = rotated.convert('RGB')
 
-            rotated.save(outputPath, quality=quality)
+            rotated.save(outputPath, format=output_format, quality=quality)
 
             if _progress_callback:
                 _progress_callback(100, "Rotation completed")
@@ -385,14 +440,12 @@ def flip_image(
                 _progress_callback(80, "Saving image")
 
             # Determine format
-            output_format = os.path.splitext(outputPath)[1].lower().replace('.', '').upper()
-            if output_format == 'JPG':
-                output_format = 'JPEG'
+            output_format = _output_format(outputPath)
 
             if output_format == 'JPEG' and flipped.mode == 'RGBA':
                 flipped = flipped.convert('RGB')
 
-            flipped.save(outputPath, quality=quality)
+            flipped.save(outputPath, format=output_format, quality=quality)
 
             if _progress_callback:
                 _progress_callback(100, "Flip completed")
@@ -438,14 +491,12 @@ def enlarge_image(
                 _progress_callback(80, "Saving image")
 
             # Determine format
-            output_format = os.path.splitext(outputPath)[1].lower().replace('.', '').upper()
-            if output_format == 'JPG':
-                output_format = 'JPEG'
+            output_format = _output_format(outputPath)
 
             if output_format == 'JPEG' and enlarged.mode == 'RGBA':
                 enlarged = enlarged.convert('RGB')
 
-            enlarged.save(outputPath, quality=quality)
+            enlarged.save(outputPath, format=output_format, quality=quality)
 
             if _progress_callback:
                 _progress_callback(100, "Enlargement completed")
@@ -4,60 +4,110 @@ IHW-ZoZ - Python Backend Service
 JSON-RPC server for PDF and media processing
 """
 
+import time
+
+_STARTED = time.perf_counter()
+
+import os
 import sys
 import json
+import multiprocessing
 from typing import Any, Dict, Optional
 from loguru import logger
 
 from core.server import JsonRpcServer
-from pdf import merger, splitter, compressor, converter, editor, security
-from media import ffmpeg_wrapper
-from image import processor as image_processor
-from download import youtube as youtube_downloader
+from core.cache import ResultCache, DEFAULT_MAX_BYTES
+from core.metrics import ServerMetrics
+from core.scheduler import create_scheduler
+from core.estimate import task_group
+
+_IMPORTED = time.perf_counter()
 
 # Configure logging
 logger.remove()
 logger.add(sys.stderr, level="INFO", format="{time} | {level} | {message}")
 
 
+def create_result_cache() -> Optional[ResultCache]:
+    """
+    Create the on-disk result cache.
+
+    Results are only served from the cache for requests that pass
+    _cache: true, or for every cacheable request with IHW_RESULT_CACHE=1.
+    IHW_RESULT_CACHE=0 disables it entirely. Also configured with
+    IHW_CACHE_DIR and IHW_CACHE_MAX_MB.
+    """
+    if os.environ.get("IHW_RESULT_CACHE") == "0":
+        return None
+
+    max_mb = os.environ.get("IHW_CACHE_MAX_MB")
+    max_bytes = int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES
+    return ResultCache(max_bytes=max_bytes)
+
+
 def create_server() -> JsonRpcServer:
-    """Create and configure the JSON-RPC server."""
-    server = JsonRpcServer()
-
-    # Register PDF methods
-    server.register("pdf.merge", merger.merge_pdfs)
-    server.register("pdf.split", splitter.split_pdf)
-    server.register("pdf.compress", compressor.compress_pdf)
-    server.register("pdf.toImages", converter.pdf_to_images)
-    server.register("pdf.rotate", editor.rotate_pdf)
-    server.register("pdf.addWatermark", editor.add_watermark)
-    server.register("pdf.encrypt", security.encrypt_pdf)
-    server.register("pdf.decrypt", security.decrypt_pdf)
-    server.register("pdf.crack", security.crack_pdf)
+    """
+    Create and configure the JSON-RPC server.
+
+    Handlers are registered by dotted path and imported on first call (or by
+    the background prewarm), so startup doesn't pay for PyMuPDF, Pillow and
+    the media modules before the server can answer.
+    """
+    # IHW_STATS_FILE appends one JSON line per finished request
+    server = JsonRpcServer(
+        result_cache=create_result_cache(),
+        metrics=ServerMetrics(dump_path=os.environ.get("IHW_STATS_FILE")),
+        scheduler=create_scheduler(),
+        cache_by_default=os.environ.get("IHW_RESULT_CACHE") == "1"
+    )
+
+    # Register PDF methods (PyMuPDF isn't thread-safe, so they share a group)
+    server.register("pdf.merge", "pdf.merger.merge_pdfs", cacheable=True, group="pdf")
+    server.register("pdf.split", "pdf.splitter.split_pdf", cacheable=True, partial=True, group="pdf")
+    server.register("pdf.compress", "pdf.compressor.compress_pdf", cacheable=True, group="pdf")
+    server.register("pdf.toImages", "pdf.converter.pdf_to_images", cacheable=True, partial=True, group="pdf")
+    server.register("pdf.rotate", "pdf.editor.rotate_pdf", cacheable=True, group="pdf")
+    server.register("pdf.addWatermark", "pdf.editor.add_watermark", cacheable=True, group="pdf")
+    server.register("pdf.encrypt", "pdf.security.encrypt_pdf", group="pdf")
+    server.register("pdf.decrypt", "pdf.security.decrypt_pdf", group="pdf")
+    # pdf.crack runs PyMuPDF in a child process, so it doesn't hold the group
+    server.register("pdf.crack", "pdf.security.crack_pdf", priority="batch")
 
     # Register media methods
-    server.register("media.info", ffmpeg_wrapper.get_media_info)
-    server.register("media.videoCompress", ffmpeg_wrapper.compress_video)
-    server.register("media.videoConvert", ffmpeg_wrapper.convert_video)
-    server.register("media.audioConvert", ffmpeg_wrapper.convert_audio)
-    server.register("media.audioExtract", ffmpeg_wrapper.extract_audio)
-    server.register("media.trim", ffmpeg_wrapper.trim_media)
-    server.register("media.videoToGif", ffmpeg_wrapper.video_to_gif)
+    server.register("media.info", "media.ffmpeg_wrapper.get_media_info", priority="interactive")
+    server.register("media.infoMany", "media.ffmpeg_wrapper.get_media_info_many", priority="interactive")
+    server.register("media.videoCompress", "media.ffmpeg_wrapper.compress_video", cacheable=True, priority="batch")
+    server.register("media.videoConvert", "media.ffmpeg_wrapper.convert_video", cacheable=True)
+    server.register("media.audioConvert", "media.ffmpeg_wrapper.convert_audio", cacheable=True)
+    server.register("media.audioExtract", "media.ffmpeg_wrapper.extract_audio", cacheable=True)
+    server.register("media.trim", "media.ffmpeg_wrapper.trim_media", cacheable=True)
+    server.register("media.videoToGif", "media.ffmpeg_wrapper.video_to_gif", cacheable=True)
+    server.register("media.concat", "media.ffmpeg_wrapper.concat_media", cacheable=True)
+    server.register("media.batch", "media.batch.run_batch", priority="batch")
+    server.register("media.fanout", "media.ffmpeg_wrapper.fanout_media")
+    server.register("media.thumbnails", "media.ffmpeg_wrapper.get_thumbnails", priority="interactive")
+    server.register("media.waveform", "media.waveform.get_waveform", priority="interactive")
 
     # Register image methods
-    server.register("image.info", image_processor.get_image_info)
-    server.register("image.createGif", image_processor.create_gif)
-    server.register("image.resize", image_processor.resize_image)
-    server.register("image.crop", image_processor.crop_image)
-    server.register("image.getColors", image_processor.get_image_colors)
-    server.register("image.rotate", image_processor.rotate_image)
-    server.register("image.flip", image_processor.flip_image)
-    server.register("image.enlarge", image_processor.enlarge_image)
+    server.register("image.info", "image.processor.get_image_info", memory_io=True, priority="interactive")
+    server.register("image.createGif", "image.processor.create_gif", cacheable=True, memory_io=True)
+    server.register("image.resize", "image.processor.resize_image", cacheable=True, memory_io=True)
+    server.register("image.crop", "image.processor.crop_image", cacheable=True, memory_io=True)
+    server.register(
+        "image.getColors", "image.processor.get_image_colors",
+        cacheable=True, memory_io=True, priority="interactive"
+    )
+    server.register("image.rotate", "image.processor.rotate_image", cacheable=True, memory_io=True)
+    server.register("image.flip", "image.processor.flip_image", cacheable=True, memory_io=True)
+    server.register("image.enlarge", "image.processor.enlarge_image", cacheable=True, memory_io=True)
+
+    # Sampling-based duration/size estimates (PDF ones share the PDF group)
+    server.register("task.estimate", "core.estimate.estimate_task", group=task_group)
 
     # Register download methods
-    server.register("download.checkNetwork", youtube_downloader.check_network)
-    server.register("download.getVideoInfo", youtube_downloader.get_video_info)
-    server.register("download.video", youtube_downloader.download_video)
+    server.register("download.checkNetwork", "download.youtube.check_network", priority="interactive")
+    server.register("download.getVideoInfo", "download.youtube.get_video_info", priority="interactive")
+    server.register("download.video", "download.youtube.download_video", partial=True, priority="batch")
 
     return server
 
@@ -66,9 +116,19 @@ def main():
     """Main entry point."""
     logger.info("Starting IHW-ZoZ Python backend...")
     server = create_server()
+    server.startup_timings.update({
+        "imports": round((_IMPORTED - _STARTED) * 1000, 1),
+        "startup": round((time.perf_counter() - _STARTED) * 1000, 1),
+    })
 
     try:
-        server.run()
+        # IHW_PREWARM=0 keeps handler imports strictly on demand;
+        # IHW_TRANSPORT/IHW_CODEC request the framed transport
+        server.run(
+            prewarm=os.environ.get("IHW_PREWARM", "1") != "0",
+            transport=os.environ.get("IHW_TRANSPORT"),
+            codec=os.environ.get("IHW_CODEC"),
+        )
     except KeyboardInterrupt:
         logger.info("Shutting down...")
         sys.exit(0)
@@ -78,4 +138,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Child processes (pdf.crack) re-enter the frozen executable
+    multiprocessing.freeze_support()
     main()
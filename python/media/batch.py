@@ -0,0 +1,154 @@
+"""
+Batch media processing: run many FFmpeg jobs concurrently
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+from core.cleanup import cleanup_file
+from core.resources import cpu_count, default_job_threads, resolve_profile
+from core.server import JsonRpcError
+from . import ffmpeg_wrapper
+
+# Job methods accepted by media.batch (the "media." prefix is optional)
+BATCH_METHODS = {
+    'videoCompress': ffmpeg_wrapper.compress_video,
+    'videoConvert': ffmpeg_wrapper.convert_video,
+    'audioConvert': ffmpeg_wrapper.convert_audio,
+    'audioExtract': ffmpeg_wrapper.extract_audio,
+    'trim': ffmpeg_wrapper.trim_media,
+    'videoToGif': ffmpeg_wrapper.video_to_gif,
+}
+
+# Audio work and stream copies run on a single FFmpeg thread
+SINGLE_THREAD_METHODS = {'audioConvert', 'audioExtract', 'trim'}
+
+
+def _job_resources(method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get a job's resource profile.
+
+    Jobs run in the background profile unless they name another one, and
+    video jobs get an explicit share of the CPU so FFmpeg doesn't spawn a
+    thread per core for each of them.
+    """
+    profile = resolve_profile(params.get("resources") or "background")
+    if method not in SINGLE_THREAD_METHODS:
+        profile.setdefault("threads", default_job_threads())
+    return profile
+
+
+def run_batch(
+    jobs: List[Dict[str, Any]],
+    maxConcurrent: Optional[int] = None,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Run a batch of media jobs concurrently.
+
+    Every FFmpeg process draws from the server's global thread budget, so
+    many single-threaded audio conversions run side by side while heavy
+    video encodes queue up. Jobs use the low-priority background profile
+    unless they set their own. A failing job doesn't abort the batch;
+    cancelling the batch does.
+
+    Args:
+        jobs: List of {"method": "audioConvert", "params": {...}} entries
+        maxConcurrent: Maximum number of jobs running at once (default: CPU count)
+        _progress_callback: Optional progress callback, also used to stream
+            each job's result as it finishes (jobIndex/jobResult details)
+
+    Returns:
+        Dictionary with per-job results and success/failure counts
+    """
+    total = len(jobs)
+    logger.info(f"Running media batch of {total} jobs")
+
+    if not total:
+        return {"results": [], "succeeded": 0, "failed": 0}
+
+    # Validate everything up front so a typo doesn't surface halfway through
+    prepared = []
+    for index, job in enumerate(jobs):
+        method = str(job.get("method", "")).replace("media.", "", 1)
+        if method not in BATCH_METHODS:
+            raise ValueError(f"Unsupported batch method at job {index}: {job.get('method')}")
+        params = dict(job.get("params") or {})
+        prepared.append((method, params))
+
+    workers = max(1, min(maxConcurrent or cpu_count(), total))
+    lock = threading.Lock()
+    job_progress = [0.0] * total
+    results: List[Optional[Dict[str, Any]]] = [None] * total
+    state = {"cancelled": False, "completed": 0}
+
+    def report(index: int, progress: Optional[float], message: str, **details) -> None:
+        if state["cancelled"]:
+            raise JsonRpcError(-32001, "Task cancelled")
+        with lock:
+            if progress is not None:
+                job_progress[index] = progress
+            overall = sum(job_progress) / total
+            if _progress_callback:
+                _progress_callback(overall, message, jobIndex=index, **details)
+
+    def run_job(index: int) -> Dict[str, Any]:
+        method, params = prepared[index]
+        params["resources"] = _job_resources(method, params)
+        output = params.get("outputPath")
+
+        if state["cancelled"]:
+            raise JsonRpcError(-32001, "Task cancelled")
+        handler = BATCH_METHODS[method]
+        try:
+            result = handler(
+                **params,
+                _progress_callback=lambda p, m="", **d: report(
+                    index, p, f"Job {index + 1}/{total}: {m}", **d
+                )
+            )
+            return {"index": index, "method": method, "success": True, "result": result}
+        except JsonRpcError:
+            # Cancelled mid-job: the server only cleans up the batch's own outputs
+            if isinstance(output, str):
+                cleanup_file(output)
+            raise
+        except Exception as e:
+            logger.warning(f"Batch job {index} ({method}) failed: {e}")
+            if isinstance(output, str):
+                cleanup_file(output)
+            return {"index": index, "method": method, "success": False, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, i): i for i in range(total)}
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                job_result = future.result()
+                results[index] = job_result
+                with lock:
+                    state["completed"] += 1
+                    job_progress[index] = 100.0
+                    completed = state["completed"]
+                report(
+                    index, 100.0,
+                    f"Finished {completed}/{total}",
+                    jobResult=job_result
+                )
+        except BaseException:
+            # Cancelled: make queued and running jobs bail out
+            state["cancelled"] = True
+            for future in futures:
+                future.cancel()
+            raise
+
+    succeeded = sum(1 for r in results if r and r["success"])
+    logger.info(f"Batch finished: {succeeded}/{total} succeeded")
+    return {
+        "results": results,
+        "succeeded": succeeded,
+        "failed": total - succeeded,
+    }
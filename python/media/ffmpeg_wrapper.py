@@ -6,10 +6,18 @@ import os
 import subprocess
 import json
 import re
+import hashlib
 import shutil
-from typing import Dict, Optional, Callable, Any
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO, Dict, List, Optional, Callable, Any, Tuple
 from loguru import logger
 
+from core.cache import get_cache_root
+from core.resources import cpu_count, process_budget, process_launch, profile_weight, resolve_profile
+
 # Audio format configurations
 AUDIO_FORMATS = {
     'mp3': {'codec': 'libmp3lame', 'extension': 'mp3'},
@@ -26,6 +34,61 @@ AUDIO_FORMATS = {
     'webm': {'codec': 'libopus', 'extension': 'webm'},
 }
 
+# Video container configurations
+# 'video'/'audio' list the codecs the container can take as-is (None = any);
+# 'videoCodec'/'audioCodec' are the encoders used when a stream must be re-encoded
+VIDEO_FORMATS = {
+    'mp4': {
+        'muxer': 'mp4',
+        'video': {'h264', 'hevc', 'mpeg4', 'av1'},
+        'audio': {'aac', 'mp3', 'ac3', 'eac3', 'alac', 'opus', 'flac'},
+        'videoCodec': 'libx264', 'audioCodec': 'aac',
+    },
+    'm4v': {
+        'muxer': 'mp4',
+        'video': {'h264', 'hevc', 'mpeg4'},
+        'audio': {'aac', 'mp3', 'ac3', 'alac'},
+        'videoCodec': 'libx264', 'audioCodec': 'aac',
+    },
+    'mov': {
+        'muxer': 'mov',
+        'video': {'h264', 'hevc', 'mpeg4', 'prores', 'mjpeg'},
+        'audio': {'aac', 'mp3', 'ac3', 'alac', 'pcm_s16le', 'pcm_s24le'},
+        'videoCodec': 'libx264', 'audioCodec': 'aac',
+    },
+    'mkv': {
+        'muxer': 'matroska',
+        'video': None,
+        'audio': None,
+        'videoCodec': 'libx264', 'audioCodec': 'aac',
+    },
+    'webm': {
+        'muxer': 'webm',
+        'video': {'vp8', 'vp9', 'av1'},
+        'audio': {'vorbis', 'opus'},
+        'videoCodec': 'libvpx-vp9', 'audioCodec': 'libopus',
+    },
+    'avi': {
+        'muxer': 'avi',
+        # H.264 from MP4/MKV would need Annex B conversion, re-encode it instead
+        'video': {'mpeg4', 'mjpeg'},
+        'audio': {'mp3', 'ac3', 'aac', 'pcm_s16le'},
+        'videoCodec': 'libx264', 'audioCodec': 'aac',
+    },
+    'flv': {
+        'muxer': 'flv',
+        'video': {'h264'},
+        'audio': {'aac', 'mp3'},
+        'videoCodec': 'libx264', 'audioCodec': 'aac',
+    },
+    'ts': {
+        'muxer': 'mpegts',
+        'video': {'h264', 'hevc', 'mpeg2video'},
+        'audio': {'aac', 'mp3', 'ac3'},
+        'videoCodec': 'libx264', 'audioCodec': 'aac',
+    },
+}
+
 
 def get_ffmpeg_path() -> str:
     """Get the path to FFmpeg executable."""
@@ -73,17 +136,33 @@ def get_ffprobe_path() -> str:
     raise FileNotFoundError("FFprobe not found. Please install FFmpeg.")
 
 
-def get_media_info(file: str, **kwargs) -> Dict[str, Any]:
+# In-process ffprobe cache: (path, mtime_ns, size) -> raw ffprobe JSON
+_PROBE_CACHE_SIZE = 512
+_probe_cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+_probe_lock = threading.Lock()
+
+# Bounded pool size for concurrent ffprobe runs
+MAX_PROBE_WORKERS = 8
+
+
+def _probe(file: str) -> Dict[str, Any]:
     """
-    Get media file information using FFprobe.
+    Run FFprobe on a file, cached by path plus mtime/size.
 
     Args:
         file: Media file path
 
     Returns:
-        Dictionary with media information
+        Raw FFprobe JSON output (format and streams). The dict is shared
+        with the cache and must not be mutated.
     """
-    logger.info(f"Getting media info: {file}")
+    st = os.stat(file)
+    key = (os.path.abspath(file), st.st_mtime_ns, st.st_size)
+
+    with _probe_lock:
+        if key in _probe_cache:
+            _probe_cache.move_to_end(key)
+            return _probe_cache[key]
 
     ffprobe = get_ffprobe_path()
     cmd = [
@@ -101,6 +180,31 @@ def get_media_info(file: str, **kwargs) -> Dict[str, Any]:
         raise RuntimeError(f"FFprobe error: {result.stderr}")
 
     data = json.loads(result.stdout)
+
+    with _probe_lock:
+        _probe_cache[key] = data
+        while len(_probe_cache) > _PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+
+    return data
+
+
+def get_media_info(file: str, **kwargs) -> Dict[str, Any]:
+    """
+    Get media file information using FFprobe.
+
+    Results are cached per file (path, mtime, size), so handlers and the UI
+    share a single probe per file.
+
+    Args:
+        file: Media file path
+
+    Returns:
+        Dictionary with media information
+    """
+    logger.info(f"Getting media info: {file}")
+
+    data = _probe(file)
     format_info = data.get("format", {})
     streams = data.get("streams", [])
 
@@ -135,12 +239,60 @@ def get_media_info(file: str, **kwargs) -> Dict[str, Any]:
     return info
 
 
+def get_media_info_many(
+    files: List[str],
+    maxWorkers: int = MAX_PROBE_WORKERS,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Get media information for many files concurrently.
+
+    Args:
+        files: Media file paths
+        maxWorkers: Maximum number of concurrent FFprobe processes
+        _progress_callback: Optional progress callback
+
+    Returns:
+        Dictionary mapping each file path to its media information,
+        or to {"error": message} if probing that file failed
+    """
+    logger.info(f"Getting media info for {len(files)} files")
+
+    results: Dict[str, Any] = {}
+    total = len(files)
+    if not total:
+        return results
+
+    workers = max(1, min(maxWorkers, total))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(get_media_info, f): f for f in files}
+        for done, future in enumerate(as_completed(futures), start=1):
+            file = futures[future]
+            try:
+                results[file] = future.result()
+            except Exception as e:
+                logger.warning(f"Failed to probe {file}: {e}")
+                results[file] = {"error": str(e)}
+
+            if _progress_callback:
+                _progress_callback(done / total * 100, f"Probed {done}/{total}")
+
+    # Keep the caller's ordering
+    return {f: results[f] for f in files}
+
+
 def compress_video(
     file: str,
     outputPath: str,
     quality: int = 23,
     preset: str = "medium",
     resolution: Optional[str] = None,
+    parallel: bool = False,
+    segments: Optional[int] = None,
+    targetSizeMB: Optional[float] = None,
+    quickAnalysis: bool = False,
+    resources: Optional[Dict[str, Any]] = None,
     _progress_callback: Optional[Callable] = None,
     **kwargs
 ) -> str:
@@ -153,6 +305,13 @@ def compress_video(
         quality: CRF value (0-51, lower = better quality)
         preset: Encoding preset
         resolution: Target resolution (e.g., "1920x1080")
+        parallel: Split at keyframes and encode segments concurrently
+        segments: Number of segments for parallel mode (default: CPU count)
+        targetSizeMB: Hit this output size with a two-pass bitrate encode
+            instead of encoding at a constant quality
+        quickAnalysis: With targetSizeMB, first sample the video at the
+            given quality; if that already fits, do a single CRF encode
+        resources: Optional resource profile name or settings (see core.resources)
         _progress_callback: Optional progress callback
 
     Returns:
@@ -161,7 +320,30 @@ def compress_video(
     logger.info(f"Compressing video: {file}")
 
     ffmpeg = get_ffmpeg_path()
-    duration = get_media_info(file).get("duration", 0)
+    media_info = get_media_info(file)
+    duration = media_info.get("duration", 0)
+
+    if targetSizeMB:
+        if parallel:
+            logger.info("Target size mode encodes in two passes, ignoring parallel")
+        if _compress_video_target(
+            file, outputPath, targetSizeMB, quality, preset, resolution,
+            media_info, quickAnalysis, _progress_callback, resources
+        ):
+            logger.info(f"Compressed video saved to {outputPath}")
+            return outputPath
+
+    elif parallel and duration >= MIN_PARALLEL_DURATION:
+        split_points = _plan_segments(file, duration, segments, resources)
+        if split_points:
+            _compress_video_parallel(
+                file, outputPath, quality, preset, resolution,
+                split_points, duration, "audioCodec" in media_info,
+                _progress_callback, resources
+            )
+            logger.info(f"Compressed video saved to {outputPath}")
+            return outputPath
+        logger.info("No usable keyframes for parallel encoding, using a single encode")
 
     cmd = [
         ffmpeg,
@@ -179,26 +361,483 @@ def compress_video(
 
     cmd.append(outputPath)
 
-    _run_ffmpeg_with_progress(cmd, duration, _progress_callback)
+    progress = _progress_callback
+    if targetSizeMB:
+        # Quick analysis used the first part of the progress range
+        progress = _sub_progress(_progress_callback, QUICK_ANALYSIS_PROGRESS, 100)
+    _run_ffmpeg_with_progress(cmd, duration, progress, resources)
 
     logger.info(f"Compressed video saved to {outputPath}")
     return outputPath
 
 
+# Target size mode
+MUXING_OVERHEAD = 0.03  # share of the target reserved for container overhead
+MIN_VIDEO_BITRATE = 64000  # bits/s
+QUICK_ANALYSIS_PROGRESS = 10
+AUDIO_PASS_PROGRESS = 15
+FIRST_PASS_PROGRESS = 45
+
+
+def _compress_video_target(
+    file: str,
+    outputPath: str,
+    targetSizeMB: float,
+    quality: int,
+    preset: str,
+    resolution: Optional[str],
+    media_info: Dict[str, Any],
+    quick_analysis: bool,
+    progress_callback: Optional[Callable],
+    resources: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Encode to a target size with two-pass x264.
+
+    The audio track is encoded first, since the AAC encoder's actual
+    bitrate varies with the channel layout. The video bitrate is what's
+    left of the target after that audio and muxing overhead, spread over
+    the duration. The first video pass only collects statistics: no
+    audio, null muxer, and x264's fast first-pass analysis (which already
+    lowers the preset's expensive settings while keeping the ones the
+    second pass needs to match).
+
+    Returns:
+        False if quick analysis found that a CRF encode at the given
+        quality already fits, so the caller should do that instead
+    """
+    ffmpeg = get_ffmpeg_path()
+    duration = media_info.get("duration", 0)
+    if duration <= 0:
+        raise ValueError("Target size mode needs a known duration")
+
+    target_bytes = targetSizeMB * 1024 * 1024
+    start = 0
+    if quick_analysis:
+        estimate = estimate_compress_video(
+            file, quality=quality, preset=preset, resolution=resolution, resources=resources,
+            _progress_callback=_sub_progress(progress_callback, 0, QUICK_ANALYSIS_PROGRESS)
+        )
+        if estimate["outputSize"]["high"] <= target_bytes:
+            logger.info(f"CRF {quality} fits within {targetSizeMB} MB, skipping two-pass encode")
+            return False
+        start = QUICK_ANALYSIS_PROGRESS
+
+    work_dir = tempfile.mkdtemp(prefix="ihw-twopass-")
+    passlog = os.path.join(work_dir, "pass")
+    try:
+        audio_path = None
+        audio_bytes = 0
+        if "audioCodec" in media_info:
+            audio_path = os.path.join(work_dir, "audio.m4a")
+            cmd = [ffmpeg, "-i", file, "-map", "0:a:0", "-vn", "-c:a", "aac", "-b:a", "128k", "-y", audio_path]
+            _run_ffmpeg_with_progress(
+                cmd, duration,
+                _sub_progress(progress_callback, start, AUDIO_PASS_PROGRESS),
+                _single_threaded(resources)
+            )
+            audio_bytes = os.path.getsize(audio_path)
+
+        video_bitrate = int((target_bytes * (1 - MUXING_OVERHEAD) - audio_bytes) * 8 / duration)
+        if video_bitrate < MIN_VIDEO_BITRATE:
+            raise ValueError(f"Target size of {targetSizeMB} MB is too small for {duration:.0f} s of video")
+
+        logger.info(f"Two-pass encode at {video_bitrate // 1000} kbit/s for {targetSizeMB} MB")
+        scale = ["-vf", f"scale={resolution}"] if resolution else []
+        video_args = ["-c:v", "libx264", "-b:v", str(video_bitrate), "-preset", preset]
+
+        first_pass = [ffmpeg, "-y", "-i", file, *scale, "-map", "0:v:0", *video_args,
+                      "-pass", "1", "-passlogfile", passlog, "-an", "-f", "null", os.devnull]
+        _run_ffmpeg_with_progress(
+            first_pass, duration,
+            _sub_progress(progress_callback, AUDIO_PASS_PROGRESS if audio_path else start, FIRST_PASS_PROGRESS),
+            resources
+        )
+
+        second_pass = [ffmpeg, "-y", "-i", file]
+        if audio_path:
+            second_pass.extend(["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0", "-c:a", "copy"])
+        else:
+            second_pass.extend(["-map", "0:v:0"])
+        second_pass.extend([*scale, *video_args, "-pass", "2", "-passlogfile", passlog, outputPath])
+        _run_ffmpeg_with_progress(
+            second_pass, duration,
+            _sub_progress(progress_callback, FIRST_PASS_PROGRESS, 100),
+            resources
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return True
+
+
+# Length of each sample segment for estimates
+ESTIMATE_SEGMENT_DURATION = 4.0  # seconds
+ESTIMATE_MIN_SEGMENT_DURATION = 0.5  # seconds
+# Samples never cover more than this share of the input
+ESTIMATE_MAX_COVERAGE = 0.15
+
+
+def estimate_compress_video(
+    file: str,
+    quality: int = 23,
+    preset: str = "medium",
+    resolution: Optional[str] = None,
+    samples: int = 3,
+    resources: Optional[Dict[str, Any]] = None,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Estimate compress_video's duration and output size by sampling.
+
+    Encodes a few short segments spread over the video with the same
+    settings as the job and extrapolates encode time and output bytes per
+    second of input. Estimates a single encode; parallel mode is usually
+    faster.
+
+    Samples cover at most ESTIMATE_MAX_COVERAGE of the input, so short
+    inputs get fewer and shorter samples and a coarser estimate rather
+    than an encode of the whole file.
+
+    Args:
+        file: Input video file path
+        quality: CRF value the job would use
+        preset: Encoding preset the job would use
+        resolution: Target resolution the job would use
+        samples: Number of segments to encode
+        resources: Optional resource profile name or settings (see core.resources)
+        _progress_callback: Optional progress callback
+
+    Returns:
+        Dictionary with duration and outputSize estimates
+    """
+    from core.estimate import Stopwatch, extrapolate
+
+    ffmpeg = get_ffmpeg_path()
+    media_info = get_media_info(file)
+    duration = media_info.get("duration", 0)
+    if duration <= 0:
+        raise ValueError("Cannot estimate a file without a known duration")
+
+    budget = duration * ESTIMATE_MAX_COVERAGE
+    count = max(1, min(samples, int(budget // ESTIMATE_MIN_SEGMENT_DURATION)))
+    length = min(ESTIMATE_SEGMENT_DURATION, budget / count)
+    starts = [(duration * (i + 0.5) / count) - length / 2 for i in range(count)]
+
+    time_rates: List[float] = []
+    size_rates: List[float] = []
+    with tempfile.TemporaryDirectory(prefix="ihw-estimate-") as work_dir:
+        for index, start in enumerate(starts):
+            sample_path = os.path.join(work_dir, f"sample_{index}.mp4")
+            cmd = [
+                ffmpeg,
+                "-ss", f"{max(0.0, start):.3f}",
+                "-i", file,
+                "-t", f"{length:.3f}",
+                "-c:v", "libx264",
+                "-crf", str(quality),
+                "-preset", preset,
+                "-c:a", "aac",
+                "-b:a", "128k",
+            ]
+            if resolution:
+                cmd.extend(["-vf", f"scale={resolution}"])
+            cmd.extend(["-y", sample_path])
+
+            with Stopwatch() as watch:
+                _run_ffmpeg_with_progress(
+                    cmd, length,
+                    _sub_progress(_progress_callback, index * 100 / count, (index + 1) * 100 / count),
+                    resources
+                )
+            time_rates.append(watch.elapsed / length)
+            size_rates.append(os.path.getsize(sample_path) / length)
+
+    return {
+        "duration": extrapolate(time_rates, duration),
+        "outputSize": extrapolate(size_rates, duration),
+        "samples": count,
+        "inputDuration": duration,
+        # Overall bitrate the samples came out at (bits/s)
+        "bitrate": round(sum(size_rates) / len(size_rates) * 8),
+    }
+
+
+# Parallel segment encoding
+MIN_PARALLEL_DURATION = 60.0  # seconds
+MIN_SEGMENT_DURATION = 20.0  # seconds
+MAX_SEGMENTS = 16
+
+
+def _start_time(file: str) -> float:
+    """Get a file's start time in seconds; input -ss and -t count from here."""
+    try:
+        return float(_probe(file).get("format", {}).get("start_time") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _keyframe_times(
+    file: str,
+    intervals: Optional[List[Tuple[float, float]]] = None,
+    start_time: float = 0.0
+) -> List[float]:
+    """
+    Get keyframe timestamps of the first video stream.
+
+    Only packet headers are read, nothing is decoded.
+
+    Args:
+        file: Media file path
+        intervals: Optional (start, length) windows to read instead of the whole file
+        start_time: The file's start time (see _start_time). Intervals and
+            results are relative to it, like input -ss, rather than
+            absolute timestamps (MPEG-TS usually starts around 1.4s)
+
+    Returns:
+        Sorted list of keyframe times in seconds
+    """
+    ffprobe = get_ffprobe_path()
+    cmd = [
+        ffprobe,
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+    ]
+    if intervals:
+        cmd.extend(["-read_intervals", ",".join(f"{s + start_time:.3f}%+{l:.3f}" for s, l in intervals)])
+    cmd.append(file)
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFprobe error: {result.stderr}")
+
+    times = set()
+    for line in result.stdout.splitlines():
+        parts = line.strip().split(",")
+        if len(parts) >= 2 and "K" in parts[1]:
+            try:
+                times.add(round(float(parts[0]) - start_time, 6))
+            except ValueError:
+                continue
+    return sorted(times)
+
+
+def _plan_segments(
+    file: str,
+    duration: float,
+    segments: Optional[int],
+    resources: Optional[Dict[str, Any]] = None
+) -> List[float]:
+    """
+    Pick keyframe-aligned split points for parallel encoding.
+
+    By default there is one segment per thread the job's profile allows.
+
+    Returns:
+        Split times relative to the file's start (excluding 0 and the
+        end), or an empty list if the file can't be split usefully
+    """
+    count = segments or min(cpu_count(), profile_weight(resolve_profile(resources)), MAX_SEGMENTS)
+    count = min(count, int(duration // MIN_SEGMENT_DURATION))
+    if count < 2:
+        return []
+
+    targets = [duration * i / count for i in range(1, count)]
+    # Read a short window after each target instead of scanning the whole file
+    window = min(MIN_SEGMENT_DURATION, 10.0)
+    keyframes = _keyframe_times(
+        file, [(max(0.0, t - window), window * 2) for t in targets], _start_time(file)
+    )
+
+    points: List[float] = []
+    for target in targets:
+        candidates = [k for k in keyframes if k > (points[-1] if points else 0.0)]
+        if not candidates:
+            break
+        point = min(candidates, key=lambda k: abs(k - target))
+        if point < duration - 1.0:
+            points.append(point)
+
+    return points
+
+
+def _write_concat_list(paths: List[str], list_path: str) -> None:
+    """Write an FFmpeg concat demuxer list file."""
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+def _concat_copy(parts: List[str], outputPath: str, audio: Optional[str] = None) -> None:
+    """
+    Losslessly join parts with the concat demuxer.
+
+    Args:
+        parts: Media files with identical stream parameters, in order
+        outputPath: Output file path
+        audio: Optional separate audio track to mux in
+    """
+    ffmpeg = get_ffmpeg_path()
+    work_dir = os.path.dirname(os.path.abspath(parts[0]))
+    list_path = os.path.join(work_dir, "concat.txt")
+    _write_concat_list(parts, list_path)
+
+    cmd = [ffmpeg, "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio:
+        cmd.extend(["-i", audio, "-map", "0:v", "-map", "1:a"])
+    cmd.extend(["-c", "copy", "-y", outputPath])
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg concat error: {result.stderr.strip()}")
+
+
+def _compress_video_parallel(
+    file: str,
+    outputPath: str,
+    quality: int,
+    preset: str,
+    resolution: Optional[str],
+    split_points: List[float],
+    duration: float,
+    has_audio: bool,
+    progress_callback: Optional[Callable],
+    resources: Optional[Dict[str, Any]] = None
+) -> None:
+    """Encode keyframe-aligned segments concurrently and concat them losslessly."""
+    ffmpeg = get_ffmpeg_path()
+    bounds = list(zip([0.0] + split_points, split_points + [duration]))
+    # The job's thread allowance is shared between the segment workers
+    total_threads = profile_weight(resolve_profile(resources))
+    workers = max(1, min(len(bounds), total_threads))
+    threads = max(1, total_threads // workers)
+    logger.info(f"Parallel encode: {len(bounds)} segments, {workers} workers x {threads} threads")
+
+    segment_resources = dict(resolve_profile(resources), threads=threads)
+    audio_resources = dict(segment_resources, threads=1)
+
+    work_dir = tempfile.mkdtemp(prefix="ihw-segments-")
+    # Reserve the last few percent for the audio track and the concat step
+    aggregate = _ProgressAggregator([end - start for start, end in bounds], progress_callback, 95)
+
+    def encode_segment(index: int) -> str:
+        start, end = bounds[index]
+        segment_path = os.path.join(work_dir, f"segment_{index:03d}.mp4")
+        cmd = [
+            ffmpeg,
+            "-ss", f"{start:.6f}",
+            "-i", file,
+            "-t", f"{end - start:.6f}",
+            "-map", "0:v:0",
+            "-an", "-sn", "-dn",
+            "-c:v", "libx264",
+            "-crf", str(quality),
+            "-preset", preset,
+        ]
+        if resolution:
+            cmd.extend(["-vf", f"scale={resolution}"])
+        cmd.extend(["-y", segment_path])
+        _run_ffmpeg_with_progress(cmd, end - start, aggregate.callback(index), segment_resources)
+        return segment_path
+
+    def encode_audio() -> str:
+        audio_path = os.path.join(work_dir, "audio.m4a")
+        cmd = [ffmpeg, "-i", file, "-map", "0:a:0", "-vn", "-c:a", "aac", "-b:a", "128k", "-y", audio_path]
+        _run_ffmpeg_with_progress(cmd, duration, aggregate.check, audio_resources)
+        return audio_path
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            audio_future = pool.submit(encode_audio) if has_audio else None
+            segment_futures = [pool.submit(encode_segment, i) for i in range(len(bounds))]
+            try:
+                segment_paths = [f.result() for f in segment_futures]
+                audio_path = audio_future.result() if audio_future else None
+            except BaseException:
+                # Make the remaining segment encoders bail out
+                aggregate.abort()
+                raise
+
+        if progress_callback:
+            progress_callback(96, "Joining segments...")
+        _concat_copy(segment_paths, outputPath, audio_path)
+
+        if progress_callback:
+            progress_callback(100, "Done")
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class _ProgressAggregator:
+    """Combine per-part FFmpeg progress into one weighted progress value."""
+
+    def __init__(self, weights: List[float], progress_callback: Optional[Callable], scale: float = 100):
+        self._weights = weights
+        self._total = sum(weights) or 1
+        self._done = [0.0] * len(weights)
+        self._callback = progress_callback
+        self._scale = scale
+        self._aborted = False
+        self._lock = threading.Lock()
+
+    def abort(self) -> None:
+        """Make every subsequent part callback raise."""
+        self._aborted = True
+
+    def check(self, progress: Optional[float] = 0, message: str = "", **details) -> None:
+        """Progress callback for untracked parts: only checks for abort."""
+        if self._aborted:
+            raise RuntimeError("Aborted")
+
+    def callback(self, index: int) -> Callable:
+        """Get the progress callback for part index."""
+        def report(progress: Optional[float], message: str = "", **details) -> None:
+            self.check()
+            with self._lock:
+                if progress is not None:
+                    self._done[index] = progress / 100 * self._weights[index]
+                overall = sum(self._done) / self._total * self._scale
+                if self._callback:
+                    self._callback(overall, f"Converting... {int(overall)}%")
+        return report
+
+
+def _first_stream(streams: List[Dict[str, Any]], codec_type: str) -> Optional[Dict[str, Any]]:
+    """Get the first stream of a type, ignoring cover art attached as video."""
+    for stream in streams:
+        if stream.get("codec_type") != codec_type:
+            continue
+        if stream.get("disposition", {}).get("attached_pic"):
+            continue
+        return stream
+    return None
+
+
 def convert_video(
     file: str,
     outputPath: str,
     format: str,
+    resources: Optional[Dict[str, Any]] = None,
     _progress_callback: Optional[Callable] = None,
     **kwargs
 ) -> str:
     """
     Convert video to different format.
 
+    Streams whose codec the target container accepts are copied as-is;
+    only incompatible streams are re-encoded. Container-only conversions
+    (e.g. H.264/AAC MKV to MP4) therefore run at disk speed.
+
     Args:
         file: Input video file path
         outputPath: Output video file path
-        format: Target format
+        format: Target format (mp4, mkv, webm, mov, avi, ...)
+        resources: Optional resource profile name or settings (see core.resources)
         _progress_callback: Optional progress callback
 
     Returns:
@@ -208,28 +847,418 @@ def convert_video(
 
     ffmpeg = get_ffmpeg_path()
     duration = get_media_info(file).get("duration", 0)
+    streams = _probe(file).get("streams", [])
+
+    target = (format or os.path.splitext(outputPath)[1].lstrip(".")).lower()
+    format_config = VIDEO_FORMATS.get(target, VIDEO_FORMATS['mp4'])
+
+    cmd = [ffmpeg, "-i", file]
+
+    video = _first_stream(streams, "video")
+    if video:
+        codec = video.get("codec_name")
+        allowed = format_config['video']
+        cmd.extend(["-map", f"0:{video['index']}"])
+        if allowed is None or codec in allowed:
+            cmd.extend(["-c:v", "copy"])
+            # Apple players only accept HEVC in MP4/MOV with the hvc1 tag
+            if codec == "hevc" and format_config['muxer'] in ("mp4", "mov"):
+                cmd.extend(["-tag:v", "hvc1"])
+            logger.info(f"Copying video stream ({codec})")
+        else:
+            cmd.extend(["-c:v", format_config['videoCodec']])
+            logger.info(f"Re-encoding video stream ({codec} -> {format_config['videoCodec']})")
+
+    audio = _first_stream(streams, "audio")
+    if audio:
+        codec = audio.get("codec_name")
+        allowed = format_config['audio']
+        cmd.extend(["-map", f"0:{audio['index']}"])
+        if allowed is None or codec in allowed:
+            cmd.extend(["-c:a", "copy"])
+            logger.info(f"Copying audio stream ({codec})")
+        else:
+            cmd.extend(["-c:a", format_config['audioCodec']])
+            logger.info(f"Re-encoding audio stream ({codec} -> {format_config['audioCodec']})")
+
+    if target in VIDEO_FORMATS:
+        cmd.extend(["-f", format_config['muxer']])
 
+    cmd.extend(["-y", outputPath])
+
+    _run_ffmpeg_with_progress(cmd, duration, _progress_callback, resources)
+
+    logger.info(f"Converted video saved to {outputPath}")
+    return outputPath
+
+
+# Concat: audio codecs MPEG-TS parts can carry; others are re-encoded to AAC
+CONCAT_TS_AUDIO_CODECS = {'aac', 'mp3', 'opus', 'ac3'}
+
+
+def _concat_signature(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Stream parameters that must match for a lossless concat."""
+    streams = data.get("streams", [])
+    signature: Dict[str, Any] = {"video": None, "audio": None}
+
+    video = _first_stream(streams, "video")
+    if video:
+        sar = video.get("sample_aspect_ratio") or "1:1"
+        signature["video"] = {
+            "codec": video.get("codec_name"),
+            "width": video.get("width"),
+            "height": video.get("height"),
+            "pixFmt": video.get("pix_fmt"),
+            "frameRate": video.get("r_frame_rate"),
+            "sar": "1:1" if sar.startswith("0:") else sar,
+            "timeBase": video.get("time_base"),
+        }
+
+    audio = _first_stream(streams, "audio")
+    if audio:
+        signature["audio"] = {
+            "codec": audio.get("codec_name"),
+            "sampleRate": audio.get("sample_rate"),
+            "channels": audio.get("channels"),
+        }
+    return signature
+
+
+def _same_video(a: Optional[Dict[str, Any]], b: Optional[Dict[str, Any]]) -> bool:
+    """Whether a video stream can be copied into MPEG-TS parts of the other's parameters."""
+    if not a or not b:
+        return a == b
+    # MPEG-TS rescales every stream to a 90 kHz clock, so timebases may differ
+    return {k: v for k, v in a.items() if k != "timeBase"} == {k: v for k, v in b.items() if k != "timeBase"}
+
+
+def _concat_video_units(files: List[str], probes: List[Dict[str, Any]]) -> List[Optional[List[bytes]]]:
+    """NAL units at the start of each input's H.264/HEVC video, None for other inputs."""
+    def read(index: int) -> Optional[List[bytes]]:
+        video = _first_stream(probes[index].get("streams", []), "video")
+        if not video or video.get("codec_name") not in SMART_CUT_ENCODERS:
+            return None
+        return _first_video_units(files[index], video["index"], video["codec_name"])
+
+    workers = max(1, min(MAX_PROBE_WORKERS, len(files)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read, range(len(files))))
+
+
+def _encoded_parameter_sets(video_target: Dict[str, Any], video_args: List[str]) -> List[bytes]:
+    """Parameter sets an encode to the target produces, from a single black frame."""
+    rate = video_target["frameRate"] or "30"
     cmd = [
-        ffmpeg,
-        "-i", file,
-        "-c:v", "libx264",
-        "-c:a", "aac",
-        "-y",
-        outputPath
+        get_ffmpeg_path(), "-v", "error",
+        "-f", "lavfi", "-i", f"color=c=black:s={video_target['width']}x{video_target['height']}:r={rate}",
+    ] + video_args + ["-frames:v", "1", "-an", "-f", video_target["codec"], "pipe:1"]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg error: {result.stderr.decode('utf-8', errors='replace')}")
+    return _parameter_sets(_nal_units(result.stdout), video_target["codec"])
+
+
+def _check_concat_container(outputPath: str, video_codec: Optional[str], audio_codec: Optional[str]) -> None:
+    """Raise if the output container can't hold the codecs inputs are normalized to."""
+    extension = os.path.splitext(outputPath)[1].lstrip(".").lower()
+    if extension in VIDEO_FORMATS:
+        allowed = {"video": VIDEO_FORMATS[extension]['video'], "audio": VIDEO_FORMATS[extension]['audio']}
+    elif extension in AUDIO_FORMATS:
+        allowed = {"video": set(), "audio": {AUDIO_FORMATS[extension]['codec']}}
+    else:
+        return
+
+    for kind, codec in (("video", video_codec), ("audio", audio_codec)):
+        if codec and allowed[kind] is not None and codec not in allowed[kind]:
+            raise ValueError(
+                f"The inputs differ and their {kind} has to be re-encoded to {codec}, "
+                f"which .{extension} files can't hold; choose an .mkv or .mp4 output"
+            )
+
+
+def concat_media(
+    files: List[str],
+    outputPath: str,
+    quality: int = 18,
+    preset: str = "veryfast",
+    resources: Optional[Dict[str, Any]] = None,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> str:
+    """
+    Join media files end to end.
+
+    All inputs are probed concurrently. When codec, resolution, pixel
+    format, frame rate, timebase and H.264/HEVC parameter sets match
+    across the board, the files are joined with the concat demuxer by
+    stream copy. Otherwise the most common parameters win: only streams
+    that differ from them are re-encoded (concurrently, matching the
+    copied streams' SPS/PPS), the rest are remuxed as-is into MPEG-TS
+    parts and joined. Raises ValueError when the codec inputs are
+    normalized to doesn't fit the output container.
+
+    Args:
+        files: Input media file paths, in order
+        outputPath: Output media file path
+        quality: CRF for re-encoded video (default: 18)
+        preset: Encoder preset for re-encoded video (default: veryfast)
+        resources: Optional resource profile name or settings (see core.resources)
+        _progress_callback: Optional progress callback
+
+    Returns:
+        Path to the joined media file
+    """
+    logger.info(f"Concatenating {len(files)} files")
+
+    if len(files) < 2:
+        raise ValueError("At least two files are required")
+
+    if _progress_callback:
+        _progress_callback(0, "Analyzing inputs...")
+
+    workers = max(1, min(MAX_PROBE_WORKERS, len(files)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        probes = list(pool.map(_probe, files))
+
+    signatures = [_concat_signature(data) for data in probes]
+    durations = [float(data.get("format", {}).get("duration", 0)) for data in probes]
+    total_duration = sum(durations)
+
+    # The most common parameters are the target; ties go to the earliest file
+    keys = [json.dumps(s, sort_keys=True) for s in signatures]
+    target = signatures[max(range(len(keys)), key=lambda i: (keys.count(keys[i]), -i))]
+
+    # H.264/HEVC parts share the output's single set of SPS/PPS, so those must match too
+    video_units = _concat_video_units(files, probes)
+    target_codec = target["video"]["codec"] if target["video"] else None
+    parameter_sets = [
+        _parameter_sets(u, target_codec) if u is not None and target_codec in PARAMETER_SET_TYPES else None
+        for u in video_units
     ]
 
-    _run_ffmpeg_with_progress(cmd, duration, _progress_callback)
+    if (all(key == json.dumps(target, sort_keys=True) for key in keys)
+            and all(sets == parameter_sets[0] for sets in parameter_sets)):
+        logger.info("All inputs match, joining by stream copy")
+        _concat_files(files, outputPath, target, total_duration, _progress_callback, resources)
+        logger.info(f"Joined media saved to {outputPath}")
+        return outputPath
 
-    logger.info(f"Converted video saved to {outputPath}")
+    _concat_normalized(
+        files, outputPath, probes, signatures, video_units, target, durations,
+        quality, preset, _progress_callback, resources
+    )
+    logger.info(f"Joined media saved to {outputPath}")
     return outputPath
 
 
+def _concat_files(
+    parts: List[str],
+    outputPath: str,
+    target: Dict[str, Any],
+    duration: float,
+    progress_callback: Optional[Callable],
+    resources: Optional[Dict[str, Any]] = None
+) -> None:
+    """Join parts with matching parameters through the concat demuxer, with progress."""
+    work_dir = tempfile.mkdtemp(prefix="ihw-concat-")
+    try:
+        list_path = os.path.join(work_dir, "concat.txt")
+        _write_concat_list(parts, list_path)
+        cmd = [get_ffmpeg_path(), "-f", "concat", "-safe", "0", "-i", list_path]
+        if target["video"]:
+            cmd.extend(["-map", "0:v:0"])
+        if target["audio"]:
+            cmd.extend(["-map", "0:a:0"])
+        cmd.extend(["-c", "copy", "-y", outputPath])
+        _run_ffmpeg_with_progress(cmd, duration, progress_callback, _single_threaded(resources))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _concat_normalized(
+    files: List[str],
+    outputPath: str,
+    probes: List[Dict[str, Any]],
+    signatures: List[Dict[str, Any]],
+    video_units: List[Optional[List[bytes]]],
+    target: Dict[str, Any],
+    durations: List[float],
+    quality: int,
+    preset: str,
+    progress_callback: Optional[Callable],
+    resources: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Bring every input to the target parameters as MPEG-TS parts, then join them.
+
+    The output keeps one set of H.264/HEVC parameter sets, so video is
+    only copied from inputs whose SPS/PPS match the most common ones, and
+    re-encoded parts are encoded to reproduce them (see
+    _matching_encoder_args). If a test encode shows they can't be
+    reproduced, all video is re-encoded.
+    """
+    ffmpeg = get_ffmpeg_path()
+    video_target = dict(target["video"]) if target["video"] else None
+    audio_target = dict(target["audio"]) if target["audio"] else None
+
+    # Parts must be re-encodable to the target and fit in MPEG-TS
+    if video_target and video_target["codec"] not in SMART_CUT_ENCODERS:
+        video_target.update(codec="h264", pixFmt="yuv420p")
+    if audio_target and audio_target["codec"] not in CONCAT_TS_AUDIO_CODECS:
+        audio_target["codec"] = "aac"
+    _check_concat_container(
+        outputPath,
+        video_target["codec"] if video_target and video_target["codec"] != target["video"]["codec"] else None,
+        audio_target["codec"] if audio_target and audio_target["codec"] != target["audio"]["codec"] else None,
+    )
+
+    plans = []
+    for signature in signatures:
+        copy_video = _same_video(signature["video"], video_target)
+        copy_audio = signature["audio"] == audio_target
+        plans.append((copy_video, copy_audio))
+
+    # Copy video only from inputs with the most common parameter sets
+    reference = None
+    copied = [i for i, plan in enumerate(plans) if plan[0]]
+    if copied:
+        sets = {i: _parameter_sets(video_units[i], video_target["codec"]) for i in copied}
+        set_keys = [b"\x00\x00\x01".join(sets[i]) for i in copied]
+        reference = copied[max(range(len(copied)), key=lambda k: (set_keys.count(set_keys[k]), -k))]
+        plans = [
+            (copy_video and sets[i] == sets[reference], copy_audio)
+            for i, (copy_video, copy_audio) in enumerate(plans)
+        ]
+
+    def video_args(sar: str, extra: List[str]) -> List[str]:
+        width, height = video_target["width"], video_target["height"]
+        args = [
+            "-vf",
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,"
+            f"setsar={sar.replace(':', '/')}",
+            "-c:v", SMART_CUT_ENCODERS[video_target["codec"]]["encoder"],
+            "-crf", str(quality),
+            "-preset", preset,
+        ] + extra
+        if video_target["pixFmt"]:
+            args.extend(["-pix_fmt", video_target["pixFmt"]])
+        if video_target["frameRate"]:
+            args.extend(["-r", video_target["frameRate"]])
+        return args
+
+    encode_args = video_args(video_target["sar"], []) if video_target else []
+    if reference is not None and not all(plan[0] for plan in plans):
+        stream = _first_stream(probes[reference].get("streams", []), "video")
+        matching = _matching_encoder_args(stream, video_units[reference])
+        reference_sets = _parameter_sets(video_units[reference], video_target["codec"])
+        # The SPS may or may not carry an aspect ratio when none is reported
+        # (or 0:1 is), so both are tried
+        raw_sar = stream.get("sample_aspect_ratio")
+        sars = [raw_sar] if raw_sar and not raw_sar.startswith("0:") else ["0", video_target["sar"]]
+        candidates = [video_args(sar, matching) for sar in sars] if matching is not None else []
+        matched = next(
+            (args for args in candidates if _encoded_parameter_sets(video_target, args) == reference_sets), None
+        )
+        if matched:
+            encode_args = matched
+        else:
+            logger.info("Re-encoded parts can't match the copied parts' parameter sets, re-encoding all video")
+            plans = [(False, copy_audio) for _, copy_audio in plans]
+
+    encoded = sum(1 for copy_video, copy_audio in plans if not (copy_video and copy_audio))
+    logger.info(f"Concat: re-encoding streams of {encoded}/{len(files)} inputs")
+
+    # Encodes share the job's threads; remuxes are cheap and weigh little
+    total_threads = profile_weight(resolve_profile(resources))
+    workers = max(1, min(len(files), total_threads))
+    part_resources = dict(resolve_profile(resources), threads=max(1, total_threads // workers))
+    weights = [
+        duration if not (copy_video and copy_audio) else duration * 0.05
+        for duration, (copy_video, copy_audio) in zip(durations, plans)
+    ]
+    aggregate = _ProgressAggregator(weights, _sub_progress(progress_callback, 2, 90))
+
+    work_dir = tempfile.mkdtemp(prefix="ihw-concat-")
+
+    def normalize(index: int) -> str:
+        file, signature, duration = files[index], signatures[index], durations[index]
+        copy_video, copy_audio = plans[index]
+        part_path = os.path.join(work_dir, f"part_{index:04d}.ts")
+        cmd = [ffmpeg, "-i", file]
+
+        # Inputs missing a stream the target has get black video or silence
+        if video_target and not signature["video"]:
+            rate = video_target["frameRate"] or "30"
+            cmd.extend(["-f", "lavfi", "-t", f"{duration:.6f}", "-i",
+                        f"color=c=black:s={video_target['width']}x{video_target['height']}:r={rate}"])
+        if audio_target and not signature["audio"]:
+            layout = "mono" if audio_target["channels"] == 1 else "stereo"
+            cmd.extend(["-f", "lavfi", "-t", f"{duration:.6f}", "-i",
+                        f"anullsrc=r={audio_target['sampleRate']}:cl={layout}"])
+        generated = 1
+
+        if video_target:
+            if signature["video"]:
+                cmd.extend(["-map", "0:v:0"])
+            else:
+                cmd.extend(["-map", f"{generated}:v:0"])
+                generated += 1
+            if copy_video:
+                cmd.extend(["-c:v", "copy", "-bsf:v", SMART_CUT_ENCODERS[video_target["codec"]]["bsf"]])
+            else:
+                cmd.extend(encode_args)
+        else:
+            cmd.append("-vn")
+
+        if audio_target:
+            cmd.extend(["-map", "0:a:0" if signature["audio"] else f"{generated}:a:0"])
+            if copy_audio:
+                cmd.extend(["-c:a", "copy"])
+            else:
+                cmd.extend([
+                    "-c:a", SMART_CUT_AUDIO_ENCODERS[audio_target["codec"]],
+                    "-ar", str(audio_target["sampleRate"]),
+                    "-ac", str(audio_target["channels"]),
+                    "-b:a", "192k",
+                ])
+        else:
+            cmd.append("-an")
+
+        cmd.extend(["-sn", "-dn", "-f", "mpegts", "-y", part_path])
+        copied = copy_video and copy_audio
+        _run_ffmpeg_with_progress(
+            cmd, duration, aggregate.callback(index),
+            _single_threaded(resources) if copied else part_resources
+        )
+        return part_path
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(normalize, i) for i in range(len(files))]
+            try:
+                parts = [f.result() for f in futures]
+            except BaseException:
+                aggregate.abort()
+                raise
+
+        if progress_callback:
+            progress_callback(90, "Joining...")
+        _concat_files(
+            parts, outputPath, {"video": video_target, "audio": audio_target},
+            sum(durations), _sub_progress(progress_callback, 90, 100), resources
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
 def convert_audio(
     file: str,
     outputPath: str,
     format: str,
     bitrate: str = "192k",
     sampleRate: Optional[int] = None,
+    resources: Optional[Dict[str, Any]] = None,
     _progress_callback: Optional[Callable] = None,
     **kwargs
 ) -> str:
@@ -242,6 +1271,7 @@ def convert_audio(
         format: Target format (mp3, aac, wav, flac, ogg, opus, etc.)
         bitrate: Target bitrate
         sampleRate: Target sample rate
+        resources: Optional resource profile name or settings (see core.resources)
         _progress_callback: Optional progress callback
 
     Returns:
@@ -272,16 +1302,131 @@ def convert_audio(
 
     cmd.extend(["-y", outputPath])
 
-    _run_ffmpeg_with_progress(cmd, duration, _progress_callback)
+    _run_ffmpeg_with_progress(cmd, duration, _progress_callback, _single_threaded(resources))
 
     logger.info(f"Converted audio saved to {outputPath}")
     return outputPath
 
 
+def _fanout_kind(spec: Dict[str, Any], target: str) -> str:
+    """Whether a fan-out output is "audio" or "video" (explicit type wins)."""
+    kind = spec.get("type")
+    if kind in ("audio", "video"):
+        return kind
+    if kind is not None:
+        raise ValueError(f"Unknown output type: {kind}")
+    return "audio" if target in AUDIO_FORMATS and target not in VIDEO_FORMATS else "video"
+
+
+def fanout_media(
+    file: str,
+    outputs: List[Dict[str, Any]],
+    resources: Optional[Dict[str, Any]] = None,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> List[str]:
+    """
+    Encode one input to several outputs with a single decode.
+
+    The source is decoded once and fed to every output through split and
+    asplit filters, so e.g. MP3 + FLAC or 1080p + 720p cost one decode
+    instead of one per output.
+
+    Args:
+        file: Input media file path
+        outputs: Output specs, each with outputPath plus:
+            format: Target format (default: the output extension)
+            type: "audio" or "video" (default: from the format)
+            bitrate, sampleRate: Audio settings (as in convert_audio)
+            quality, preset, resolution: Video settings (as in compress_video)
+        resources: Optional resource profile name or settings (see core.resources)
+        _progress_callback: Optional progress callback. All outputs are
+            written by one FFmpeg process and advance together, so progress
+            is reported once for the whole fan-out
+
+    Returns:
+        List of output file paths, in spec order
+    """
+    if not outputs:
+        raise ValueError("No outputs given")
+    logger.info(f"Fanning out {file} to {len(outputs)} outputs")
+
+    ffmpeg = get_ffmpeg_path()
+    media_info = get_media_info(file)
+    duration = media_info.get("duration", 0)
+    has_video = "videoCodec" in media_info
+    has_audio = "audioCodec" in media_info
+
+    plans = []
+    for index, spec in enumerate(outputs):
+        path = spec.get("outputPath")
+        if not isinstance(path, str):
+            raise ValueError(f"Output {index} needs an outputPath")
+        target = str(spec.get("format") or os.path.splitext(path)[1].lstrip(".")).lower()
+        kind = _fanout_kind(spec, target)
+        if kind == "video" and not has_video:
+            raise ValueError(f"Output {index} is a video, but the input has no video stream")
+        if kind == "audio" and not has_audio:
+            raise ValueError(f"Output {index} is audio, but the input has no audio stream")
+        plans.append((spec, path, target, kind))
+
+    video_outputs = [i for i, plan in enumerate(plans) if plan[3] == "video"]
+    audio_outputs = [i for i, plan in enumerate(plans) if plan[3] == "audio" or has_audio]
+
+    # One decode per stream, split once per consumer
+    graph = []
+    if video_outputs:
+        labels = "".join(f"[v{i}]" for i in video_outputs)
+        graph.append(f"[0:v:0]split={len(video_outputs)}{labels}")
+        for i in video_outputs:
+            resolution = plans[i][0].get("resolution")
+            if resolution:
+                graph.append(f"[v{i}]scale={resolution}[vs{i}]")
+    if audio_outputs:
+        labels = "".join(f"[a{i}]" for i in audio_outputs)
+        graph.append(f"[0:a:0]asplit={len(audio_outputs)}{labels}")
+
+    # The outputs share the threads the process is charged for
+    threads = max(1, process_budget.clamp(profile_weight(resolve_profile(resources))) // len(plans))
+    cmd = [ffmpeg, "-i", file, "-filter_complex", ";".join(graph)]
+
+    for i, (spec, path, target, kind) in enumerate(plans):
+        if kind == "audio":
+            codec = AUDIO_FORMATS.get(target, {'codec': 'libmp3lame'})['codec']
+            cmd.extend(["-map", f"[a{i}]", "-c:a", codec])
+            if codec not in ('pcm_s16le', 'pcm_s16be', 'flac', 'alac'):
+                cmd.extend(["-b:a", str(spec.get("bitrate") or "192k")])
+            if spec.get("sampleRate"):
+                cmd.extend(["-ar", str(spec["sampleRate"])])
+        else:
+            format_config = VIDEO_FORMATS.get(target, VIDEO_FORMATS['mp4'])
+            video_codec = format_config['videoCodec']
+            cmd.extend(["-map", f"[vs{i}]" if spec.get("resolution") else f"[v{i}]", "-c:v", video_codec])
+            cmd.extend(["-crf", str(spec.get("quality", 23))])
+            if video_codec == "libx264":
+                cmd.extend(["-preset", str(spec.get("preset") or "medium")])
+            elif video_codec == "libvpx-vp9":
+                # Constant quality mode for VP9 needs an explicit zero bitrate
+                cmd.extend(["-b:v", "0"])
+            if has_audio:
+                cmd.extend(["-map", f"[a{i}]", "-c:a", format_config['audioCodec'], "-b:a", "128k"])
+            if target in VIDEO_FORMATS:
+                cmd.extend(["-f", format_config['muxer']])
+        # Per output: FFmpeg applies -threads to the output it precedes
+        cmd.extend(["-threads", str(threads), "-y", path])
+
+    _run_ffmpeg_with_progress(cmd, duration, _progress_callback, resources)
+
+    paths = [plan[1] for plan in plans]
+    logger.info(f"Fan-out finished: {', '.join(paths)}")
+    return paths
+
+
 def extract_audio(
     file: str,
     outputPath: str,
     format: str = "mp3",
+    resources: Optional[Dict[str, Any]] = None,
     _progress_callback: Optional[Callable] = None,
     **kwargs
 ) -> str:
@@ -292,6 +1437,7 @@ def extract_audio(
         file: Input video file path
         outputPath: Output audio file path
         format: Output audio format
+        resources: Optional resource profile name or settings (see core.resources)
         _progress_callback: Optional progress callback
 
     Returns:
@@ -316,28 +1462,191 @@ def extract_audio(
         outputPath
     ]
 
-    _run_ffmpeg_with_progress(cmd, duration, _progress_callback)
+    _run_ffmpeg_with_progress(cmd, duration, _progress_callback, _single_threaded(resources))
 
     logger.info(f"Extracted audio saved to {outputPath}")
     return outputPath
 
 
+# Smart-cut: encoders matching source codecs for the re-encoded GOP fragment
+SMART_CUT_ENCODERS = {
+    'h264': {'encoder': 'libx264', 'bsf': 'h264_mp4toannexb'},
+    'hevc': {'encoder': 'libx265', 'bsf': 'hevc_mp4toannexb'},
+}
+SMART_CUT_AUDIO_ENCODERS = {
+    'aac': 'aac',
+    'mp3': 'libmp3lame',
+    'opus': 'libopus',
+    'vorbis': 'libvorbis',
+    'ac3': 'ac3',
+}
+# How far past the start point to look for the next keyframe
+SMART_CUT_KEYFRAME_WINDOW = 30.0
+
+# Encoder profiles for the profile names FFprobe reports
+ENCODER_PROFILES = {
+    'h264': {
+        'Constrained Baseline': 'baseline', 'Baseline': 'baseline', 'Main': 'main', 'High': 'high',
+        'High 10': 'high10', 'High 4:2:2': 'high422', 'High 4:4:4 Predictive': 'high444',
+    },
+    'hevc': {'Main': 'main', 'Main 10': 'main10', 'Main Still Picture': 'mainstillpicture'},
+}
+# x264 settings (as listed in its version SEI) that shape the SPS and PPS;
+# subme, psy, psy_rd and trellis decide the PPS's chroma QP offset
+X264_HEADER_OPTIONS = (
+    'cabac', 'ref', '8x8dct', 'bframes', 'b_pyramid', 'weightb', 'weightp',
+    'constrained_intra', 'keyint', 'open_gop', 'subme', 'psy', 'psy_rd', 'trellis',
+)
+# NAL unit types of parameter sets: SPS/PPS, and VPS/SPS/PPS
+PARAMETER_SET_TYPES = {'h264': (7, 8), 'hevc': (32, 33, 34)}
+
+
+def _nal_units(data: bytes) -> List[bytes]:
+    """Split an Annex B byte stream into NAL units."""
+    # Emulation prevention keeps start codes out of NAL payloads, and every
+    # unit ends in a nonzero byte, so zeros before a start code are padding
+    return [unit.rstrip(b"\x00") for unit in data.split(b"\x00\x00\x01") if unit.strip(b"\x00")]
+
+
+def _first_video_units(file: str, stream_index: int, codec: str, seek: Optional[float] = None) -> List[bytes]:
+    """
+    Get the NAL units of the first video packet at or after a point.
+
+    The packet is stream-copied to Annex B, so it comes with the parameter
+    sets a decoder would use for it.
+    """
+    cmd = [get_ffmpeg_path(), "-v", "error"]
+    if seek is not None:
+        cmd.extend(["-ss", f"{seek:.6f}"])
+    cmd.extend([
+        "-i", file,
+        "-map", f"0:{stream_index}",
+        "-c:v", "copy",
+        "-bsf:v", SMART_CUT_ENCODERS[codec]["bsf"],
+        "-frames:v", "1",
+        "-f", codec,
+        "pipe:1"
+    ])
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg error: {result.stderr.decode('utf-8', errors='replace')}")
+    return _nal_units(result.stdout)
+
+
+def _parameter_sets(units: List[bytes], codec: str) -> List[bytes]:
+    """The distinct parameter sets among NAL units, in order."""
+    types = PARAMETER_SET_TYPES[codec]
+    sets: List[bytes] = []
+    for unit in units:
+        kind = (unit[0] >> 1) & 0x3f if codec == "hevc" else unit[0] & 0x1f
+        if kind in types and unit not in sets:
+            sets.append(unit)
+    return sets
+
+
+def _x264_options(units: List[bytes]) -> Dict[str, str]:
+    """Encoder settings from the x264 version SEI, empty if the stream has none."""
+    for unit in units:
+        if unit[0] & 0x1f == 6 and b"x264 - core" in unit:
+            text = unit.split(b"options: ", 1)[-1].split(b"\x00", 1)[0].decode("ascii", errors="replace")
+            return dict(item.split("=", 1) for item in text.split() if "=" in item)
+    return {}
+
+
+def _matching_encoder_args(video: Dict[str, Any], units: List[bytes]) -> Optional[List[str]]:
+    """
+    Encoder options that reproduce a stream's parameter sets where possible.
+
+    Sets the source's profile, level and colour properties, plus the x264
+    settings that shape the SPS/PPS when the source was made by x264.
+    Whether the result really matches still has to be checked on the
+    encoded stream.
+
+    Args:
+        video: FFprobe stream entry
+        units: NAL units from the start of the stream (see _first_video_units)
+
+    Returns:
+        Encoder options, or None if the source's profile can't be encoded
+    """
+    codec = video.get("codec_name")
+    profile = ENCODER_PROFILES.get(codec, {}).get(video.get("profile"))
+    level = video.get("level")
+    if not profile or not isinstance(level, int) or level <= 0:
+        return None
+
+    if codec == "h264":
+        args = ["-profile:v", profile, "-level:v", f"{level / 10:.1f}"]
+        options = _x264_options(units)
+        # x264 takes "a,b" for pairs, ":" separates the params
+        params = [f"{name}={options[name].replace(':', ',')}" for name in X264_HEADER_OPTIONS if name in options]
+        # The PPS's initial QP is the CRF/QP in constant quality modes and
+        # 26 with bitrate control, which stitchable forces
+        rate_control = options.get("rc")
+        if rate_control == "crf" and "crf" in options:
+            params.append(f"crf={options['crf']}")
+        elif rate_control == "cqp" and "qp" in options:
+            params.append(f"qp={options['qp']}")
+        elif rate_control:
+            params.append("stitchable=1")
+        if params:
+            args.extend(["-x264-params", ":".join(params)])
+    else:
+        # HEVC levels are reported as 30 times the level number
+        args = ["-profile:v", profile, "-x265-params", f"level-idc={level / 30:.1f}"]
+
+    for option, key in (
+        ("-color_range", "color_range"), ("-color_primaries", "color_primaries"),
+        ("-color_trc", "color_transfer"), ("-colorspace", "color_space"),
+    ):
+        value = video.get(key)
+        if value and value != "unknown":
+            args.extend([option, value])
+    return args
+
+
+def _sub_progress(progress_callback: Optional[Callable], low: float, high: float) -> Optional[Callable]:
+    """
+    Map a step's 0-100 progress into the low-high range of the overall task.
+
+    A progress of None (a status message only) is passed through as is.
+    """
+    if not progress_callback:
+        return None
+
+    def report(progress: Optional[float], message: str = "", **details) -> None:
+        if progress is not None:
+            progress = low + (high - low) * progress / 100
+        progress_callback(progress, message, **details)
+    return report
+
+
 def trim_media(
     file: str,
     outputPath: str,
     startTime: float,
     endTime: float,
+    smartCut: bool = False,
+    resources: Optional[Dict[str, Any]] = None,
     _progress_callback: Optional[Callable] = None,
     **kwargs
 ) -> str:
     """
     Trim video or audio to specific time range.
 
+    Seeking happens on the input side, so FFmpeg jumps straight to the start
+    point instead of decoding everything before it. Plain stream copy snaps
+    the start to the preceding keyframe; with smartCut the fragment up to the
+    next keyframe is re-encoded and the rest is stream-copied, giving a
+    frame-accurate cut at near copy speed.
+
     Args:
         file: Input media file path
         outputPath: Output media file path
         startTime: Start time in seconds
         endTime: End time in seconds
+        smartCut: Frame-accurate start via partial re-encode
+        resources: Optional resource profile name or settings (see core.resources)
         _progress_callback: Optional progress callback
 
     Returns:
@@ -348,22 +1657,238 @@ def trim_media(
     ffmpeg = get_ffmpeg_path()
     duration = endTime - startTime
 
+    if smartCut and _smart_cut(file, outputPath, startTime, endTime, _progress_callback, resources):
+        logger.info(f"Trimmed media saved to {outputPath}")
+        return outputPath
+
     cmd = [
         ffmpeg,
-        "-i", file,
         "-ss", str(startTime),
+        "-i", file,
         "-t", str(duration),
         "-c", "copy",  # Stream copy for speed
+        "-avoid_negative_ts", "make_zero",
         "-y",
         outputPath
     ]
 
-    _run_ffmpeg_with_progress(cmd, duration, _progress_callback)
+    _run_ffmpeg_with_progress(cmd, duration, _progress_callback, _single_threaded(resources))
 
     logger.info(f"Trimmed media saved to {outputPath}")
     return outputPath
 
 
+def _smart_cut(
+    file: str,
+    outputPath: str,
+    start: float,
+    end: float,
+    progress_callback: Optional[Callable],
+    resources: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Frame-accurate trim: re-encode [start, next keyframe), stream-copy the rest.
+
+    The output keeps one set of parameter sets (MP4's avcC/hvcC), so the
+    head is encoded with the source's profile, level and header settings,
+    and the cut is only used when its SPS/PPS come out byte-identical to
+    the ones the copied frames refer to.
+
+    Returns:
+        False if the file isn't suitable (no video, unsupported codec or
+        profile, start already on a keyframe, or parameter sets that can't
+        be matched), in which case the caller falls back to a plain stream
+        copy
+    """
+    streams = _probe(file).get("streams", [])
+    video = _first_stream(streams, "video")
+    if not video or video.get("codec_name") not in SMART_CUT_ENCODERS:
+        logger.info("Smart cut not applicable, using stream copy")
+        return False
+
+    # Relative to the file's start, like the -ss of the head and tail
+    keyframes = _keyframe_times(file, [(start, SMART_CUT_KEYFRAME_WINDOW)], _start_time(file))
+    next_keyframe = next((k for k in keyframes if k >= start - 0.001), None)
+    if next_keyframe is not None and abs(next_keyframe - start) < 0.001:
+        # Already on a keyframe, a plain copy is exact
+        return False
+
+    ffmpeg = get_ffmpeg_path()
+    codec = SMART_CUT_ENCODERS[video["codec_name"]]
+    audio = _first_stream(streams, "audio")
+    if audio and audio.get("codec_name") not in SMART_CUT_AUDIO_ENCODERS:
+        logger.info("Smart cut not applicable to this audio codec, using stream copy")
+        return False
+
+    # Cut point for the re-encoded head; the whole range if no keyframe follows in time
+    split = next_keyframe if next_keyframe is not None and next_keyframe < end else end
+
+    encoder_args: List[str] = []
+    tail_sets: List[bytes] = []
+    if split < end:
+        # The copied tail must decode with the head's parameter sets
+        encoder_args = _matching_encoder_args(video, _first_video_units(file, video["index"], video["codec_name"]))
+        if encoder_args is None:
+            logger.info("Smart cut can't re-encode this profile, using stream copy")
+            return False
+        tail_sets = _parameter_sets(
+            _first_video_units(file, video["index"], video["codec_name"], split + 0.001), video["codec_name"]
+        )
+
+    logger.info(f"Smart cut: re-encoding {start:.3f}-{split:.3f}s, copying {split:.3f}-{end:.3f}s")
+
+    work_dir = tempfile.mkdtemp(prefix="ihw-trim-")
+    try:
+        # MPEG-TS parts carry parameter sets in-band, so they join cleanly
+        head_path = os.path.join(work_dir, "head.ts")
+        cmd = [
+            ffmpeg,
+            "-ss", f"{start:.6f}",
+            "-i", file,
+            "-t", f"{split - start:.6f}",
+            "-map", f"0:{video['index']}",
+            "-c:v", codec["encoder"],
+            "-crf", "16",
+            "-preset", "veryfast",
+        ] + encoder_args
+        if video.get("pix_fmt"):
+            cmd.extend(["-pix_fmt", video["pix_fmt"]])
+        if audio:
+            cmd.extend(["-map", f"0:{audio['index']}", "-c:a", SMART_CUT_AUDIO_ENCODERS[audio["codec_name"]]])
+            if audio.get("bit_rate"):
+                cmd.extend(["-b:a", audio["bit_rate"]])
+        cmd.extend(["-f", "mpegts", "-y", head_path])
+        _run_ffmpeg_with_progress(cmd, split - start, _sub_progress(progress_callback, 0, 60), resources)
+
+        parts = [head_path]
+        if split < end:
+            head_sets = _parameter_sets(_first_video_units(head_path, 0, video["codec_name"]), video["codec_name"])
+            if head_sets != tail_sets:
+                logger.info("Re-encoded head doesn't match the source's parameter sets, using stream copy")
+                return False
+
+            tail_path = os.path.join(work_dir, "tail.ts")
+            cmd = [
+                ffmpeg,
+                # Nudge past the keyframe so seeking lands exactly on it
+                "-ss", f"{split + 0.001:.6f}",
+                "-i", file,
+                "-t", f"{end - split:.6f}",
+                "-map", f"0:{video['index']}",
+            ]
+            if audio:
+                cmd.extend(["-map", f"0:{audio['index']}"])
+            cmd.extend([
+                "-c", "copy",
+                "-bsf:v", codec["bsf"],
+                "-f", "mpegts",
+                "-y", tail_path
+            ])
+            _run_ffmpeg_with_progress(cmd, end - split, _sub_progress(progress_callback, 60, 95), resources)
+            parts.append(tail_path)
+
+        _concat_copy(parts, outputPath)
+
+        if progress_callback:
+            progress_callback(100, "Done")
+        return True
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# Dithering modes accepted by FFmpeg's paletteuse filter
+GIF_DITHER_MODES = {
+    'bayer', 'heckbert', 'floyd_steinberg', 'sierra2', 'sierra2_4a',
+    'sierra3', 'burkes', 'atkinson', 'none',
+}
+
+# The palette is built from a small, sparse sample of the clip. Its colors
+# don't depend on the final fps or width, so one palette serves every
+# variant of the same clip.
+PALETTE_SAMPLE_FPS = 5
+PALETTE_SAMPLE_WIDTH = 320
+MAX_CACHED_PALETTES = 256
+
+
+def _palette_cache_path(file: str, startTime: Optional[float], duration: Optional[float]) -> str:
+    """Get the cached palette path for a clip of a file."""
+    st = os.stat(file)
+    identity = json.dumps([
+        os.path.abspath(file), st.st_size, st.st_mtime_ns,
+        startTime, duration, PALETTE_SAMPLE_FPS, PALETTE_SAMPLE_WIDTH,
+    ])
+    digest = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+    return os.path.join(get_cache_root(), "palettes", f"{digest}.png")
+
+
+def _prune_palette_cache(palette_dir: str) -> None:
+    """Keep only the most recently used palettes."""
+    try:
+        entries = [
+            os.path.join(palette_dir, name)
+            for name in os.listdir(palette_dir)
+            if name.endswith(".png")
+        ]
+        if len(entries) <= MAX_CACHED_PALETTES:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - MAX_CACHED_PALETTES]:
+            os.remove(path)
+    except OSError as e:
+        logger.debug(f"Failed to prune palette cache: {e}")
+
+
+def _seek_args(startTime: Optional[float], duration: Optional[float]) -> List[str]:
+    """Input-side seek arguments for a clip."""
+    args = []
+    if startTime is not None:
+        args.extend(["-ss", str(startTime)])
+    if duration is not None:
+        args.extend(["-t", str(duration)])
+    return args
+
+
+def _gif_palette(
+    file: str,
+    startTime: Optional[float],
+    duration: Optional[float],
+    clip_duration: float,
+    progress_callback: Optional[Callable],
+    resources: Optional[Dict[str, Any]] = None
+) -> str:
+    """Get the palette for a clip, generating and caching it if needed."""
+    palette_path = _palette_cache_path(file, startTime, duration)
+
+    if os.path.isfile(palette_path):
+        logger.debug(f"Reusing cached GIF palette {palette_path}")
+        os.utime(palette_path)
+        return palette_path
+
+    palette_dir = os.path.dirname(palette_path)
+    os.makedirs(palette_dir, exist_ok=True)
+    tmp_path = f"{palette_path[:-4]}.tmp{threading.get_ident()}.png"
+
+    cmd = [get_ffmpeg_path(), *_seek_args(startTime, duration), "-i", file]
+    cmd.extend([
+        "-vf",
+        f"fps={PALETTE_SAMPLE_FPS},scale={PALETTE_SAMPLE_WIDTH}:-2:flags=fast_bilinear,"
+        "palettegen=stats_mode=diff",
+        "-an", "-y",
+        tmp_path
+    ])
+
+    try:
+        _run_ffmpeg_with_progress(cmd, clip_duration, progress_callback, resources)
+        os.replace(tmp_path, palette_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _prune_palette_cache(palette_dir)
+    return palette_path
+
+
 def video_to_gif(
     file: str,
     outputPath: str,
@@ -371,12 +1896,22 @@ def video_to_gif(
     width: int = 480,
     startTime: Optional[float] = None,
     duration: Optional[float] = None,
+    dither: str = "sierra2_4a",
+    dedupe: bool = False,
+    resources: Optional[Dict[str, Any]] = None,
     _progress_callback: Optional[Callable] = None,
     **kwargs
 ) -> str:
     """
     Convert video to GIF.
 
+    Runs in two stages: a quick, downscaled pass builds the color palette,
+    then the GIF is encoded against it in a single streaming pass. Palettes
+    are cached per clip, so changing fps, width or dither on the same clip
+    skips the first stage. With dedupe, mpdecimate drops frames that look
+    the same as the previous one and the GIF is written with variable
+    frame delays, so still stretches of screen recordings cost one frame.
+
     Args:
         file: Input video file path
         outputPath: Output GIF file path
@@ -384,6 +1919,9 @@ def video_to_gif(
         width: Width in pixels, height auto-scaled (default: 480)
         startTime: Start time in seconds (optional)
         duration: Duration in seconds (optional)
+        dither: Dithering mode for paletteuse (default: sierra2_4a)
+        dedupe: Merge near-duplicate frames (default: False)
+        resources: Optional resource profile name or settings (see core.resources)
         _progress_callback: Optional progress callback
 
     Returns:
@@ -391,75 +1929,485 @@ def video_to_gif(
     """
     logger.info(f"Converting video to GIF: {file}")
 
+    if dither not in GIF_DITHER_MODES:
+        raise ValueError(f"Unsupported dither mode: {dither}")
+
     # Send initial progress
     if _progress_callback:
         _progress_callback(0, "Preparing...")
 
-    ffmpeg = get_ffmpeg_path()
     media_info = get_media_info(file)
     total_duration = media_info.get("duration", 0)
 
-    # Build filter for palette generation and GIF creation
-    # This creates high-quality GIFs with proper color palette
-    filters = f"fps={fps},scale={width}:-1:flags=lanczos,split[s0][s1];[s0]palettegen[p];[s1][p]paletteuse"
-
-    cmd = [ffmpeg, "-i", file]
-
-    # Add start time if specified
-    if startTime is not None:
-        cmd.extend(["-ss", str(startTime)])
-
-    # Add duration if specified
     if duration is not None:
-        cmd.extend(["-t", str(duration)])
         total_duration = duration
     elif startTime is not None:
         total_duration = total_duration - startTime
 
+    palette_path = _gif_palette(
+        file, startTime, duration, total_duration,
+        _sub_progress(_progress_callback, 0, 20), resources
+    )
+
+    # Seek on the input so FFmpeg doesn't decode everything before the clip
+    cmd = [get_ffmpeg_path()]
+    scale = f"scale={width}:-1:flags=lanczos[x];[x][1:v]paletteuse=dither={dither}"
+    tail = (startTime or 0) + total_duration - 1 / fps
+    if dedupe and tail > (startTime or 0):
+        # Decimate before scaling so dropped frames are never scaled or
+        # dithered. A frame's delay runs until the next kept frame, so the
+        # final frame is always kept: it's decoded from a separate seek and
+        # interleaved at its own timestamp (-copyts keeps both inputs on
+        # the file's clock), which keeps a trailing still stretch at its
+        # full length without buffering the decimated stream. settb stops
+        # interleave from mixing timebases in the frame durations.
+        cmd.extend(["-copyts", "-start_at_zero"])
+        cmd.extend([*_seek_args(startTime, duration), "-i", file, "-i", palette_path])
+        cmd.extend(["-ss", f"{tail:.6f}", "-i", file])
+        graph = (
+            f"[0:v]fps={fps},select='lt(t\\,{tail:.6f})',mpdecimate,settb=AVTB[kept];"
+            f"[2:v]fps={fps},trim=end_frame=1,settb=AVTB[end];"
+            f"[kept][end]interleave,{scale}"
+        )
+        # Keep the timestamps of the frames that are left as their delays
+        cmd.extend(["-lavfi", graph, "-fps_mode", "vfr"])
+        if startTime:
+            # Report progress relative to the clip
+            cmd.extend(["-output_ts_offset", f"{-startTime:.6f}"])
+    else:
+        cmd.extend([*_seek_args(startTime, duration), "-i", file, "-i", palette_path])
+        cmd.extend(["-lavfi", f"fps={fps},{scale}"])
     cmd.extend([
-        "-vf", filters,
         "-loop", "0",  # Loop forever
         "-y",
         outputPath
     ])
 
-    _run_ffmpeg_with_progress(cmd, total_duration, _progress_callback)
+    _run_ffmpeg_with_progress(cmd, total_duration, _sub_progress(_progress_callback, 20, 100), resources)
 
     logger.info(f"GIF saved to {outputPath}")
     return outputPath
 
 
+# Thumbnails are cached per file and settings, as a directory of frames
+# plus the sprite sheet and a manifest
+MAX_CACHED_THUMBNAIL_SETS = 64
+MAX_THUMBNAIL_WORKERS = 8
+
+
+def _thumbnail_cache_dir(file: str, count: int, width: int, columns: int, format: str) -> str:
+    """Get the cache directory for a file's thumbnail set."""
+    st = os.stat(file)
+    identity = json.dumps([os.path.abspath(file), st.st_size, st.st_mtime_ns, count, width, columns, format])
+    digest = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+    return os.path.join(get_cache_root(), "thumbnails", digest)
+
+
+def _prune_thumbnail_cache(root: str) -> None:
+    """Keep only the most recently used thumbnail sets."""
+    try:
+        entries = [
+            os.path.join(root, name)
+            for name in os.listdir(root)
+            if ".tmp" not in name
+        ]
+        if len(entries) <= MAX_CACHED_THUMBNAIL_SETS:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - MAX_CACHED_THUMBNAIL_SETS]:
+            shutil.rmtree(path, ignore_errors=True)
+    except OSError as e:
+        logger.debug(f"Failed to prune thumbnail cache: {e}")
+
+
+def _display_size(stream: Dict[str, Any]) -> Tuple[float, float]:
+    """Size a video stream is shown at, after its sample aspect ratio and rotation."""
+    width = float(stream.get("width") or 0)
+    height = float(stream.get("height") or 0)
+    try:
+        num, den = (int(x) for x in (stream.get("sample_aspect_ratio") or "1:1").split(":"))
+    except ValueError:
+        num = den = 1
+    if num > 0 and den > 0:
+        width = width * num / den
+
+    rotation = stream.get("tags", {}).get("rotate")
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            rotation = side_data["rotation"]
+    try:
+        quarter_turns = int(round(float(rotation or 0) / 90))
+    except ValueError:
+        quarter_turns = 0
+    # FFmpeg applies the rotation when decoding, so frames come out turned
+    if quarter_turns % 2:
+        width, height = height, width
+    return width, height
+
+
+def get_thumbnails(
+    file: str,
+    count: int = 10,
+    width: int = 160,
+    columns: Optional[int] = None,
+    format: str = "jpg",
+    outputPath: Optional[str] = None,
+    outputDir: Optional[str] = None,
+    resources: Optional[Dict[str, Any]] = None,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Extract evenly spaced thumbnails and tile them into a sprite sheet.
+
+    Each frame is a separate input-side seek (-ss before -i) that decodes
+    only keyframes (-skip_frame nokey) and takes the first one, so the
+    cost doesn't grow with the file's length. The seeks run concurrently
+    on single-threaded FFmpeg processes. Results are cached per file and
+    settings.
+
+    Args:
+        file: Input video file path
+        count: Number of thumbnails
+        width: Thumbnail width in pixels (height keeps the displayed aspect
+            ratio, after rotation and sample aspect ratio)
+        columns: Thumbnails per sprite row (default: all in one row)
+        format: Image format (jpg or png)
+        outputPath: Optional path to copy the sprite sheet to
+        outputDir: Optional directory to copy the frames to
+        resources: Optional resource profile name or settings (see core.resources)
+        _progress_callback: Optional progress callback
+
+    Returns:
+        Dictionary with frames (paths), times, sprite (path), columns, rows,
+        tileWidth and tileHeight. Without outputPath/outputDir the sprite and
+        frame paths point into the thumbnail cache and are temporary: the
+        cache is pruned as newer sets are added.
+    """
+    count = max(1, int(count))
+    columns = max(1, min(int(columns or count), count))
+    format = format.lower().replace("jpeg", "jpg")
+    if format not in ("jpg", "png"):
+        raise ValueError(f"Unsupported thumbnail format: {format}")
+
+    cache_dir = _thumbnail_cache_dir(file, count, width, columns, format)
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+
+    result = None
+    if os.path.isfile(manifest_path):
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            if all(os.path.isfile(p) for p in result["frames"] + [result["sprite"]]):
+                logger.debug(f"Reusing cached thumbnails {cache_dir}")
+                os.utime(cache_dir)
+            else:
+                result = None
+        except (OSError, ValueError, KeyError):
+            result = None
+
+    if result is None:
+        result = _extract_thumbnails(file, cache_dir, count, width, columns, format, resources, _progress_callback)
+
+    if outputPath:
+        shutil.copyfile(result["sprite"], outputPath)
+        result = dict(result, sprite=outputPath)
+
+    if outputDir:
+        os.makedirs(outputDir, exist_ok=True)
+        frames = []
+        for path in result["frames"]:
+            frames.append(os.path.join(outputDir, os.path.basename(path)))
+            shutil.copyfile(path, frames[-1])
+        result = dict(result, frames=frames)
+
+    if _progress_callback:
+        _progress_callback(100, "Thumbnails ready")
+    return result
+
+
+def _extract_thumbnails(
+    file: str,
+    cache_dir: str,
+    count: int,
+    width: int,
+    columns: int,
+    format: str,
+    resources: Optional[Dict[str, Any]],
+    progress_callback: Optional[Callable]
+) -> Dict[str, Any]:
+    """Extract a thumbnail set into cache_dir and write its manifest."""
+    logger.info(f"Extracting {count} thumbnails: {file}")
+
+    ffmpeg = get_ffmpeg_path()
+    media_info = get_media_info(file)
+    duration = media_info.get("duration", 0)
+    if "videoCodec" not in media_info:
+        raise ValueError("Input has no video stream")
+
+    src_width, src_height = _display_size(_first_stream(_probe(file).get("streams", []), "video"))
+    src_width = src_width or width
+    src_height = src_height or width
+    tile_height = max(2, int(round(width * src_height / src_width / 2)) * 2)
+    times = [round(duration * (i + 0.5) / count, 3) for i in range(count)]
+    quality = ["-q:v", "4"] if format == "jpg" else []
+
+    root = os.path.dirname(cache_dir)
+    tmp_dir = f"{cache_dir}.tmp{threading.get_ident()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    frame_resources = _single_threaded(resources)
+    done = [0]
+    lock = threading.Lock()
+
+    def extract(index: int) -> None:
+        cmd = [
+            ffmpeg,
+            "-skip_frame", "nokey",
+            "-noaccurate_seek",
+            "-ss", str(times[index]),
+            "-i", file,
+            "-map", "0:v:0",
+            "-frames:v", "1",
+            # Square pixels, so tiles line up in the sprite at their display shape
+            "-vf", f"scale={width}:{tile_height},setsar=1",
+            *quality,
+            "-an", "-y",
+            os.path.join(tmp_dir, f"frame_{index:04d}.{format}")
+        ]
+        _run_ffmpeg_with_progress(cmd, 0, None, frame_resources)
+        with lock:
+            done[0] += 1
+            if progress_callback:
+                progress_callback(done[0] / count * 90, f"Extracted {done[0]}/{count} thumbnails")
+
+    try:
+        workers = max(1, min(count, cpu_count(), MAX_THUMBNAIL_WORKERS))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(extract, i) for i in range(count)]:
+                future.result()
+
+        # A seek past the last keyframe can come back empty; reuse the previous frame
+        frames = [os.path.join(tmp_dir, f"frame_{i:04d}.{format}") for i in range(count)]
+        for i, path in enumerate(frames):
+            if not os.path.isfile(path):
+                if i == 0:
+                    raise RuntimeError("Could not extract the first thumbnail")
+                shutil.copyfile(frames[i - 1], path)
+
+        rows = (count + columns - 1) // columns
+        sprite_name = f"sprite.{format}"
+        cmd = [
+            ffmpeg,
+            "-i", os.path.join(tmp_dir, f"frame_%04d.{format}"),
+            "-vf", f"tile={columns}x{rows}",
+            "-frames:v", "1",
+            *quality,
+            "-y",
+            os.path.join(tmp_dir, sprite_name)
+        ]
+        _run_ffmpeg_with_progress(cmd, 0, None, frame_resources)
+
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, cache_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    result = {
+        "frames": [os.path.join(cache_dir, os.path.basename(p)) for p in frames],
+        "times": times,
+        "sprite": os.path.join(cache_dir, sprite_name),
+        "columns": columns,
+        "rows": rows,
+        "tileWidth": width,
+        "tileHeight": tile_height,
+    }
+    with open(os.path.join(cache_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+    _prune_thumbnail_cache(root)
+    return result
+
+
+def _parse_progress_value(value: str) -> Optional[float]:
+    """Parse a numeric -progress value such as "1.5x" or "1024.0kbits/s"."""
+    match = re.match(r"\s*([-+]?\d+(?:\.\d+)?)", value)
+    return float(match.group(1)) if match else None
+
+
+def _progress_details(block: Dict[str, str], duration: float) -> Dict[str, Any]:
+    """Build progress details from one -progress key=value block."""
+    details: Dict[str, Any] = {}
+
+    out_time_us = block.get("out_time_us") or block.get("out_time_ms")  # both are microseconds
+    out_time = _parse_progress_value(out_time_us) if out_time_us else None
+    if out_time is not None and out_time >= 0:
+        details["outTime"] = out_time / 1_000_000
+
+    fps = _parse_progress_value(block.get("fps", ""))
+    if fps is not None:
+        details["fps"] = fps
+
+    speed = _parse_progress_value(block.get("speed", ""))
+    if speed is not None:
+        details["speed"] = speed
+
+    bitrate = _parse_progress_value(block.get("bitrate", ""))
+    if bitrate is not None:
+        details["bitrate"] = bitrate  # kbit/s
+
+    if speed and "outTime" in details and duration > 0:
+        details["eta"] = max(duration - details["outTime"], 0) / speed
+
+    return details
+
+
+def _single_threaded(resources: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Profile for audio and stream-copy work, which FFmpeg runs on one thread."""
+    return dict({"threads": 1}, **resolve_profile(resources))
+
+
+def _resource_args(profile: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Build FFmpeg options for a job's resource profile.
+
+    The encoder and filter threads are capped at the budget units the
+    process is charged (see profile_weight), so a profile without an
+    explicit thread count doesn't let FFmpeg spawn a thread per core.
+
+    Returns:
+        (global options, output options)
+    """
+    threads = process_budget.clamp(profile_weight(profile))
+    filter_threads = str(int(profile.get("filterThreads") or threads))
+    global_args = ["-filter_threads", filter_threads, "-filter_complex_threads", filter_threads]
+    output_args = ["-threads", str(threads)]
+    return global_args, output_args
+
+
 def _run_ffmpeg_with_progress(
     cmd: list,
     duration: float,
-    progress_callback: Optional[Callable]
+    progress_callback: Optional[Callable],
+    resources: Optional[Dict[str, Any]] = None
 ) -> None:
-    """Run FFmpeg command with progress monitoring."""
-    process = subprocess.Popen(
-        cmd,
-        stderr=subprocess.PIPE,
-        universal_newlines=True
+    """
+    Run FFmpeg command with progress monitoring.
+
+    Progress is read from FFmpeg's machine-readable -progress stream on stdout
+    (so commands must not write their output to pipe:1). Stderr is drained on
+    a separate thread so a chatty encoder can't block on a full pipe.
+
+    The command's last argument must be the output; resource options are
+    inserted right before it (commands with several outputs set their own
+    per-output -threads, which is kept). The process waits for its share of the global
+    thread budget before it starts, so concurrent jobs don't oversubscribe
+    the CPU.
+    """
+    profile = resolve_profile(resources)
+    global_args, output_args = _resource_args(profile)
+    if "-threads" in cmd:
+        output_args = []
+    cmd = (
+        [cmd[0], "-hide_banner", "-nostdin", "-nostats", "-progress", "pipe:1"]
+        + global_args
+        + list(cmd[1:-1])
+        + output_args
+        + [cmd[-1]]
+    )
+    _run_ffmpeg(
+        cmd, profile, progress_callback,
+        lambda stdout: _read_progress(stdout, duration, progress_callback)
     )
 
-    # Match time format: time=00:00:01.23 or time=00:00:01
-    time_pattern = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?")
 
-    for line in process.stderr:
-        if progress_callback and duration > 0:
-            match = time_pattern.search(line)
-            if match:
-                h, m, s = int(match.group(1)), int(match.group(2)), int(match.group(3))
-                # Handle milliseconds if present
-                ms = int(match.group(4)) if match.group(4) else 0
-                # Normalize milliseconds (could be 1-3 digits)
-                if ms > 0:
-                    ms_str = match.group(4)
-                    ms = ms / (10 ** len(ms_str))
-                current_time = h * 3600 + m * 60 + s + ms
-                progress = min(current_time / duration * 100, 100)
-                progress_callback(progress, f"Converting... {int(progress)}%")
-
-    process.wait()
+def _run_ffmpeg(
+    cmd: list,
+    profile: Dict[str, Any],
+    progress_callback: Optional[Callable],
+    consume: Callable[[IO[bytes]], None]
+) -> None:
+    """
+    Launch FFmpeg under a resource profile and hand its stdout to consume.
+
+    Waits for the process's share of the global thread budget first.
+    Stderr is drained on a separate thread, and its tail is kept for the
+    error message. If consume raises (e.g. a cancelled progress callback),
+    FFmpeg is killed rather than left running.
+
+    Raises:
+        RuntimeError: FFmpeg exited with an error
+    """
+    cmd, popen_kwargs = process_launch(cmd, profile)
+
+    weight = profile_weight(profile)
+    if progress_callback:
+        # Poll so a cancelled task doesn't stay queued behind the budget;
+        # no progress value, so a later step doesn't move the bar back
+        while not process_budget.acquire(weight, timeout=0.5):
+            progress_callback(None, "Waiting for CPU...")
+    else:
+        process_budget.acquire(weight)
+
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **popen_kwargs
+        )
+
+        # Keep the tail of stderr for error reporting
+        stderr_tail: deque = deque(maxlen=20)
+
+        def drain_stderr() -> None:
+            for raw in process.stderr:
+                stderr_tail.append(raw.decode("utf-8", errors="replace").rstrip())
+
+        stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+        stderr_thread.start()
+
+        try:
+            consume(process.stdout)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+
+        process.wait()
+        stderr_thread.join(timeout=5)
+    finally:
+        process_budget.release(weight)
 
     if process.returncode != 0:
-        raise RuntimeError(f"FFmpeg error (code {process.returncode})")
+        message = f"FFmpeg error (code {process.returncode})"
+        detail = "\n".join(line for line in stderr_tail if line)
+        raise RuntimeError(f"{message}: {detail}" if detail else message)
+
+
+def _read_progress(stdout: IO[bytes], duration: float, progress_callback: Optional[Callable]) -> None:
+    """Parse FFmpeg's -progress stream and report it."""
+    block: Dict[str, str] = {}
+    for raw in stdout:
+        line = raw.decode("utf-8", errors="replace").strip()
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        if key != "progress":
+            block[key] = value
+            continue
+
+        # "progress=continue|end" terminates each block
+        if progress_callback and duration > 0:
+            details = _progress_details(block, duration)
+            if value == "end":
+                progress = 100.0
+            else:
+                progress = min(details.get("outTime", 0) / duration * 100, 100)
+            message = f"Converting... {int(progress)}%"
+            if details.get("speed"):
+                message += f" ({details['speed']:.2g}x)"
+            progress_callback(progress, message, **details)
+        block = {}
@@ -0,0 +1,256 @@
+"""
+Audio waveform peaks for the trim UI.
+
+Audio is decoded once to mono 16-bit PCM through an FFmpeg pipe and
+reduced to min/max peaks as it streams in. Coarser zoom levels are
+derived from the finest one, and all levels are cached together per file
+(path, size, mtime) as an uncompressed .npz, so a long recording is
+decoded once and every later zoom or scroll reads one array from disk.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from core.cache import get_cache_root
+from .ffmpeg_wrapper import get_ffmpeg_path, get_media_info, _run_ffmpeg, _single_threaded
+
+# Decoding at a low rate is plenty for display and keeps the pipe small
+WAVEFORM_SAMPLE_RATE = 8000
+# Finest level: 100 peaks per second
+BASE_SAMPLES_PER_PEAK = 80
+# Each level has LEVEL_FACTOR times fewer peaks than the one before,
+# until the whole file fits in MIN_LEVEL_PEAKS peaks
+LEVEL_FACTOR = 4
+MIN_LEVEL_PEAKS = 500
+MAX_CACHED_WAVEFORMS = 128
+
+DEFAULT_MAX_PEAKS = 2000
+
+# Peaks reduced per read from the pipe
+_CHUNK_PEAKS = 4096
+
+
+def _waveform_cache_path(file: str) -> str:
+    """Get the cached waveform path for a file."""
+    st = os.stat(file)
+    identity = json.dumps([
+        os.path.abspath(file), st.st_size, st.st_mtime_ns,
+        WAVEFORM_SAMPLE_RATE, BASE_SAMPLES_PER_PEAK, LEVEL_FACTOR,
+    ])
+    digest = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+    return os.path.join(get_cache_root(), "waveforms", f"{digest}.npz")
+
+
+def _prune_waveform_cache(waveform_dir: str) -> None:
+    """Keep only the most recently used waveforms."""
+    try:
+        entries = [
+            os.path.join(waveform_dir, name)
+            for name in os.listdir(waveform_dir)
+            if name.endswith(".npz") and ".tmp" not in name
+        ]
+        if len(entries) <= MAX_CACHED_WAVEFORMS:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - MAX_CACHED_WAVEFORMS]:
+            os.remove(path)
+    except OSError as e:
+        logger.debug(f"Failed to prune waveform cache: {e}")
+
+
+def _reduce(samples: np.ndarray) -> np.ndarray:
+    """Min/max of each BASE_SAMPLES_PER_PEAK block; the last block may be short."""
+    starts = np.arange(0, len(samples), BASE_SAMPLES_PER_PEAK)
+    return np.stack([np.minimum.reduceat(samples, starts), np.maximum.reduceat(samples, starts)], axis=1)
+
+
+def _coarser(peaks: np.ndarray) -> np.ndarray:
+    """Merge every LEVEL_FACTOR peaks into one."""
+    starts = np.arange(0, len(peaks), LEVEL_FACTOR)
+    return np.stack([np.minimum.reduceat(peaks[:, 0], starts), np.maximum.reduceat(peaks[:, 1], starts)], axis=1)
+
+
+def _decode_peaks(
+    file: str,
+    duration: float,
+    resources: Optional[Dict[str, Any]],
+    progress_callback: Optional[Callable]
+) -> Tuple[np.ndarray, int]:
+    """
+    Decode a file's first audio stream and reduce it to base-level peaks.
+
+    Returns:
+        (int16 array of shape (peaks, 2) holding (min, max) pairs,
+        number of decoded samples)
+    """
+    cmd = [
+        get_ffmpeg_path(), "-hide_banner", "-nostdin", "-v", "error",
+        "-i", file,
+        "-map", "0:a:0",
+        "-ac", "1",
+        "-ar", str(WAVEFORM_SAMPLE_RATE),
+        "-f", "s16le",
+        "-threads", "1",
+        "pipe:1"
+    ]
+    expected = max(1.0, duration * WAVEFORM_SAMPLE_RATE)
+    chunk_bytes = _CHUNK_PEAKS * BASE_SAMPLES_PER_PEAK * 2
+    chunks: List[np.ndarray] = []
+    decoded = 0
+
+    def consume(stdout: IO[bytes]) -> None:
+        nonlocal decoded
+        while True:
+            # Full reads are whole blocks; only the final read can end mid-block
+            data = stdout.read(chunk_bytes)
+            if not data:
+                break
+            samples = np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2")
+            if len(samples):
+                chunks.append(_reduce(samples))
+            decoded += len(samples)
+            if progress_callback:
+                progress = min(decoded / expected * 95, 95)
+                progress_callback(progress, f"Reading audio... {int(progress)}%")
+
+    _run_ffmpeg(cmd, _single_threaded(resources), progress_callback, consume)
+    if not chunks:
+        return np.zeros((1, 2), dtype=np.int16), 0
+    return np.concatenate(chunks).astype(np.int16, copy=False), decoded
+
+
+def _build_waveform(
+    file: str,
+    cache_path: str,
+    resources: Optional[Dict[str, Any]],
+    progress_callback: Optional[Callable]
+) -> None:
+    """Decode a file into all zoom levels and write them to cache_path."""
+    logger.info(f"Building waveform: {file}")
+
+    media_info = get_media_info(file)
+    if "audioCodec" not in media_info:
+        raise ValueError("Input has no audio stream")
+
+    peaks, sample_count = _decode_peaks(file, media_info.get("duration", 0), resources, progress_callback)
+    levels = [peaks]
+    while len(levels[-1]) > MIN_LEVEL_PEAKS:
+        levels.append(_coarser(levels[-1]))
+
+    waveform_dir = os.path.dirname(cache_path)
+    os.makedirs(waveform_dir, exist_ok=True)
+    tmp_path = f"{cache_path[:-4]}.tmp{threading.get_ident()}.npz"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                sampleCount=np.int64(sample_count),
+                **{f"level{i}": peaks for i, peaks in enumerate(levels)}
+            )
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _prune_waveform_cache(waveform_dir)
+
+
+def get_waveform(
+    file: str,
+    startTime: Optional[float] = None,
+    endTime: Optional[float] = None,
+    maxPeaks: int = DEFAULT_MAX_PEAKS,
+    level: Optional[int] = None,
+    resources: Optional[Dict[str, Any]] = None,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Get waveform peaks for a time range of a file's audio.
+
+    The first call decodes the audio and caches every zoom level; later
+    calls for any range or zoom only read the cache.
+
+    Args:
+        file: Input audio or video file path
+        startTime: Start of the range in seconds (default: 0)
+        endTime: End of the range in seconds (default: end of file)
+        maxPeaks: Upper bound on returned peaks; picks the finest level
+            that fits the range, or the coarsest one (default: 2000)
+        level: Explicit zoom level (0 is finest), overrides maxPeaks
+        resources: Optional resource profile name or settings (see core.resources)
+        _progress_callback: Optional progress callback
+
+    Returns:
+        Dictionary with min and max (peak values in -1..1), the level used,
+        its peaksPerSecond, the returned startTime/endTime, the file
+        duration and a description of all levels
+    """
+    cache_path = _waveform_cache_path(file)
+
+    try:
+        os.utime(cache_path)
+        logger.debug(f"Reusing cached waveform {cache_path}")
+        data = np.load(cache_path)
+    except FileNotFoundError:
+        # Not cached yet, or pruned by a concurrent build in between
+        _build_waveform(file, cache_path, resources, _progress_callback)
+        data = np.load(cache_path)
+
+    with data:
+        names = sorted((n for n in data.files if n.startswith("level")), key=lambda n: int(n[5:]))
+        sample_count = int(data["sampleCount"])
+        duration = sample_count / WAVEFORM_SAMPLE_RATE
+
+        start = max(0.0, float(startTime or 0))
+        end = min(duration, float(endTime)) if endTime is not None else duration
+        if end < start:
+            raise ValueError("endTime must not be before startTime")
+
+        levels = []
+        for index in range(len(names)):
+            samples_per_peak = BASE_SAMPLES_PER_PEAK * LEVEL_FACTOR ** index
+            levels.append({
+                "level": index,
+                "samplesPerPeak": samples_per_peak,
+                "peaksPerSecond": WAVEFORM_SAMPLE_RATE / samples_per_peak,
+            })
+
+        if level is None:
+            maxPeaks = max(1, int(maxPeaks))
+            span = end - start
+            level = next(
+                (e["level"] for e in levels if span * e["peaksPerSecond"] <= maxPeaks),
+                len(levels) - 1
+            )
+        elif not 0 <= int(level) < len(levels):
+            raise ValueError(f"Waveform level out of range: {level}")
+        level = int(level)
+
+        # Only the chosen level is read from the archive
+        peaks = data[names[level]]
+
+    rate = levels[level]["peaksPerSecond"]
+    first = min(int(start * rate), len(peaks))
+    last = max(first, min(int(np.ceil(end * rate)), len(peaks)))
+    selected = peaks[first:last].astype(np.float64) / 32768.0
+
+    if _progress_callback:
+        _progress_callback(100, "Waveform ready")
+
+    return {
+        "duration": round(duration, 3),
+        "level": level,
+        "peaksPerSecond": rate,
+        "startTime": round(first / rate, 3),
+        "endTime": round(last / rate, 3),
+        "min": np.round(selected[:, 0], 4).tolist(),
+        "max": np.round(selected[:, 1], 4).tolist(),
+        "levels": [dict(e, count=int(np.ceil(sample_count / e["samplesPerPeak"]))) for e in levels],
+    }
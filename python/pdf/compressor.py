@@ -2,10 +2,20 @@
 PDF Compression functionality using PyMuPDF
 """
 
+import os
 import fitz  # PyMuPDF
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, Optional
 from loguru import logger
 
+# doc.save options used for compressed output
+SAVE_OPTIONS = dict(
+    garbage=4,
+    deflate=True,
+    deflate_images=True,
+    deflate_fonts=True,
+    clean=True
+)
+
 
 def compress_pdf(
     file: str,
@@ -35,57 +45,118 @@ def compress_pdf(
         for page_num in range(total_pages):
             page = doc[page_num]
 
-            # Get images on this page
-            image_list = page.get_images()
+            _compress_page_images(doc, page, quality)
 
-            for img_index, img in enumerate(image_list):
-                xref = img[0]
+            if _progress_callback:
+                progress = (page_num + 1) / total_pages * 100
+                _progress_callback(progress, f"Processing page {page_num + 1}/{total_pages}")
 
-                try:
-                    # Extract image
-                    base_image = doc.extract_image(xref)
-                    if base_image:
-                        image_bytes = base_image["image"]
-                        image_ext = base_image["ext"]
+        # Save with garbage collection and compression
+        doc.save(outputPath, **SAVE_OPTIONS)
 
-                        # Only compress JPEG/PNG images
-                        if image_ext in ("jpeg", "jpg", "png"):
-                            # Re-compress image with lower quality
-                            from PIL import Image
-                            import io
+        logger.info(f"Compressed PDF saved to {outputPath}")
+        return outputPath
 
-                            img_pil = Image.open(io.BytesIO(image_bytes))
+    finally:
+        doc.close()
 
-                            # Convert to RGB if necessary
-                            if img_pil.mode in ("RGBA", "P"):
-                                img_pil = img_pil.convert("RGB")
 
-                            # Save with compression
-                            output_buffer = io.BytesIO()
-                            img_pil.save(output_buffer, format="JPEG", quality=quality, optimize=True)
+def _compress_page_images(doc: "fitz.Document", page: "fitz.Page", quality: int) -> None:
+    """Re-compress the JPEG/PNG images on a page as JPEG at the given quality."""
+    # Get images on this page
+    image_list = page.get_images()
 
-                            # Replace image in PDF
-                            doc.update_image(xref, output_buffer.getvalue())
+    for img_index, img in enumerate(image_list):
+        xref = img[0]
 
-                except Exception as e:
-                    logger.warning(f"Could not compress image {xref}: {e}")
+        try:
+            # Extract image
+            base_image = doc.extract_image(xref)
+            if base_image:
+                image_bytes = base_image["image"]
+                image_ext = base_image["ext"]
 
-            if _progress_callback:
-                progress = (page_num + 1) / total_pages * 100
-                _progress_callback(progress, f"Processing page {page_num + 1}/{total_pages}")
+                # Only compress JPEG/PNG images
+                if image_ext in ("jpeg", "jpg", "png"):
+                    # Re-compress image with lower quality
+                    from PIL import Image
+                    import io
 
-        # Save with garbage collection and compression
-        doc.save(
-            outputPath,
-            garbage=4,
-            deflate=True,
-            deflate_images=True,
-            deflate_fonts=True,
-            clean=True
-        )
+                    img_pil = Image.open(io.BytesIO(image_bytes))
 
-        logger.info(f"Compressed PDF saved to {outputPath}")
-        return outputPath
+                    # Convert to RGB if necessary
+                    if img_pil.mode in ("RGBA", "P"):
+                        img_pil = img_pil.convert("RGB")
+
+                    # Save with compression
+                    output_buffer = io.BytesIO()
+                    img_pil.save(output_buffer, format="JPEG", quality=quality, optimize=True)
+
+                    # Replace image in PDF
+                    doc.update_image(xref, output_buffer.getvalue())
+
+        except Exception as e:
+            logger.warning(f"Could not compress image {xref}: {e}")
+
+
+def estimate_compress_pdf(
+    file: str,
+    quality: int = 75,
+    samples: int = 3,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Estimate compress_pdf's duration and output size by sampling pages.
+
+    Each sampled page is copied into its own document, which is saved
+    once as stored and once compressed. The size ratio scales the input
+    file size; the time per page scales to the page count.
+
+    Args:
+        file: Input PDF file path
+        quality: Image quality the job would use
+        samples: Number of pages to sample
+        _progress_callback: Optional progress callback
+
+    Returns:
+        Dictionary with duration and outputSize estimates
+    """
+    from core.estimate import Stopwatch, extrapolate, sample_positions
+
+    doc = fitz.open(file)
+    try:
+        total_pages = len(doc)
+        if not total_pages:
+            raise ValueError("PDF has no pages")
+        positions = sample_positions(total_pages, samples)
+
+        time_rates = []
+        size_ratios = []
+        for index, page_num in enumerate(positions):
+            sample = fitz.open()
+            try:
+                sample.insert_pdf(doc, from_page=page_num, to_page=page_num)
+                # As stored in the input, streams copied unchanged
+                original = len(sample.tobytes())
+                with Stopwatch() as watch:
+                    _compress_page_images(sample, sample[0], quality)
+                    compressed = len(sample.tobytes(**SAVE_OPTIONS))
+            finally:
+                sample.close()
+
+            time_rates.append(watch.elapsed)
+            size_ratios.append(compressed / original if original else 1.0)
+
+            if _progress_callback:
+                _progress_callback((index + 1) / len(positions) * 100, f"Sampled page {page_num + 1}")
+
+        return {
+            "duration": extrapolate(time_rates, total_pages),
+            "outputSize": extrapolate(size_ratios, os.path.getsize(file)),
+            "samples": len(positions),
+            "pages": total_pages,
+        }
 
     finally:
         doc.close()
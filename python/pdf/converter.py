@@ -4,7 +4,7 @@ PDF Conversion functionality using PyMuPDF
 
 import os
 import fitz  # PyMuPDF
-from typing import List, Callable, Optional
+from typing import Any, Dict, List, Callable, Optional
 from loguru import logger
 
 
@@ -14,6 +14,7 @@ def pdf_to_images(
     format: str = "png",
     dpi: int = 150,
     _progress_callback: Optional[Callable] = None,
+    _partial_callback: Optional[Callable] = None,
     **kwargs
 ) -> List[str]:
     """
@@ -25,6 +26,8 @@ def pdf_to_images(
         format: Output format (png, jpg)
         dpi: Resolution in DPI
         _progress_callback: Optional progress callback
+        _partial_callback: Optional callback receiving each image as soon
+            as it is written
 
     Returns:
         List of output image file paths
@@ -55,6 +58,8 @@ def pdf_to_images(
                 pix.save(output_path, "png")
 
             output_files.append(output_path)
+            if _partial_callback:
+                _partial_callback(output_path, page=page_num + 1)
 
             if _progress_callback:
                 progress = (page_num + 1) / total_pages * 100
@@ -65,3 +70,62 @@ def pdf_to_images(
 
     finally:
         doc.close()
+
+
+def estimate_pdf_to_images(
+    file: str,
+    format: str = "png",
+    dpi: int = 150,
+    samples: int = 3,
+    _progress_callback: Optional[Callable] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Estimate pdf_to_images's duration and output size by rendering sample pages.
+
+    Sampled pages are rendered and encoded in memory, nothing is written.
+
+    Args:
+        file: Input PDF file path
+        format: Output format the job would use (png, jpg)
+        dpi: Resolution the job would use
+        samples: Number of pages to sample
+        _progress_callback: Optional progress callback
+
+    Returns:
+        Dictionary with duration and outputSize estimates
+    """
+    from core.estimate import Stopwatch, extrapolate, sample_positions
+
+    doc = fitz.open(file)
+    try:
+        total_pages = len(doc)
+        if not total_pages:
+            raise ValueError("PDF has no pages")
+        positions = sample_positions(total_pages, samples)
+
+        zoom = dpi / 72
+        matrix = fitz.Matrix(zoom, zoom)
+        output = "jpeg" if format.lower() in ("jpg", "jpeg") else "png"
+
+        time_rates = []
+        size_rates = []
+        for index, page_num in enumerate(positions):
+            with Stopwatch() as watch:
+                pix = doc[page_num].get_pixmap(matrix=matrix)
+                data = pix.tobytes(output)
+            time_rates.append(watch.elapsed)
+            size_rates.append(len(data))
+
+            if _progress_callback:
+                _progress_callback((index + 1) / len(positions) * 100, f"Rendered page {page_num + 1}")
+
+        return {
+            "duration": extrapolate(time_rates, total_pages),
+            "outputSize": extrapolate(size_rates, total_pages),
+            "samples": len(positions),
+            "pages": total_pages,
+        }
+
+    finally:
+        doc.close()
@@ -3,7 +3,7 @@ PDF Security functionality using PyMuPDF
 """
 
 import fitz  # PyMuPDF
-from typing import Callable, Optional
+from typing import Callable, List, Optional
 from loguru import logger
 
 
@@ -111,6 +111,55 @@ def decrypt_pdf(
         doc.close()
 
 
+# Passwords tried per round trip to the cracking process
+CRACK_BATCH_SIZE = 50
+
+
+def _open_unlocked(file: str, outputPath: str) -> Optional[str]:
+    """
+    Save an unencrypted or owner-password-only PDF without its restrictions.
+
+    Runs in the cracking process.
+
+    Returns:
+        "unencrypted" or "owner" if the file was saved, None if it needs a
+        user password
+    """
+    doc = fitz.open(file)
+    try:
+        if not doc.is_encrypted:
+            doc.save(outputPath, encryption=fitz.PDF_ENCRYPT_NONE)
+            return "unencrypted"
+        # Opening with an empty password works when there's only an owner password
+        if doc.authenticate(""):
+            doc.save(outputPath, encryption=fitz.PDF_ENCRYPT_NONE)
+            return "owner"
+        return None
+    finally:
+        doc.close()
+
+
+def _try_passwords(file: str, outputPath: str, passwords: List[str]) -> Optional[str]:
+    """
+    Try a batch of passwords, saving the decrypted PDF on a match.
+
+    Runs in the cracking process.
+
+    Returns:
+        The matching password, or None
+    """
+    for pwd in passwords:
+        # Reopen for each attempt as authenticate modifies state
+        doc = fitz.open(file)
+        try:
+            if doc.authenticate(pwd):
+                doc.save(outputPath, encryption=fitz.PDF_ENCRYPT_NONE)
+                return pwd
+        finally:
+            doc.close()
+    return None
+
+
 def crack_pdf(
     file: str,
     outputPath: str,
@@ -128,6 +177,10 @@ def crack_pdf(
     (100% success for PDFs with only owner password). If that fails, it falls
     back to brute-force cracking for user-password protected PDFs.
 
+    All PyMuPDF work runs in a child process with its own copy of the
+    library, so a long brute force doesn't hold the server's PDF group and
+    other PDF requests keep running. The child is killed on cancellation.
+
     Args:
         file: Input PDF file path (encrypted)
         outputPath: Output PDF file path (decrypted)
@@ -142,38 +195,31 @@ def crack_pdf(
     """
     import itertools
     import string
+    import multiprocessing
 
     logger.info(f"Attempting to crack PDF: {file}")
     logger.info(f"Method: {method}, MaxLength: {maxLength}, Charset: {charset}")
 
-    doc = fitz.open(file)
+    # Spawn (not fork) so the child doesn't inherit the server's threads and locks
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        # === STEP 1: Try to remove owner password restrictions directly ===
+        # This works 100% for PDFs that only have owner password (restrictions)
+        # but no user password (open password)
+        if _progress_callback:
+            _progress_callback(5, "Trying to remove restrictions directly...")
 
-    try:
-        # Check if PDF is actually encrypted
-        if not doc.is_encrypted:
-            # Not encrypted, just copy the file
+        unlocked = pool.apply(_open_unlocked, (file, outputPath))
+        if unlocked == "unencrypted":
             if _progress_callback:
                 _progress_callback(100, "PDF is not encrypted")
-            doc.save(outputPath, encryption=fitz.PDF_ENCRYPT_NONE)
             return {
                 "success": True,
                 "password": None,
                 "message": "PDF was not encrypted",
                 "outputPath": outputPath
             }
-
-        # === STEP 1: Try to remove owner password restrictions directly ===
-        # This works 100% for PDFs that only have owner password (restrictions)
-        # but no user password (open password)
-        if _progress_callback:
-            _progress_callback(5, "Trying to remove restrictions directly...")
-
-        # Try opening with empty password - this works for owner-password-only PDFs
-        if doc.authenticate(""):
-            logger.info("PDF only has owner password restrictions - removing directly")
-            if _progress_callback:
-                _progress_callback(90, "Removing restrictions...")
-            doc.save(outputPath, encryption=fitz.PDF_ENCRYPT_NONE)
+        if unlocked == "owner":
+            logger.info("PDF only had owner password restrictions - removed directly")
             if _progress_callback:
                 _progress_callback(100, "Done")
             return {
@@ -251,26 +297,17 @@ def crack_pdf(
 
         logger.info(f"Total passwords to try: {total}")
 
-        # Try each password
-        for i, pwd in enumerate(passwords):
-            # Update progress every 100 attempts or at meaningful intervals
-            if _progress_callback and (i % max(1, total // 100) == 0 or i == total - 1):
+        # Try the passwords in batches; cancelling raises from the progress
+        # callback between batches and leaving the pool kills the child
+        for i in range(0, total, CRACK_BATCH_SIZE):
+            if _progress_callback:
                 progress = int((i / total) * 95)  # Leave 5% for saving
                 _progress_callback(progress, f"Trying password {i + 1}/{total}...")
 
-            # Need to reopen doc for each attempt as authenticate modifies state
-            doc.close()
-            doc = fitz.open(file)
-
-            if doc.authenticate(pwd):
+            pwd = pool.apply(_try_passwords, (file, outputPath, passwords[i:i + CRACK_BATCH_SIZE]))
+            if pwd is not None:
                 logger.info(f"Password found: {'[empty]' if pwd == '' else pwd}")
 
-                if _progress_callback:
-                    _progress_callback(98, "Password found! Saving decrypted PDF...")
-
-                # Save decrypted PDF
-                doc.save(outputPath, encryption=fitz.PDF_ENCRYPT_NONE)
-
                 if _progress_callback:
                     _progress_callback(100, "Done")
 
@@ -281,19 +318,16 @@ def crack_pdf(
                     "outputPath": outputPath
                 }
 
-        # No password found
-        if _progress_callback:
-            _progress_callback(100, "Password not found")
+    # No password found
+    if _progress_callback:
+        _progress_callback(100, "Password not found")
 
-        return {
-            "success": False,
-            "password": None,
-            "message": f"Failed to crack password after trying {total} combinations",
-            "outputPath": None
-        }
-
-    finally:
-        doc.close()
+    return {
+        "success": False,
+        "password": None,
+        "message": f"Failed to crack password after trying {total} combinations",
+        "outputPath": None
+    }
 
 
 def get_pdf_info(file: str, password: Optional[str] = None, **kwargs) -> dict:
@@ -14,6 +14,7 @@ def split_pdf(
     ranges: Optional[str] = None,
     everyNPages: Optional[int] = None,
     _progress_callback: Optional[Callable] = None,
+    _partial_callback: Optional[Callable] = None,
     **kwargs
 ) -> List[str]:
     """
@@ -25,6 +26,8 @@ def split_pdf(
         ranges: Page ranges (e.g., "1-3,5,7-9")
         everyNPages: Split every N pages
         _progress_callback: Optional progress callback
+        _partial_callback: Optional callback receiving each output file as
+            soon as it is written
 
     Returns:
         List of output file paths
@@ -38,6 +41,15 @@ def split_pdf(
 
     os.makedirs(outputDir, exist_ok=True)
 
+    def save_pages(start: int, end: int, output_path: str) -> None:
+        output_doc = fitz.open()
+        output_doc.insert_pdf(doc, from_page=start, to_page=end)
+        output_doc.save(output_path)
+        output_doc.close()
+        output_files.append(output_path)
+        if _partial_callback:
+            _partial_callback(output_path, pages=[start + 1, end + 1])
+
     try:
         if everyNPages:
             # Split every N pages
@@ -45,13 +57,8 @@ def split_pdf(
                 start = i
                 end = min(i + everyNPages - 1, total_pages - 1)
 
-                output_doc = fitz.open()
-                output_doc.insert_pdf(doc, from_page=start, to_page=end)
-
                 output_path = os.path.join(outputDir, f"{base_name}_pages_{start + 1}-{end + 1}.pdf")
-                output_doc.save(output_path)
-                output_doc.close()
-                output_files.append(output_path)
+                save_pages(start, end, output_path)
 
                 if _progress_callback:
                     progress = (end + 1) / total_pages * 100
@@ -62,13 +69,8 @@ def split_pdf(
             range_list = parse_page_ranges(ranges, total_pages)
 
             for idx, (start, end) in enumerate(range_list):
-                output_doc = fitz.open()
-                output_doc.insert_pdf(doc, from_page=start, to_page=end)
-
                 output_path = os.path.join(outputDir, f"{base_name}_pages_{start + 1}-{end + 1}.pdf")
-                output_doc.save(output_path)
-                output_doc.close()
-                output_files.append(output_path)
+                save_pages(start, end, output_path)
 
                 if _progress_callback:
                     progress = (idx + 1) / len(range_list) * 100
@@ -77,13 +79,8 @@ def split_pdf(
         else:
             # Split into individual pages
             for i in range(total_pages):
-                output_doc = fitz.open()
-                output_doc.insert_pdf(doc, from_page=i, to_page=i)
-
                 output_path = os.path.join(outputDir, f"{base_name}_page_{i + 1}.pdf")
-                output_doc.save(output_path)
-                output_doc.close()
-                output_files.append(output_path)
+                save_pages(i, i, output_path)
 
                 if _progress_callback:
                     progress = (i + 1) / total_pages * 100
@@ -72,6 +72,10 @@ export function registerIpcHandlers(ipcMain: IpcMain, pythonBridge: PythonBridge
     return pythonBridge.mediaInfo(file)
   })
 
+  ipcMain.handle('media:infoMany', async (_, files: string[], maxWorkers?: number) => {
+    return pythonBridge.mediaInfoMany(files, maxWorkers)
+  })
+
   ipcMain.handle('media:videoCompress', async (_, file: string, outputPath: string, options) => {
     return pythonBridge.videoCompress(file, outputPath, options)
   })
@@ -88,6 +92,33 @@ export function registerIpcHandlers(ipcMain: IpcMain, pythonBridge: PythonBridge
     return pythonBridge.audioExtract(file, outputPath, format)
   })
 
+  ipcMain.handle(
+    'media:trim',
+    async (_, file: string, outputPath: string, startTime: number, endTime: number, options) => {
+      return pythonBridge.mediaTrim(file, outputPath, startTime, endTime, options || {})
+    }
+  )
+
+  ipcMain.handle('media:fanout', async (_, file: string, outputs) => {
+    return pythonBridge.mediaFanout(file, outputs)
+  })
+
+  ipcMain.handle('media:thumbnails', async (_, file: string, options) => {
+    return pythonBridge.mediaThumbnails(file, options || {})
+  })
+
+  ipcMain.handle('media:waveform', async (_, file: string, options) => {
+    return pythonBridge.mediaWaveform(file, options || {})
+  })
+
+  ipcMain.handle('media:concat', async (_, files: string[], outputPath: string, options) => {
+    return pythonBridge.mediaConcat(files, outputPath, options || {})
+  })
+
+  ipcMain.handle('media:batch', async (_, jobs, options) => {
+    return pythonBridge.mediaBatch(jobs, options || {})
+  })
+
   ipcMain.handle('media:videoToGif', async (_, file: string, outputPath: string, options) => {
     return pythonBridge.videoToGif(file, outputPath, options || {})
   })
@@ -143,6 +174,14 @@ export function registerIpcHandlers(ipcMain: IpcMain, pythonBridge: PythonBridge
     return pythonBridge.cancelTask(taskId)
   })
 
+  ipcMain.handle('task:reprioritize', async (_, taskId: string, priority) => {
+    return pythonBridge.reprioritizeTask(taskId, priority)
+  })
+
+  ipcMain.handle('task:estimate', async (_, method, params, samples?: number) => {
+    return pythonBridge.estimateTask(method, params, samples)
+  })
+
   ipcMain.handle('task:cleanup', async (_, filePath: string) => {
     return pythonBridge.cleanupFile(filePath)
   })
@@ -154,4 +193,11 @@ export function registerIpcHandlers(ipcMain: IpcMain, pythonBridge: PythonBridge
       win.webContents.send('task:progress', data)
     })
   })
+
+  pythonBridge.on('partial', (data) => {
+    const windows = BrowserWindow.getAllWindows()
+    windows.forEach((win) => {
+      win.webContents.send('task:partial', data)
+    })
+  })
 }
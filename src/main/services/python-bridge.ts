@@ -34,13 +34,103 @@ interface ProgressEvent {
   taskId: string
   progress: number
   message?: string
+  // FFmpeg throughput details (media tasks only)
+  outTime?: number
+  fps?: number
+  speed?: number
+  bitrate?: number
+  eta?: number
+  // Set while the task waits for a worker or for memory to free up
+  queued?: boolean
+  queuePosition?: number
+  queueDepth?: number
+  // Rough seconds until the task starts (null until the methods ahead have run once)
+  estimatedWait?: number | null
+  // media.batch job updates
+  jobIndex?: number
+  jobResult?: BatchJobResult
+}
+
+// An output a task produced before finishing (pdf.split, pdf.toImages, download.video)
+interface PartialEvent {
+  taskId: string
+  index: number
+  output: string
+  page?: number
+  pages?: [number, number]
+}
+
+interface EstimateRange {
+  estimate: number
+  low: number
+  high: number
+}
+
+// Sampling-based estimate of a job (seconds and bytes)
+interface TaskEstimate {
+  method: string
+  duration: EstimateRange
+  outputSize: EstimateRange
+  confidence: number
+  samples: number
+  sampleTime: number
+}
+
+// One output of media.fanout; audio settings apply to audio outputs,
+// video settings to video outputs. All outputs are written by one FFmpeg
+// process and advance together, so a fan-out reports a single progress.
+interface FanoutOutput {
+  outputPath: string
+  format?: string
+  type?: 'audio' | 'video'
+  bitrate?: string
+  sampleRate?: number
+  quality?: number
+  preset?: string
+  resolution?: string
+}
+
+interface Thumbnails {
+  frames: string[]
+  times: number[]
+  sprite: string
+  columns: number
+  rows: number
+  tileWidth: number
+  tileHeight: number
+}
+
+interface Waveform {
+  duration: number
+  level: number
+  peaksPerSecond: number
+  startTime: number
+  endTime: number
+  min: number[]
+  max: number[]
+  levels: { level: number; samplesPerPeak: number; peaksPerSecond: number; count: number }[]
+}
+
+interface BatchJob {
+  method: string
+  params: Record<string, unknown>
+}
+
+interface BatchJobResult {
+  index: number
+  method: string
+  success: boolean
+  result?: unknown
+  error?: string
 }
 
 export class PythonBridge extends EventEmitter {
   private process: ChildProcess | null = null
   private messageId = 0
   private pendingRequests = new Map<number, PendingRequest>()
-  private buffer = ''
+  private buffer: Buffer = Buffer.alloc(0)
+  // Output framing announced by the backend's ready message
+  private transport: 'lines' | 'framed' = 'lines'
   private isRunning = false
   private readonly REQUEST_TIMEOUT = 300000 // 5 minutes
 
@@ -136,7 +226,10 @@ export class PythonBridge extends EventEmitter {
           PYTHONUNBUFFERED: '1',
           PYTHONIOENCODING: 'utf-8',
           FFMPEG_PATH: ffmpegPathValue,
-          FFPROBE_PATH: ffprobePathValue
+          FFPROBE_PATH: ffprobePathValue,
+          // Length-prefixed output frames: no line scanning of large results
+          IHW_TRANSPORT: 'framed',
+          IHW_CODEC: 'json'
         },
         // Windows-specific options for better stability
         windowsHide: true,
@@ -144,8 +237,11 @@ export class PythonBridge extends EventEmitter {
         shell: process.platform === 'win32'
       })
 
+      this.buffer = Buffer.alloc(0)
+      this.transport = 'lines'
+
       this.process.stdout?.on('data', (data: Buffer) => {
-        this.handleOutput(data.toString())
+        this.handleOutput(data)
       })
 
       this.process.stderr?.on('data', (data: Buffer) => {
@@ -179,45 +275,78 @@ export class PythonBridge extends EventEmitter {
     this.rejectAllPending('Python bridge stopped')
   }
 
-  private handleOutput(data: string): void {
-    this.buffer += data
-    const lines = this.buffer.split('\n')
-    this.buffer = lines.pop() || ''
+  private handleOutput(data: Buffer): void {
+    this.buffer = this.buffer.length ? Buffer.concat([this.buffer, data]) : data
+
+    // Messages are newline-delimited until the ready message switches to
+    // length-prefixed frames (4-byte big-endian length + JSON payload)
+    while (this.buffer.length) {
+      let payload: Buffer
+      if (this.transport === 'framed') {
+        if (this.buffer.length < 4) break
+        const length = this.buffer.readUInt32BE(0)
+        if (this.buffer.length < 4 + length) break
+        payload = this.buffer.subarray(4, 4 + length)
+        this.buffer = this.buffer.subarray(4 + length)
+      } else {
+        const newline = this.buffer.indexOf(0x0a)
+        if (newline === -1) break
+        payload = this.buffer.subarray(0, newline)
+        this.buffer = this.buffer.subarray(newline + 1)
+      }
 
-    for (const line of lines) {
-      if (!line.trim()) continue
+      const text = payload.toString('utf8')
+      if (!text.trim()) continue
 
+      let message: Record<string, unknown>
       try {
-        const message = JSON.parse(line)
-
-        // Check if it's a progress event
-        if (message.type === 'progress') {
-          const progressEvent: ProgressEvent = {
-            taskId: message.taskId,
-            progress: message.progress,
-            message: message.message
-          }
-          this.emit('progress', progressEvent)
-          continue
-        }
-
-        // Handle JSON-RPC response
-        const response = message as JsonRpcResponse
-        const pending = this.pendingRequests.get(response.id)
-
-        if (pending) {
-          clearTimeout(pending.timeout)
-          this.pendingRequests.delete(response.id)
-
-          if (response.error) {
-            pending.reject(new Error(response.error.message))
-          } else {
-            pending.resolve(response.result)
-          }
-        }
+        message = JSON.parse(text)
       } catch (e) {
         // Not JSON, might be regular log output
-        console.log('[Python]:', line)
+        console.log('[Python]:', text)
+        continue
+      }
+      this.handleMessage(message)
+    }
+  }
+
+  private handleMessage(message: Record<string, unknown>): void {
+    // Backend announces readiness with its startup timings and transport
+    if (message.type === 'ready') {
+      console.log('[Python] Backend ready:', JSON.stringify(message.timings || {}))
+      if (message.transport === 'framed') {
+        this.transport = 'framed'
+      }
+      this.emit('ready', message.timings || {})
+      return
+    }
+
+    // Check if it's a progress event
+    if (message.type === 'progress') {
+      // Forward every field except the message type (details vary per method)
+      const { type: _type, ...progressEvent } = message as unknown as ProgressEvent & { type: string }
+      this.emit('progress', progressEvent)
+      return
+    }
+
+    if (message.type === 'partial') {
+      const { type: _type, ...partialEvent } = message as unknown as PartialEvent & { type: string }
+      this.emit('partial', partialEvent)
+      return
+    }
+
+    // Handle JSON-RPC response
+    const response = message as unknown as JsonRpcResponse
+    const pending = this.pendingRequests.get(response.id)
+
+    if (pending) {
+      clearTimeout(pending.timeout)
+      this.pendingRequests.delete(response.id)
+
+      if (response.error) {
+        pending.reject(new Error(response.error.message))
+      } else {
+        pending.resolve(response.result)
       }
     }
   }
@@ -325,10 +454,25 @@ export class PythonBridge extends EventEmitter {
     return this.call('media.info', { file })
   }
 
+  async mediaInfoMany(
+    files: string[],
+    maxWorkers?: number
+  ): Promise<Record<string, object | { error: string }>> {
+    return this.call('media.infoMany', { files, maxWorkers })
+  }
+
   async videoCompress(
     file: string,
     outputPath: string,
-    options: { quality?: number; preset?: string; resolution?: string }
+    options: {
+      quality?: number
+      preset?: string
+      resolution?: string
+      parallel?: boolean
+      segments?: number
+      targetSizeMB?: number
+      quickAnalysis?: boolean
+    }
   ): Promise<string> {
     return this.call('media.videoCompress', { file, outputPath, ...options })
   }
@@ -349,10 +493,64 @@ export class PythonBridge extends EventEmitter {
     return this.call('media.audioExtract', { file, outputPath, format })
   }
 
+  async mediaTrim(
+    file: string,
+    outputPath: string,
+    startTime: number,
+    endTime: number,
+    options: { smartCut?: boolean } = {}
+  ): Promise<string> {
+    return this.call('media.trim', { file, outputPath, startTime, endTime, ...options })
+  }
+
+  async mediaFanout(file: string, outputs: FanoutOutput[]): Promise<string[]> {
+    return this.call('media.fanout', { file, outputs })
+  }
+
+  async mediaThumbnails(
+    file: string,
+    options: {
+      count?: number
+      width?: number
+      columns?: number
+      format?: 'jpg' | 'png'
+      outputPath?: string
+      // Without outputPath/outputDir the returned paths point into the cache
+      outputDir?: string
+    } = {}
+  ): Promise<Thumbnails> {
+    return this.call('media.thumbnails', { file, ...options })
+  }
+
+  async mediaWaveform(
+    file: string,
+    options: { startTime?: number; endTime?: number; maxPeaks?: number; level?: number } = {}
+  ): Promise<Waveform> {
+    return this.call('media.waveform', { file, ...options })
+  }
+
+  async mediaConcat(files: string[], outputPath: string, options: { quality?: number; preset?: string } = {}): Promise<string> {
+    return this.call('media.concat', { files, outputPath, ...options })
+  }
+
+  async mediaBatch(
+    jobs: BatchJob[],
+    options: { maxConcurrent?: number } = {}
+  ): Promise<{ results: BatchJobResult[]; succeeded: number; failed: number }> {
+    return this.call('media.batch', { jobs, ...options })
+  }
+
   async videoToGif(
     file: string,
     outputPath: string,
-    options: { fps?: number; width?: number; startTime?: number; duration?: number }
+    options: {
+      fps?: number
+      width?: number
+      startTime?: number
+      duration?: number
+      dither?: string
+      dedupe?: boolean
+    }
   ): Promise<string> {
     return this.call('media.videoToGif', { file, outputPath, ...options })
   }
@@ -365,7 +563,7 @@ export class PythonBridge extends EventEmitter {
   async imageCreateGif(
     files: string[],
     outputPath: string,
-    options: { frameDelay?: number; loop?: number }
+    options: { frameDelay?: number; loop?: number; dedupe?: boolean }
   ): Promise<string> {
     return this.call('image.createGif', { files, outputPath, ...options })
   }
@@ -470,7 +668,57 @@ export class PythonBridge extends EventEmitter {
     return this.call('task:cancel', { taskId })
   }
 
+  async reprioritizeTask(
+    taskId: string,
+    priority: 'interactive' | 'normal' | 'batch'
+  ): Promise<{ reprioritized: boolean; taskId: string; priority: string }> {
+    return this.call('task:reprioritize', { taskId, priority })
+  }
+
+  async estimateTask(
+    method: 'media.videoCompress' | 'pdf.compress' | 'pdf.toImages',
+    params: Record<string, unknown>,
+    samples?: number
+  ): Promise<TaskEstimate> {
+    return this.call('task.estimate', { method, params, samples })
+  }
+
   async cleanupFile(filePath: string): Promise<{ cleaned: boolean; filePath: string }> {
     return this.call('task:cleanup', { filePath })
   }
+
+  // Result Cache Operations
+  async cacheStats(): Promise<{
+    root: string
+    entries: number
+    size: number
+    maxSize: number
+    hits: number
+    misses: number
+  }> {
+    return this.call('cache:stats', {})
+  }
+
+  async cacheClear(): Promise<{ removed: number }> {
+    return this.call('cache:clear', {})
+  }
+
+  // Instrumentation
+  async serverStats(reset = false): Promise<{
+    uptime: number
+    // Whole-process figures; per-call memory is in methods[].maxPeakRssGrowthMB
+    process: { peakRssMB: number | null; rssMB: number | null; childCpuMs: number }
+    inflight: number
+    methods: Record<string, Record<string, number>>
+    startup: Record<string, number>
+  }> {
+    return this.call('server.stats', { reset })
+  }
+
+  async serverProfile(
+    enabled: boolean,
+    options: { mode?: 'cprofile' | 'sampling'; methods?: string[] } = {}
+  ): Promise<{ enabled: boolean; mode: string | null }> {
+    return this.call('server.profile', { enabled, ...options })
+  }
 }
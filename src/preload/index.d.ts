@@ -63,10 +63,22 @@ interface MediaInfo {
 
 interface MediaApi {
   info: (file: string) => Promise<MediaInfo>
+  infoMany: (
+    files: string[],
+    maxWorkers?: number
+  ) => Promise<Record<string, MediaInfo | { error: string }>>
   videoCompress: (
     file: string,
     outputPath: string,
-    options?: { quality?: number; preset?: string; resolution?: string }
+    options?: {
+      quality?: number
+      preset?: string
+      resolution?: string
+      parallel?: boolean
+      segments?: number
+      targetSizeMB?: number
+      quickAnalysis?: boolean
+    }
   ) => Promise<string>
   videoConvert: (file: string, outputPath: string, format: string) => Promise<string>
   audioConvert: (
@@ -75,21 +87,118 @@ interface MediaApi {
     options: { format: string; bitrate?: string; sampleRate?: number }
   ) => Promise<string>
   audioExtract: (file: string, outputPath: string, format?: string) => Promise<string>
+  trim: (
+    file: string,
+    outputPath: string,
+    startTime: number,
+    endTime: number,
+    options?: { smartCut?: boolean }
+  ) => Promise<string>
   videoToGif: (
     file: string,
     outputPath: string,
-    options?: { fps?: number; width?: number; startTime?: number; duration?: number }
+    options?: {
+      fps?: number
+      width?: number
+      startTime?: number
+      duration?: number
+      dither?: string
+      dedupe?: boolean
+    }
   ) => Promise<string>
+  fanout: (file: string, outputs: FanoutOutput[]) => Promise<string[]>
+  thumbnails: (
+    file: string,
+    options?: {
+      count?: number
+      width?: number
+      columns?: number
+      format?: 'jpg' | 'png'
+      outputPath?: string
+      outputDir?: string
+    }
+  ) => Promise<Thumbnails>
+  waveform: (file: string, options?: { startTime?: number; endTime?: number; maxPeaks?: number; level?: number }) => Promise<Waveform>
+  concat: (files: string[], outputPath: string, options?: { quality?: number; preset?: string }) => Promise<string>
+  batch: (
+    jobs: BatchJob[],
+    options?: { maxConcurrent?: number }
+  ) => Promise<{ results: BatchJobResult[]; succeeded: number; failed: number }>
+}
+
+interface FanoutOutput {
+  outputPath: string
+  format?: string
+  type?: 'audio' | 'video'
+  bitrate?: string
+  sampleRate?: number
+  quality?: number
+  preset?: string
+  resolution?: string
+}
+
+interface Thumbnails {
+  frames: string[]
+  times: number[]
+  sprite: string
+  columns: number
+  rows: number
+  tileWidth: number
+  tileHeight: number
+}
+
+interface Waveform {
+  duration: number
+  level: number
+  peaksPerSecond: number
+  startTime: number
+  endTime: number
+  min: number[]
+  max: number[]
+  levels: { level: number; samplesPerPeak: number; peaksPerSecond: number; count: number }[]
+}
+
+interface BatchJob {
+  method: string
+  params: Record<string, unknown>
+}
+
+interface BatchJobResult {
+  index: number
+  method: string
+  success: boolean
+  result?: unknown
+  error?: string
 }
 
 interface ProgressData {
   taskId: string
   progress: number
   message?: string
+  outTime?: number
+  fps?: number
+  speed?: number
+  bitrate?: number
+  eta?: number
+  jobIndex?: number
+  jobResult?: BatchJobResult
+  queued?: boolean
+  queuePosition?: number
+  queueDepth?: number
+  estimatedWait?: number | null
+}
+
+interface PartialData {
+  taskId: string
+  index: number
+  output: string
+  page?: number
+  pages?: [number, number]
 }
 
 interface Events {
   onProgress: (callback: (data: ProgressData) => void) => () => void
+  onPartial: (callback: (data: PartialData) => void) => () => void
 }
 
 interface VideoFormat {
@@ -144,8 +253,32 @@ interface DownloadApi {
   ) => Promise<DownloadResult>
 }
 
+interface EstimateRange {
+  estimate: number
+  low: number
+  high: number
+}
+
+interface TaskEstimate {
+  method: string
+  duration: EstimateRange
+  outputSize: EstimateRange
+  confidence: number
+  samples: number
+  sampleTime: number
+}
+
 interface TaskApi {
   cancel: (taskId: string) => Promise<{ cancelled: boolean; taskId: string }>
+  reprioritize: (
+    taskId: string,
+    priority: 'interactive' | 'normal' | 'batch'
+  ) => Promise<{ reprioritized: boolean; taskId: string; priority: string }>
+  estimate: (
+    method: 'media.videoCompress' | 'pdf.compress' | 'pdf.toImages',
+    params: Record<string, unknown>,
+    samples?: number
+  ) => Promise<TaskEstimate>
   cleanup: (filePath: string) => Promise<{ cleaned: boolean; filePath: string }>
 }
 
@@ -43,10 +43,20 @@ const pdfApi = {
 // Media operations API
 const mediaApi = {
   info: (file: string) => ipcRenderer.invoke('media:info', file),
+  infoMany: (files: string[], maxWorkers?: number) =>
+    ipcRenderer.invoke('media:infoMany', files, maxWorkers),
   videoCompress: (
     file: string,
     outputPath: string,
-    options?: { quality?: number; preset?: string; resolution?: string }
+    options?: {
+      quality?: number
+      preset?: string
+      resolution?: string
+      parallel?: boolean
+      segments?: number
+      targetSizeMB?: number
+      quickAnalysis?: boolean
+    }
   ) => ipcRenderer.invoke('media:videoCompress', file, outputPath, options),
   videoConvert: (file: string, outputPath: string, format: string) =>
     ipcRenderer.invoke('media:videoConvert', file, outputPath, format),
@@ -57,11 +67,46 @@ const mediaApi = {
   ) => ipcRenderer.invoke('media:audioConvert', file, outputPath, options),
   audioExtract: (file: string, outputPath: string, format?: string) =>
     ipcRenderer.invoke('media:audioExtract', file, outputPath, format),
+  trim: (
+    file: string,
+    outputPath: string,
+    startTime: number,
+    endTime: number,
+    options?: { smartCut?: boolean }
+  ) => ipcRenderer.invoke('media:trim', file, outputPath, startTime, endTime, options),
   videoToGif: (
     file: string,
     outputPath: string,
-    options?: { fps?: number; width?: number; startTime?: number; duration?: number }
-  ) => ipcRenderer.invoke('media:videoToGif', file, outputPath, options)
+    options?: {
+      fps?: number
+      width?: number
+      startTime?: number
+      duration?: number
+      dither?: string
+      dedupe?: boolean
+    }
+  ) => ipcRenderer.invoke('media:videoToGif', file, outputPath, options),
+  fanout: (file: string, outputs: { outputPath: string; [key: string]: unknown }[]) =>
+    ipcRenderer.invoke('media:fanout', file, outputs),
+  thumbnails: (
+    file: string,
+    options?: {
+      count?: number
+      width?: number
+      columns?: number
+      format?: 'jpg' | 'png'
+      outputPath?: string
+      outputDir?: string
+    }
+  ) => ipcRenderer.invoke('media:thumbnails', file, options),
+  waveform: (file: string, options?: { startTime?: number; endTime?: number; maxPeaks?: number; level?: number }) =>
+    ipcRenderer.invoke('media:waveform', file, options),
+  concat: (files: string[], outputPath: string, options?: { quality?: number; preset?: string }) =>
+    ipcRenderer.invoke('media:concat', files, outputPath, options),
+  batch: (
+    jobs: { method: string; params: Record<string, unknown> }[],
+    options?: { maxConcurrent?: number }
+  ) => ipcRenderer.invoke('media:batch', jobs, options)
 }
 
 // Image operations API
@@ -70,7 +115,7 @@ const imageApi = {
   createGif: (
     files: string[],
     outputPath: string,
-    options?: { frameDelay?: number; loop?: number }
+    options?: { frameDelay?: number; loop?: number; dedupe?: boolean }
   ) => ipcRenderer.invoke('image:createGif', files, outputPath, options),
   resize: (
     file: string,
@@ -120,6 +165,13 @@ const downloadApi = {
 // Task management API
 const taskApi = {
   cancel: (taskId: string) => ipcRenderer.invoke('task:cancel', taskId),
+  reprioritize: (taskId: string, priority: 'interactive' | 'normal' | 'batch') =>
+    ipcRenderer.invoke('task:reprioritize', taskId, priority),
+  estimate: (
+    method: 'media.videoCompress' | 'pdf.compress' | 'pdf.toImages',
+    params: Record<string, unknown>,
+    samples?: number
+  ) => ipcRenderer.invoke('task:estimate', method, params, samples),
   cleanup: (filePath: string) => ipcRenderer.invoke('task:cleanup', filePath)
 }
 
@@ -130,6 +182,12 @@ const events = {
       callback(data)
     ipcRenderer.on('task:progress', handler)
     return () => ipcRenderer.removeListener('task:progress', handler)
+  },
+  onPartial: (callback: (data: { taskId: string; index: number; output: string }) => void) => {
+    const handler = (_: unknown, data: { taskId: string; index: number; output: string }) =>
+      callback(data)
+    ipcRenderer.on('task:partial', handler)
+    return () => ipcRenderer.removeListener('task:partial', handler)
   }
 }
 
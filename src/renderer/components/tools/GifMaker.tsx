@@ -13,6 +13,7 @@ export function GifMaker(): JSX.Element {
   const [outputPath, setOutputPath] = useState<string>('')
   const [frameDelay, setFrameDelay] = useState<number>(100)
   const [loop, setLoop] = useState<number>(0)
+  const [dedupe, setDedupe] = useState<boolean>(false)
 
   const { isProcessing, progress, error, result, execute, reset } = useTask({
     taskType: 'image:createGif'
@@ -55,7 +56,7 @@ export function GifMaker(): JSX.Element {
   const handleProcess = async () => {
     if (files.length < 2 || !outputPath) return
     const paths = filesToPaths(files)
-    await execute(() => window.api.image.createGif(paths, outputPath, { frameDelay, loop }))
+    await execute(() => window.api.image.createGif(paths, outputPath, { frameDelay, loop, dedupe }))
   }
 
   const handleReset = () => {
@@ -64,6 +65,7 @@ export function GifMaker(): JSX.Element {
     setOutputPath('')
     setFrameDelay(100)
     setLoop(0)
+    setDedupe(false)
   }
 
   const handleOpenResult = () => {
@@ -132,6 +134,16 @@ export function GifMaker(): JSX.Element {
                     </select>
                   </div>
                 </div>
+
+                <label className="flex items-center gap-2 cursor-pointer">
+                  <input
+                    type="checkbox"
+                    checked={dedupe}
+                    onChange={(e) => setDedupe(e.target.checked)}
+                    disabled={isProcessing}
+                  />
+                  <span className="text-gray-300">{t.image.mergeDuplicateFrames}</span>
+                </label>
               </div>
 
               <div className="card space-y-4">
@@ -37,6 +37,7 @@ export function VideoToGif(): JSX.Element {
   const [fps, setFps] = useState<number>(10)
   const [startTime, setStartTime] = useState<string>('')
   const [duration, setDuration] = useState<string>('')
+  const [dedupe, setDedupe] = useState<boolean>(false)
   const [mediaInfo, setMediaInfo] = useState<MediaInfo | null>(null)
 
   const { isProcessing, progress, error, result, execute, reset } = useTask({
@@ -82,9 +83,10 @@ export function VideoToGif(): JSX.Element {
     if (!file || !outputPath) return
     const filePath = window.api.file.getFilePath(file)
 
-    const options: { fps: number; width: number; startTime?: number; duration?: number } = {
+    const options: { fps: number; width: number; startTime?: number; duration?: number; dedupe: boolean } = {
       fps,
-      width
+      width,
+      dedupe
     }
 
     const parsedStart = parseTime(startTime)
@@ -108,6 +110,7 @@ export function VideoToGif(): JSX.Element {
     setFps(10)
     setStartTime('')
     setDuration('')
+    setDedupe(false)
     setMediaInfo(null)
   }
 
@@ -265,6 +268,16 @@ export function VideoToGif(): JSX.Element {
                     <p className="text-xs text-gray-500 mt-2">{t.media.gifTimeHint}</p>
                   </div>
 
+                  <label className="flex items-center gap-2 cursor-pointer">
+                    <input
+                      type="checkbox"
+                      checked={dedupe}
+                      onChange={(e) => setDedupe(e.target.checked)}
+                      disabled={isProcessing}
+                    />
+                    <span className="text-sm text-gray-300">{t.media.mergeDuplicateFrames}</span>
+                  </label>
+
                   {/* Output Path */}
                   <div>
                     <label className="flex items-center gap-2 text-sm text-gray-300 mb-2">
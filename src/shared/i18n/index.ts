@@ -70,6 +70,7 @@ export const translations = {
       videoConvertDesc: '轉換影片格式',
       videoToGif: '影片轉 GIF',
       videoToGifDesc: '將影片轉換為 GIF 動圖',
+      mergeDuplicateFrames: '合併重複幀',
       audioConvert: '轉換音訊',
       audioConvertDesc: '轉換音訊格式（支援 20+ 格式）',
       audioExtract: '擷取音訊',
@@ -126,6 +127,7 @@ export const translations = {
       keepAspectRatio: '維持比例',
       frameDelay: '幀延遲 (ms)',
       loop: '循環播放',
+      mergeDuplicateFrames: '合併重複幀',
       flipHorizontal: '水平翻轉',
       flipVertical: '垂直翻轉',
       scaleFactor: '放大倍數',
@@ -299,6 +301,7 @@ export const translations = {
       videoConvertDesc: 'Convert video format',
       videoToGif: 'Video to GIF',
       videoToGifDesc: 'Convert video to GIF animation',
+      mergeDuplicateFrames: 'Merge duplicate frames',
       audioConvert: 'Convert Audio',
       audioConvertDesc: 'Convert audio format (20+ supported)',
       audioExtract: 'Extract Audio',
@@ -352,6 +355,7 @@ export const translations = {
       keepAspectRatio: 'Keep Aspect Ratio',
       frameDelay: 'Frame Delay (ms)',
       loop: 'Loop',
+      mergeDuplicateFrames: 'Merge duplicate frames',
       flipHorizontal: 'Flip Horizontal',
       flipVertical: 'Flip Vertical',
       scaleFactor: 'Scale Factor',
@@ -519,6 +523,7 @@ export const translations = {
       videoConvertDesc: '動画形式を変換',
       videoToGif: '動画を GIF に',
       videoToGifDesc: '動画を GIF アニメーションに変換',
+      mergeDuplicateFrames: '重複フレームを結合',
       audioConvert: '音声を変換',
       audioConvertDesc: '音声形式を変換（20種類以上対応）',
       audioExtract: '音声を抽出',
@@ -572,6 +577,7 @@ export const translations = {
       keepAspectRatio: 'アスペクト比を維持',
       frameDelay: 'フレーム遅延 (ms)',
       loop: 'ループ',
+      mergeDuplicateFrames: '重複フレームを結合',
       flipHorizontal: '水平反転',
       flipVertical: '垂直反転',
       scaleFactor: '拡大率',